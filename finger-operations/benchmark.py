@@ -0,0 +1,246 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║           CALCULADORA CON GESTOS - BENCHMARK                  ║
+║                                                               ║
+║  Mide cada etapa del bucle sin cámara: frames sintéticos a    ║
+║  varias resoluciones y landmarks guardados de 1, 2, 5 y 20    ║
+║  manos. Compara contra una línea base y falla si empeora.     ║
+║                                                               ║
+║  Uso: python benchmark.py --guardar-base base.json            ║
+║       python benchmark.py --comparar base.json                ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import mediapipe as mp
+from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.components.containers import category, landmark
+
+import calculadora_dedos as calc
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "manos.npz")
+
+NUMEROS_MANOS = (1, 2, 5, 20)
+RESOLUCIONES = ((640, 480), (1280, 720), (1920, 1080))
+
+# Mano abierta en coordenadas locales (muñeca en el origen, y hacia arriba negativa)
+MANO_ABIERTA = np.array([
+    (0.00, 0.00),
+    (-0.20, -0.10), (-0.35, -0.25), (-0.50, -0.35), (-0.65, -0.45),   # Pulgar
+    (-0.15, -0.55), (-0.17, -0.80), (-0.18, -0.95), (-0.19, -1.10),   # Índice
+    (0.00, -0.58), (0.00, -0.85), (0.00, -1.02), (0.00, -1.18),       # Medio
+    (0.13, -0.55), (0.15, -0.80), (0.16, -0.95), (0.17, -1.08),       # Anular
+    (0.25, -0.48), (0.29, -0.66), (0.31, -0.78), (0.33, -0.90),       # Meñique
+])
+
+
+# ============================================
+# FIXTURES DE LANDMARKS
+# ============================================
+
+def generar_mano(rng, derecha, centro, escala):
+    """Genera los 21 landmarks normalizados de una mano con dedos levantados al azar"""
+    puntos = MANO_ABIERTA.copy()
+
+    # Doblar dedos al azar: la punta y la DIP bajan por debajo de la PIP
+    for mcp in (5, 9, 13, 17):
+        if rng.random() < 0.5:
+            puntos[mcp + 2] = puntos[mcp + 1] + (0.0, 0.10)
+            puntos[mcp + 3] = puntos[mcp + 1] + (0.0, 0.20)
+    if rng.random() < 0.5:
+        puntos[4] = puntos[3] + (0.08, 0.05)
+
+    # La mano derecha es el reflejo de la izquierda
+    if derecha:
+        puntos[:, 0] *= -1
+
+    puntos = puntos * escala + rng.normal(0, 0.003, puntos.shape)
+    xyz = np.zeros((21, 3), dtype=np.float32)
+    xyz[:, 0] = centro[0] + puntos[:, 0] * 9 / 16
+    xyz[:, 1] = centro[1] + puntos[:, 1]
+    xyz[:, 2] = rng.normal(0, 0.02, 21)
+    return xyz
+
+
+def generar_fixtures(ruta=RUTA_FIXTURES, semilla=0):
+    """Genera y guarda los landmarks de 1, 2, 5 y 20 manos repartidas por el frame"""
+    rng = np.random.default_rng(semilla)
+    datos = {}
+    for n in NUMEROS_MANOS:
+        columnas = int(np.ceil(np.sqrt(n * 16 / 9)))
+        filas = int(np.ceil(n / columnas))
+        landmarks = []
+        derecha = []
+        for i in range(n):
+            fila, columna = divmod(i, columnas)
+            centro = ((columna + 0.5) / columnas, (fila + 0.85) / filas)
+            es_derecha = bool(rng.random() < 0.5)
+            landmarks.append(generar_mano(rng, es_derecha, centro, 0.6 / max(filas, 2)))
+            derecha.append(es_derecha)
+        datos[f"landmarks_{n}"] = np.stack(landmarks)
+        datos[f"derecha_{n}"] = np.array(derecha)
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    np.savez_compressed(ruta, **datos)
+
+
+def cargar_fixture(n, ruta=RUTA_FIXTURES):
+    """Carga los landmarks de n manos como un HandLandmarkerResult de MediaPipe"""
+    with np.load(ruta) as datos:
+        landmarks = datos[f"landmarks_{n}"]
+        derecha = datos[f"derecha_{n}"]
+
+    return vision.HandLandmarkerResult(
+        handedness=[[category.Category(index=0, score=0.99, category_name="Right" if d else "Left")] for d in derecha],
+        hand_landmarks=[[landmark.NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in mano]
+                        for mano in landmarks],
+        hand_world_landmarks=[],
+    )
+
+
+def frame_sintetico(ancho, alto, semilla=0):
+    """Frame BGR con ruido, del tamaño de una captura de cámara"""
+    return np.random.default_rng(semilla).integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+
+def medir(funcion, repeticiones, calentamiento=5):
+    """Ejecuta funcion repetidamente y devuelve throughput y percentiles de latencia en ms"""
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = np.empty(repeticiones)
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos[i] = time.perf_counter() - inicio
+
+    tiempos_ms = tiempos * 1000
+    return {
+        "repeticiones": repeticiones,
+        "por_segundo": repeticiones / tiempos.sum(),
+        "p50": float(np.percentile(tiempos_ms, 50)),
+        "p95": float(np.percentile(tiempos_ms, 95)),
+        "p99": float(np.percentile(tiempos_ms, 99)),
+    }
+
+
+def definir_etapas(resoluciones, detector=None):
+    """Devuelve la lista de (nombre, funcion) de cada etapa a medir"""
+    etapas = []
+
+    for n in NUMEROS_MANOS:
+        resultado = cargar_fixture(n)
+        lados = [c[0].category_name for c in resultado.handedness]
+        array = calc.landmarks_a_array(resultado.hand_landmarks)
+        es_derecha = np.array([lado == "Right" for lado in lados])
+
+        def contar_escalar(resultado=resultado, lados=lados):
+            for mano, lado in zip(resultado.hand_landmarks, lados):
+                calc.contar_dedos(mano, lado, 1280, 720)
+
+        etapas.append((f"contar_dedos[manos={n}]", contar_escalar))
+        etapas.append((f"contar_dedos_lote[manos={n}]",
+                       lambda array=array, es_derecha=es_derecha: calc.contar_dedos_lote(array, es_derecha, 1280, 720)))
+
+    for ancho, alto in resoluciones:
+        img = frame_sintetico(ancho, alto)
+        sufijo = f"{ancho}x{alto}"
+
+        for n in NUMEROS_MANOS:
+            resultado = cargar_fixture(n)
+            etapas.append((f"procesar_manos[manos={n},{sufijo}]",
+                           lambda resultado=resultado, img=img: calc.procesar_manos(resultado, img, dibujar=False)))
+
+            etapas.append((f"dibujar_landmarks[manos={n},{sufijo}]",
+                           lambda resultado=resultado, img=img: calc.dibujar_manos(img, resultado.hand_landmarks)))
+
+        etapas.append((f"dibujar_menu[{sufijo}]",
+                       lambda img=img: calc.dibujar_fase(img, {"fase": "seleccion", "operacion": None, "aviso": "muestra"})))
+        etapas.append((f"dibujar_pantalla_calculo[{sufijo}]",
+                       lambda img=img: calc.dibujar_pantalla_calculo(img, 1, 3, 4, 7)))
+
+        if detector is not None:
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img[:, :, ::-1].copy())
+            etapas.append((f"detect[{sufijo}]", lambda detector=detector, mp_image=mp_image: detector.detect(mp_image)))
+
+    return etapas
+
+
+def comparar(resultados, base, tolerancia):
+    """Devuelve las etapas cuya p50 o p95 empeora más que la tolerancia respecto a la base"""
+    regresiones = []
+    for nombre, metricas in resultados.items():
+        if nombre not in base:
+            continue
+        for percentil in ("p50", "p95"):
+            limite = base[nombre][percentil] * (1 + tolerancia)
+            if metricas[percentil] > limite:
+                regresiones.append((nombre, percentil, base[nombre][percentil], metricas[percentil]))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapas de la calculadora con gestos, sin cámara")
+    parser.add_argument("-n", "--repeticiones", type=int, default=200, help="repeticiones por etapa")
+    parser.add_argument("-k", "--filtro", default="", help="medir solo las etapas que contienen este texto")
+    parser.add_argument("--sin-detector", action="store_true", help="no medir hand_detector.detect")
+    parser.add_argument("--guardar-base", metavar="JSON", help="guardar los resultados como línea base")
+    parser.add_argument("--comparar", metavar="JSON", help="comparar con una línea base y fallar si hay regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="empeoramiento permitido (0.2 = 20%%)")
+    parser.add_argument("--generar-fixtures", action="store_true", help="regenerar fixtures/manos.npz")
+    args = parser.parse_args(argv)
+
+    if args.generar_fixtures or not os.path.exists(RUTA_FIXTURES):
+        generar_fixtures()
+
+    detector = None
+    if not args.sin_detector:
+        try:
+            detector = calc.crear_detector("IMAGE")
+        except RuntimeError as e:
+            print(f"  ✗ Sin detector, no se mide detect: {e}\n")
+    etapas = [(nombre, f) for nombre, f in definir_etapas(RESOLUCIONES, detector) if args.filtro in nombre]
+
+    resultados = {}
+    print(f"{'etapa':48} {'op/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nombre, funcion in etapas:
+        # El detector es mucho más lento: menos repeticiones
+        repeticiones = max(args.repeticiones // 10, 10) if nombre.startswith("detect") else args.repeticiones
+        metricas = medir(funcion, repeticiones)
+        resultados[nombre] = metricas
+        print(f"{nombre:48} {metricas['por_segundo']:10.1f} {metricas['p50']:9.3f} "
+              f"{metricas['p95']:9.3f} {metricas['p99']:9.3f}")
+
+    if detector is not None:
+        detector.close()
+
+    if args.guardar_base:
+        with open(args.guardar_base, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\n  ✓ Línea base guardada en {args.guardar_base}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"\n  ✗ {len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%}):")
+            for nombre, percentil, antes, ahora in regresiones:
+                print(f"    {nombre} {percentil}: {antes:.3f} ms → {ahora:.3f} ms")
+            return 1
+        print(f"\n  ✓ Sin regresiones respecto a {args.comparar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║         CALCULADORA CON GESTOS - NÚCLEO ASÍNCRONO             ║
+║                                                               ║
+║  Varias sesiones (cámaras o vídeos) en un solo proceso sobre  ║
+║  asyncio: la captura, los callbacks de LIVE_STREAM, el        ║
+║  teclado y las salidas son tareas, y ninguna salida lenta     ║
+║  frena el bucle de frames                                     ║
+║                                                               ║
+║  Uso: python calculadora_async.py 0 1 --salida resultados/    ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+import mediapipe as mp
+
+import calculadora_dedos as calc
+from servidor_vista import ServidorVista
+
+# Líneas JSONL pendientes por sesión; si el disco no da abasto se descartan las más antiguas
+MAX_PENDIENTES_JSONL = 256
+
+
+class Ranura:
+    """Guarda solo el dato más reciente; tomar() espera a que haya uno nuevo"""
+
+    def __init__(self):
+        self.dato = None
+        self.hay_dato = asyncio.Event()
+
+    def poner(self, dato):
+        self.dato = dato
+        self.hay_dato.set()
+
+    async def tomar(self):
+        await self.hay_dato.wait()
+        self.hay_dato.clear()
+        dato, self.dato = self.dato, None
+        return dato
+
+
+# ============================================
+# SALIDAS
+# ============================================
+# enviar() se llama desde el bucle de frames y nunca espera; el trabajo lento
+# se hace en la tarea ejecutar() de cada salida
+
+class SalidaVentana:
+    """Ventana de OpenCV por sesión. HighGUI no admite hilos: se dibuja en el bucle de eventos"""
+
+    dibuja = True
+
+    def __init__(self, nombre):
+        self.titulo = f"Calculadora con Gestos - {nombre}"
+        self.ranura = Ranura()
+
+    def enviar(self, img, estado):
+        self.ranura.poner(img)
+
+    async def ejecutar(self):
+        while True:
+            cv2.imshow(self.titulo, await self.ranura.tomar())
+
+    async def cerrar(self):
+        cv2.destroyWindow(self.titulo)
+
+
+class SalidaJSONL:
+    """Estado de cada frame en un fichero JSONL, escrito por lotes en un hilo"""
+
+    dibuja = False
+
+    def __init__(self, ruta):
+        self.fichero = open(ruta, "w", encoding="utf-8")
+        self.cola = asyncio.Queue(maxsize=MAX_PENDIENTES_JSONL)
+        self.descartadas = 0
+
+    def enviar(self, img, estado):
+        if self.cola.full():
+            self.cola.get_nowait()
+            self.descartadas += 1
+        self.cola.put_nowait(json.dumps(estado, ensure_ascii=False) + "\n")
+
+    def pendientes(self):
+        lineas = []
+        while not self.cola.empty():
+            lineas.append(self.cola.get_nowait())
+        return lineas
+
+    async def ejecutar(self):
+        while True:
+            lineas = [await self.cola.get()] + self.pendientes()
+            await asyncio.to_thread(self.fichero.write, "".join(lineas))
+
+    async def cerrar(self):
+        self.fichero.write("".join(self.pendientes()))
+        self.fichero.close()
+        if self.descartadas:
+            print(f"  ✗ {self.fichero.name}: {self.descartadas} líneas descartadas", file=sys.stderr)
+
+
+class SalidaVista:
+    """Vista previa por HTTP de una sesión; ServidorVista ya codifica en su propio hilo"""
+
+    dibuja = True
+
+    def __init__(self, puerto):
+        self.vista = ServidorVista(calc.HOST_VISTA, puerto, calc.CALIDAD_JPEG)
+        self.vista.iniciar()
+        print(f"  ✓ Vista previa en {self.vista.url}")
+
+    def enviar(self, img, estado):
+        self.vista.publicar(img, estado)
+
+    async def ejecutar(self):
+        pass
+
+    async def cerrar(self):
+        self.vista.cerrar()
+
+
+# ============================================
+# SESIÓN
+# ============================================
+
+def abrir_fuente(fuente):
+    if fuente.isdigit():
+        captura = cv2.VideoCapture(int(fuente))
+        captura.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+        captura.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    else:
+        captura = cv2.VideoCapture(fuente)
+    if not captura.isOpened():
+        raise RuntimeError(f"No se puede abrir la fuente: {fuente}")
+    return captura
+
+
+class Sesion:
+    """
+    Una calculadora: fuente de frames, detector LIVE_STREAM, seguimiento,
+    máquina de fases y sus salidas. Todo su estado se toca solo desde el bucle
+    de eventos; el callback del detector le pasa los resultados con
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, nombre, fuente, salidas, espejo=True):
+        self.nombre = nombre
+        self.fuente = fuente
+        self.salidas = salidas
+        self.espejo = espejo
+
+        self.maquina = calc.MaquinaFases()
+        self.seguidor = calc.SeguidorManos()
+        self.entrada = calc.EntradaDetector()
+        self.almacen = calc.AlmacenManos()
+        self.regiones = {}
+
+        self.loop = None
+        self.activa = True
+        self.frames = 0
+        self.ultimo_timestamp_ms = 0
+        self.ultimo_resultado = 0
+        self.manos = []
+        self.manos_nuevas = False
+
+    def timestamp_monotono_ms(self):
+        timestamp_ms = int(time.monotonic() * 1000)
+        if timestamp_ms <= self.ultimo_timestamp_ms:
+            timestamp_ms = self.ultimo_timestamp_ms + 1
+        self.ultimo_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def al_recibir_resultado(self, detection_result, output_image, timestamp_ms):
+        """Callback del detector (hilo de MediaPipe): cuenta dedos y pasa el resultado al bucle"""
+        region = self.regiones.pop(timestamp_ms, None)
+        if region is None:
+            return
+        # Registros del almacén sin copiar: ejecutar() manda un frame por iteración, así que el
+        # bucle los recibe mucho antes de que se reutilicen (ver AlmacenManos)
+        manos = calc.procesar_manos(detection_result, None, dibujar=False, region=region, almacen=self.almacen)
+        try:
+            self.loop.call_soon_threadsafe(self.recibir, timestamp_ms, manos, region)
+        except RuntimeError:
+            # El bucle ya se cerró
+            pass
+
+    def recibir(self, timestamp_ms, manos, region):
+        # Los resultados llegan en orden; nunca retroceder a uno anterior
+        if timestamp_ms <= self.ultimo_resultado:
+            return
+        self.ultimo_resultado = timestamp_ms
+        self.manos = self.seguidor.actualizar(manos, region.ancho_frame)
+        self.entrada.actualizar(self.manos, region.ancho_frame, region.alto_frame)
+        self.manos_nuevas = True
+
+    def tecla(self, tecla):
+        """Aplica una tecla a la máquina de fases; devuelve el estado resultante"""
+        estado = self.maquina.procesar(calc.EventoTecla(tecla, time.monotonic()))
+        if estado.get("reiniciada"):
+            print(f"  → {self.nombre}: reiniciando - selecciona nueva operación")
+        return estado
+
+    def publicar(self, img, estado):
+        if any(salida.dibuja for salida in self.salidas):
+            calc.dibujar_manos(img, [mano.landmarks for mano in self.manos])
+            calc.dibujar_fase(img, estado, self.maquina.zonas)
+
+        estado = dict(estado, sesion=self.nombre, frame=self.frames,
+                      dedos=[mano.dedos for mano in self.manos])
+        for salida in self.salidas:
+            salida.enviar(img, estado)
+
+    async def ejecutar(self):
+        """Bucle de frames de la sesión: termina al acabarse la fuente o al desactivarla"""
+        self.loop = asyncio.get_running_loop()
+        # Abrir la fuente y cargar el modelo bloquean: se hacen en hilos
+        captura = await asyncio.to_thread(abrir_fuente, self.fuente)
+        try:
+            detector = await asyncio.to_thread(calc.crear_detector, "LIVE_STREAM", self.al_recibir_resultado)
+        except BaseException:
+            captura.release()
+            raise
+
+        try:
+            while self.activa:
+                success, img = await asyncio.to_thread(captura.read)
+                if not success:
+                    break
+                ahora = time.monotonic()
+                if self.espejo:
+                    img = cv2.flip(img, 1)
+
+                # detect_async no espera a la inferencia; descarta frames si va ocupado
+                img_rgb, region = self.entrada.preparar(img)
+                timestamp_ms = self.timestamp_monotono_ms()
+                for pendiente in list(self.regiones)[:-8]:
+                    self.regiones.pop(pendiente, None)
+                self.regiones[timestamp_ms] = region
+                detector.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb), timestamp_ms)
+
+                if self.manos_nuevas:
+                    evento = calc.EventoManos(self.manos, ahora, img.shape[1], img.shape[0])
+                    self.manos_nuevas = False
+                else:
+                    evento = calc.EventoTick(ahora)
+                estado = self.maquina.procesar(evento)
+                if "seleccionada" in estado:
+                    print(f"  ✓ {self.nombre}: {calc.operaciones[estado['seleccionada']]['nombre']}")
+
+                self.publicar(img, estado)
+                self.frames += 1
+        finally:
+            self.activa = False
+            detector.close()
+            captura.release()
+
+
+# ============================================
+# TECLADO
+# ============================================
+
+async def teclas_ventana(despachar, intervalo=0.01):
+    """Lee el teclado de las ventanas de OpenCV (en el hilo del bucle, como exige HighGUI)"""
+    while True:
+        key = cv2.waitKey(1) & 0xFF
+        if key != 0xFF:
+            despachar(key)
+        await asyncio.sleep(intervalo)
+
+
+def teclas_stdin(loop, despachar):
+    """Sin ventanas: cada carácter escrito en la terminal (seguido de Intro) es una tecla"""
+    def leer():
+        for linea in sys.stdin:
+            for caracter in linea.strip():
+                loop.call_soon_threadsafe(despachar, caracter)
+    # Hilo daemon: un readline pendiente no debe impedir que el programa termine
+    threading.Thread(target=leer, daemon=True).start()
+
+
+# ============================================
+# RUNTIME
+# ============================================
+
+async def ejecutar_sesiones(fuentes, espejo=True, directorio_salida=None, ventanas=True, puerto_vista=None):
+    """Ejecuta una sesión por fuente hasta que se acaben todas o se pulse Q"""
+    loop = asyncio.get_running_loop()
+    parar = asyncio.Event()
+
+    sesiones = []
+    for i, fuente in enumerate(fuentes):
+        nombre = f"sesion_{i}"
+        salidas = []
+        if ventanas:
+            salidas.append(SalidaVentana(nombre))
+        if directorio_salida:
+            salidas.append(SalidaJSONL(os.path.join(directorio_salida, f"{nombre}.jsonl")))
+        if puerto_vista is not None:
+            salidas.append(SalidaVista(puerto_vista + i))
+        sesiones.append(Sesion(nombre, fuente, salidas, espejo))
+
+    def despachar(tecla):
+        for sesion in sesiones:
+            if sesion.tecla(tecla).get("salir"):
+                parar.set()
+
+    auxiliares = [asyncio.create_task(salida.ejecutar()) for sesion in sesiones for salida in sesion.salidas]
+    if ventanas:
+        auxiliares.append(asyncio.create_task(teclas_ventana(despachar)))
+    else:
+        teclas_stdin(loop, despachar)
+
+    tareas = [asyncio.create_task(sesion.ejecutar(), name=sesion.nombre) for sesion in sesiones]
+    todas = asyncio.gather(*tareas)
+    esperar_parar = asyncio.create_task(parar.wait())
+    try:
+        await asyncio.wait([todas, esperar_parar], return_when=asyncio.FIRST_COMPLETED)
+        if parar.is_set():
+            print("  → Saliendo del programa...")
+        for sesion in sesiones:
+            sesion.activa = False
+        await todas
+    finally:
+        # Si una sesión falla, cancelar las demás y esperar a que cierren su detector
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        esperar_parar.cancel()
+        for tarea in auxiliares:
+            tarea.cancel()
+        await asyncio.gather(*auxiliares, return_exceptions=True)
+        for sesion in sesiones:
+            for salida in sesion.salidas:
+                await salida.cerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varias calculadoras con gestos en un solo proceso asyncio")
+    parser.add_argument("fuentes", nargs="+", help="índices de cámara o rutas de vídeo")
+    parser.add_argument("--sin-espejo", action="store_true", help="no voltear los frames")
+    parser.add_argument("--salida", metavar="DIR", help="escribir sesion_N.jsonl en DIR")
+    parser.add_argument("--sin-ventana", action="store_true",
+                        help="sin ventanas; las teclas se leen de la terminal (r + Intro, q + Intro)")
+    parser.add_argument("--puerto", type=int, default=None,
+                        help="vista previa HTTP de la sesión N en el puerto PUERTO + N")
+    args = parser.parse_args(argv)
+
+    if args.salida:
+        os.makedirs(args.salida, exist_ok=True)
+    try:
+        calc.asegurar_modelo()
+        asyncio.run(ejecutar_sesiones(args.fuentes, not args.sin_espejo, args.salida,
+                                      not args.sin_ventana, args.puerto))
+    except RuntimeError as e:
+        print(f"  ✗ {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("  → Saliendo del programa...")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,59 +14,206 @@ import time
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
+import itertools
 import numpy as np
-import os
-import urllib.request
+import queue
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+from grabacion import GrabadorLandmarks
+from grabador_video import GrabadorVideo
+from metricas import ContadorAsignaciones, Metricas
+from modelo import cargar_buffer_modelo, obtener_modelo
+from servidor_vista import ServidorVista
 
 # ============================================
-# DESCARGAR MODELO SI NO EXISTE
+# MODELO DE DETECCIÓN DE MANOS
 # ============================================
 
-model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hand_landmarker.task")
+# Cargar el modelo desde un buffer en memoria compartido por todos los detectores
+# del proceso en vez de que cada uno lo lea de disco
+USAR_BUFFER_MODELO = True
+
+
+def asegurar_modelo():
+    """Devuelve la ruta del modelo verificado, descargándolo a la caché si no existe"""
+    return obtener_modelo()
 
-if not os.path.exists(model_path):
-    print("=" * 60)
-    print("  Descargando modelo de detección de manos...")
-    print("=" * 60)
-    url = "https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task"
-    try:
-        urllib.request.urlretrieve(url, model_path)
-        print("  ✓ Modelo descargado correctamente!")
-    except Exception as e:
-        print(f"  ✗ Error al descargar el modelo: {e}")
-        print("  Por favor descarga manualmente desde:")
-        print(f"  {url}")
-        exit(1)
 
 # ============================================
 # CONFIGURACIÓN DE MEDIAPIPE TASKS
 # ============================================
 
-base_options = python.BaseOptions(model_asset_path=model_path)
-options = vision.HandLandmarkerOptions(
-    base_options=base_options,
-    num_hands=20,  # Aumentado para detectar múltiples manos/personas
-    min_hand_detection_confidence=0.5,
-    min_hand_presence_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-hand_detector = vision.HandLandmarker.create_from_options(options)
+# Modo de ejecución del detector:
+#   "IMAGE"       - detección completa en cada frame (sin seguimiento)
+#   "VIDEO"       - detect_for_video con timestamps; sigue las manos entre frames
+#   "LIVE_STREAM" - detect_async; los resultados llegan por callback
+MODO_DETECCION = "VIDEO"
+
+# Máximo de manos que busca el detector; el coste de los landmarks crece con cada mano
+NUM_MANOS = 20
+
+# Confianza mínima de detección, presencia y seguimiento de las manos
+CONFIANZA_DETECCION = 0.5
+
+
+def crear_detector(modo=MODO_DETECCION, result_callback=None, num_manos=NUM_MANOS, confianza=CONFIANZA_DETECCION):
+    """Crea un HandLandmarker con la configuración de la calculadora en el modo indicado"""
+    ruta = asegurar_modelo()
+    if USAR_BUFFER_MODELO:
+        base_options = python.BaseOptions(model_asset_buffer=cargar_buffer_modelo(ruta))
+    else:
+        base_options = python.BaseOptions(model_asset_path=ruta)
+    options = vision.HandLandmarkerOptions(
+        base_options=base_options,
+        running_mode=vision.RunningMode[modo],
+        num_hands=num_manos,  # Aumentado para detectar múltiples manos/personas
+        min_hand_detection_confidence=confianza,
+        min_hand_presence_confidence=confianza,
+        min_tracking_confidence=confianza,
+        result_callback=result_callback if modo == "LIVE_STREAM" else None
+    )
+    return vision.HandLandmarker.create_from_options(options)
+
 
 # ============================================
 # CONFIGURACIÓN DE LA CÁMARA
 # ============================================
 
-cap = cv2.VideoCapture(0)
-cap.set(3, 1280)
-cap.set(4, 720)
+def abrir_camara():
+    """Abre la webcam a 1280x720"""
+    camara = cv2.VideoCapture(0)
+    camara.set(3, 1280)
+    camara.set(4, 720)
+    return camara
+
+
+# Resolución máxima (ancho, alto) de la imagen que recibe el detector, independiente
+# de la de la cámara y la ventana. None = detectar sobre el frame completo
+RESOLUCION_DETECCION = None     # p. ej. (640, 360)
+
+# Un detector para cada fase. La selección solo lee una mano: su detector busca pocas,
+# con más confianza y a menos resolución, y solo se procesa y dibuja la que elige
+# MANO_SELECCION. Todos los detectores se crean al arrancar y se cambia de uno a otro
+# al instante al cambiar de fase o al reiniciar con R, sin volver a cargar el modelo.
+# Lo que una fase no fija sale de NUM_MANOS, CONFIANZA_DETECCION y RESOLUCION_DETECCION
+DETECTOR_POR_FASE = True
+CONFIG_FASES = {
+    "seleccion": {"max_manos": 3, "confianza": 0.6, "resolucion": (640, 360)},
+    "calculo": {},
+}
+
+# Mano que elige la operación: "antigua" (la seguida desde hace más tiempo),
+# "grande" (la que más ocupa en pantalla) o "central" (la más cercana al centro)
+MANO_SELECCION = "grande"
+
+FASES = ("seleccion", "calculo")
+
+
+def configuracion_fase(fase):
+    """max_manos, confianza y resolucion del detector de una fase"""
+    config = {"max_manos": NUM_MANOS, "confianza": CONFIANZA_DETECCION, "resolucion": RESOLUCION_DETECCION}
+    if DETECTOR_POR_FASE:
+        config.update(CONFIG_FASES.get(fase, {}))
+    return config
+
+
+# Modo ROI: detectar solo en un recorte alrededor de las manos del frame anterior,
+# con un frame completo cada REFRESCO_ROI frames para encontrar manos nuevas.
+# Funciona mejor con MODO_DETECCION = "IMAGE": en "VIDEO" el seguimiento de
+# MediaPipe ya recorta las manos y cambiar el encuadre lo confunde
+MODO_ROI = False
+MARGEN_ROI = 0.3                # Margen alrededor de las manos (fracción del lado mayor)
+REFRESCO_ROI = 15
+
+# Detección adaptativa: si la escena apenas cambia desde la última detección
+# (p. ej. mientras se mantiene un gesto) no se detecta y se extrapolan las manos.
+# Nunca se saltan más de MAX_FRAMES_SALTADOS frames seguidos
+DETECCION_ADAPTATIVA = False
+UMBRAL_MOVIMIENTO = 3.0         # Diferencia media por píxel (0-255) en una miniatura en grises
+MAX_FRAMES_SALTADOS = 4
+
+# Seguimiento de manos: IDs estables entre frames y número de dedos por mayoría
+# sobre los últimos VOTOS_SEGUIMIENTO frames de cada mano
+SEGUIMIENTO_MANOS = True
+VOTOS_SEGUIMIENTO = 5
+DISTANCIA_SEGUIMIENTO = 0.1     # Desplazamiento máximo entre detecciones (fracción del ancho)
+FRAMES_PERDIDA = 5              # Detecciones sin ver una mano antes de olvidar su ID
+
+# Reutilizar buffers preasignados para la captura, el frame volteado y la imagen
+# del detector en vez de crear frames nuevos en cada iteración (modo secuencial)
+REUTILIZAR_BUFFERS = True
+
+# Medir con tracemalloc la memoria asignada en cada frame (diagnóstico; ralentiza)
+CONTAR_ASIGNACIONES = False
+
+# Grabar los landmarks de cada detección en un .npy para reproducir la sesión
+# sin cámara ni detector (reproducir.py). None = no grabar
+RUTA_GRABACION = None           # p. ej. "sesion.npy"
+
+# Grabación en vídeo de la sesión anotada (tecla V para empezar/parar). Un hilo codifica
+# con cv2.VideoWriter: el bucle solo copia el frame a una cola de COLA_VIDEO frames y, si
+# se llena, descarta según POLITICA_VIDEO ("antiguos": el más viejo; "nuevos": el que llega)
+GRABAR_VIDEO = False            # Empezar a grabar al arrancar
+DIRECTORIO_VIDEO = "grabaciones"
+FPS_VIDEO = 30.0
+CODEC_VIDEO = "mp4v"
+COLA_VIDEO = 32
+POLITICA_VIDEO = "antiguos"
+DURACION_SEGMENTO_VIDEO = 300.0 # Segundos de vídeo por fichero; None = sin límite
+TAMANO_SEGMENTO_VIDEO = None    # Megabytes por fichero; None = sin límite
+
+# Vista previa por HTTP para estaciones sin monitor: http://HOST_VISTA:PUERTO_VISTA/
+# sirve los frames anotados en MJPEG y /estado.json el último estado. None = desactivada
+PUERTO_VISTA = None             # p. ej. 8080
+HOST_VISTA = "127.0.0.1"
+CALIDAD_JPEG = 80
+MOSTRAR_VENTANA = True          # False: sin ventana local (salir con Ctrl+C)
+
+# Autoajuste: mide la latencia de cada etapa durante una calibración corta y mientras
+# se ejecuta, y recorre PERFILES_CALIDAD (de mejor a peor) para mantener FPS_OBJETIVO.
+# Solo baja de perfil si los FPS caen del objetivo durante varias ventanas seguidas y
+# solo sube con holgura de sobra, así no oscila entre dos perfiles
+AUTOAJUSTE = False
+FPS_OBJETIVO = 24.0
+CALIBRACION_AUTOAJUSTE = 3.0    # Segundos de calibración al arrancar
+INTERVALO_AUTOAJUSTE = 1.0      # Segundos de cada ventana de medida
+
+# resolucion: imagen del detector (None = frame completo); max_manos: num_hands del
+# detector; cadencia: detectar uno de cada n frames (el resto se extrapola);
+# antialias y puntos: detalle del dibujo de las manos
+PERFILES_CALIDAD = [
+    {"nombre": "maxima", "resolucion": None, "max_manos": 20, "cadencia": 1, "antialias": True, "puntos": True},
+    {"nombre": "alta", "resolucion": (960, 540), "max_manos": 10, "cadencia": 1, "antialias": True, "puntos": True},
+    {"nombre": "media", "resolucion": (640, 360), "max_manos": 6, "cadencia": 1, "antialias": False, "puntos": True},
+    {"nombre": "baja", "resolucion": (640, 360), "max_manos": 4, "cadencia": 2, "antialias": False, "puntos": True},
+    {"nombre": "minima", "resolucion": (480, 270), "max_manos": 2, "cadencia": 3, "antialias": False, "puntos": False},
+]
+
+# Modo pipeline: captura, detección y dibujo corren en hilos separados
+# unidos por colas que solo guardan el frame más reciente
+MODO_PIPELINE = False
+
+# Instrumentación: latencia por etapa del bucle; [H] muestra el HUD
+INSTRUMENTACION = False
+RUTA_METRICAS = None        # p. ej. "metricas.prom" (Prometheus) o "metricas.csv"
+INTERVALO_METRICAS = 10.0   # Segundos entre exportaciones
+
+# Zonas de jugadores de la fase de cálculo, en coordenadas normalizadas (0-1):
+# rectángulos (x0, y0, x1, y1) o polígonos [(x, y), ...]. Si se solapan, gana la primera.
+# None = las dos mitades de la pantalla (izquierda y derecha)
+ZONAS = None                    # p. ej. [(0, 0, .5, .5), (.5, 0, 1, .5), (0, .5, .5, 1), (.5, .5, 1, 1)]
+
+# "operandos":    cada zona es un operando de una misma operación, en orden
+# "calculadoras": cada zona es una calculadora independiente; su mitad izquierda
+#                 es el primer operando y la derecha el segundo
+MODO_ZONAS = "operandos"
 
 # ============================================
 # VARIABLES DEL PROGRAMA
 # ============================================
 
-fase_actual = "seleccion"
-operacion_seleccionada = None
-
 operaciones = {
     1: {"nombre": "SUMA", "simbolo": "+", "emoji": "☝️", "color": (50, 205, 50)},
     2: {"nombre": "RESTA", "simbolo": "-", "emoji": "✌️", "color": (255, 165, 0)},
@@ -74,8 +221,6 @@ operaciones = {
     4: {"nombre": "DIVIS", "simbolo": "÷", "emoji": "🖐️", "color": (30, 144, 255)}
 }
 
-dedos_detectados = 0
-tiempo_inicio_deteccion = None
 TIEMPO_CONFIRMACION = 2.0
 
 # Paleta de colores moderna (BGR)
@@ -95,6 +240,12 @@ COLORES = {
 # Índices de las puntas de los dedos
 TIP_IDS = [4, 8, 12, 16, 20]
 
+# Umbrales del conteo de dedos en píxeles, ajustados para un frame de ANCHO_REFERENCIA;
+# a otras resoluciones se escalan en proporción
+ANCHO_REFERENCIA = 1280
+UMBRAL_PULGAR = 20
+UMBRAL_DEDO = 15
+
 # ============================================
 # FUNCIONES DE DISEÑO
 # ============================================
@@ -107,25 +258,48 @@ def crear_overlay(img, alpha=0.6):
 
 def dibujar_panel_redondeado(img, x, y, w, h, color, alpha=0.7, radio=15):
     """Dibuja un panel con esquinas redondeadas y transparencia"""
-    overlay = img.copy()
+    # Mezclar solo la región del panel, no el frame completo
+    alto_img, ancho_img = img.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w + 1, ancho_img), min(y + h + 1, alto_img)
     
-    # Dibujar rectángulo principal
-    cv2.rectangle(overlay, (x + radio, y), (x + w - radio, y + h), color, -1)
-    cv2.rectangle(overlay, (x, y + radio), (x + w, y + h - radio), color, -1)
-    
-    # Dibujar esquinas redondeadas
-    cv2.circle(overlay, (x + radio, y + radio), radio, color, -1)
-    cv2.circle(overlay, (x + w - radio, y + radio), radio, color, -1)
-    cv2.circle(overlay, (x + radio, y + h - radio), radio, color, -1)
-    cv2.circle(overlay, (x + w - radio, y + h - radio), radio, color, -1)
-    
-    # Aplicar transparencia
-    cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, img)
+    if x1 > x0 and y1 > y0:
+        roi = img[y0:y1, x0:x1]
+        overlay = copia_temporal(roi)
+        ox, oy = x - x0, y - y0
+        
+        # Dibujar rectángulo principal
+        cv2.rectangle(overlay, (ox + radio, oy), (ox + w - radio, oy + h), color, -1)
+        cv2.rectangle(overlay, (ox, oy + radio), (ox + w, oy + h - radio), color, -1)
+        
+        # Dibujar esquinas redondeadas
+        cv2.circle(overlay, (ox + radio, oy + radio), radio, color, -1)
+        cv2.circle(overlay, (ox + w - radio, oy + radio), radio, color, -1)
+        cv2.circle(overlay, (ox + radio, oy + h - radio), radio, color, -1)
+        cv2.circle(overlay, (ox + w - radio, oy + h - radio), radio, color, -1)
+        
+        # Aplicar transparencia
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
     
     # Borde
     cv2.rectangle(img, (x, y), (x + w, y + h), (80, 80, 80), 1)
 
 
+# Buffer reutilizado para la copia de cada panel; solo se dibuja desde un hilo
+lienzo_panel = np.empty((0, 0, 3), dtype=np.uint8)
+
+
+def copia_temporal(roi):
+    """Copia roi en una vista del buffer de paneles, que crece si hace falta"""
+    global lienzo_panel
+    alto, ancho = roi.shape[:2]
+    if lienzo_panel.shape[0] < alto or lienzo_panel.shape[1] < ancho:
+        lienzo_panel = np.empty((max(alto, lienzo_panel.shape[0]), max(ancho, lienzo_panel.shape[1]), 3), dtype=np.uint8)
+    vista = lienzo_panel[:alto, :ancho]
+    np.copyto(vista, roi)
+    return vista
+
+
 def dibujar_texto_con_sombra(img, texto, posicion, escala=1, color=(255, 255, 255), grosor=2):
     """Dibuja texto con efecto de sombra suave"""
     x, y = posicion
@@ -147,25 +321,36 @@ def dibujar_texto_centrado(img, texto, y, escala=1, color=(255, 255, 255), groso
 
 def dibujar_barra_progreso(img, x, y, ancho, alto, progreso, color_fondo, color_barra):
     """Dibuja una barra de progreso elegante"""
+    dibujar_barra_progreso_px(img, x, y, ancho, alto, int(ancho * progreso), color_fondo, color_barra)
+
+
+def dibujar_barra_progreso_px(img, x, y, ancho, alto, progreso_ancho, color_fondo, color_barra, gradiente=None):
+    """Dibuja la barra de progreso con el avance en píxeles; gradiente es el bloque ya pre-renderizado, si lo hay"""
     # Fondo de la barra
     cv2.rectangle(img, (x, y), (x + ancho, y + alto), color_fondo, -1)
     cv2.rectangle(img, (x, y), (x + ancho, y + alto), (100, 100, 100), 2)
     
     # Progreso
-    progreso_ancho = int(ancho * progreso)
     if progreso_ancho > 0:
-        # Gradiente simulado
-        for i in range(progreso_ancho):
-            ratio = i / ancho
-            b = int(color_barra[0] * (1 - ratio * 0.3))
-            g = int(color_barra[1] * (1 - ratio * 0.3))
-            r = int(color_barra[2] * (1 - ratio * 0.3))
-            cv2.line(img, (x + i, y), (x + i, y + alto), (b, g, r), 1)
+        # Gradiente simulado: una columna por píxel, del color pleno al 70 %
+        x0, x1 = max(x, 0), min(x + progreso_ancho, img.shape[1])
+        y0, y1 = max(y, 0), min(y + alto + 1, img.shape[0])
+        if x1 > x0 and y1 > y0:
+            if gradiente is None:
+                img[y0:y1, x0:x1] = gradiente_barra(ancho, color_barra)[x0 - x:x1 - x]
+            else:
+                img[y0:y1, x0:x1] = gradiente[y0 - y:y1 - y, x0 - x:x1 - x]
     
     # Borde brillante
     cv2.rectangle(img, (x, y), (x + progreso_ancho, y + alto), (255, 255, 255), 1)
 
 
+def gradiente_barra(ancho, color_barra):
+    """Color de cada columna de la barra (ancho, 3), igual que el int() por canal de antes"""
+    factor = 1 - np.arange(ancho) / ancho * 0.3
+    return (np.asarray(color_barra, dtype=np.float64) * factor[:, None]).astype(np.uint8)
+
+
 def dibujar_circulo_numero(img, x, y, numero, color, radio=60):
     """Dibuja un círculo grande con un número dentro"""
     # Sombra del círculo
@@ -191,75 +376,131 @@ def dibujar_linea_divisora(img):
     """Dibuja una línea divisora vertical sutil en el centro de la pantalla"""
     h, w, _ = img.shape
     centro_x = w // 2
-    
-    # Línea punteada muy sutil con baja opacidad
-    color_linea = (80, 80, 80)  # Gris oscuro sutil
-    
-    # Dibujar línea punteada (segmentos pequeños)
+    dibujar_linea_punteada(img, (centro_x, 0), (centro_x, h))
+
+
+def dibujar_linea_punteada(img, inicio, fin, color_linea=(80, 80, 80)):
+    """Dibuja una línea punteada sutil (segmentos de 15 px separados 20 px) entre dos puntos"""
     segmento_largo = 15
     espacio = 20
-    y = 0
-    while y < h:
-        y_fin = min(y + segmento_largo, h)
-        cv2.line(img, (centro_x, y), (centro_x, y_fin), color_linea, 1, cv2.LINE_AA)
-        y += segmento_largo + espacio
+    
+    x0, y0 = inicio
+    dx, dy = fin[0] - x0, fin[1] - y0
+    longitud = max(abs(dx), abs(dy))
+    t = 0
+    while t < longitud:
+        t_fin = min(t + segmento_largo, longitud)
+        p0 = (x0 + round(dx * t / longitud), y0 + round(dy * t / longitud))
+        p1 = (x0 + round(dx * t_fin / longitud), y0 + round(dy * t_fin / longitud))
+        cv2.line(img, p0, p1, color_linea, 1, cv2.LINE_AA)
+        t += segmento_largo + espacio
 
 
-def dibujar_landmarks(img, hand_landmarks, handedness):
-    """Dibuja los landmarks de la mano con estilo mejorado"""
+def dibujar_zonas(img, distribucion):
+    """Dibuja el contorno punteado de cada zona y, en modo calculadoras, la división de cada una"""
     h, w, _ = img.shape
+    geometria = distribucion.geometria(w, h)
+    for poligono in geometria["poligonos"]:
+        puntos = [tuple(p) for p in poligono.tolist()]
+        for inicio, fin in zip(puntos, puntos[1:] + puntos[:1]):
+            dibujar_linea_punteada(img, inicio, fin)
     
-    puntos = []
-    for landmark in hand_landmarks:
-        px = int(landmark.x * w)
-        py = int(landmark.y * h)
-        puntos.append((px, py))
-    
-    conexiones = [
-        (0, 1), (1, 2), (2, 3), (3, 4),
-        (0, 5), (5, 6), (6, 7), (7, 8),
-        (0, 9), (9, 10), (10, 11), (11, 12),
-        (0, 13), (13, 14), (14, 15), (15, 16),
-        (0, 17), (17, 18), (18, 19), (19, 20),
-        (5, 9), (9, 13), (13, 17)
-    ]
+    if distribucion.modo == "calculadoras":
+        for x0, y0, x1, y1 in geometria["cajas"][1::2]:
+            dibujar_linea_punteada(img, (x0, y0), (x0, y1))
+
+
+# Dibujar las conexiones de las manos con antialiasing; con False salen con bordes
+# dentados pero se dibujan bastante más rápido cuando hay muchas manos
+ANTIALIAS_LANDMARKS = True
+
+# Esqueleto de la mano como 6 trazos: los 5 dedos desde la muñeca y la palma.
+# La palma repite su último punto para que todos los trazos tengan la misma longitud
+# y los de todas las manos se dibujen en una sola llamada a cv2.polylines
+TRAZOS_MANO = np.array([
+    [0, 1, 2, 3, 4],
+    [0, 5, 6, 7, 8],
+    [0, 9, 10, 11, 12],
+    [0, 13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+    [5, 9, 13, 17, 17],
+])
+ES_PUNTA = np.isin(np.arange(21), TIP_IDS)
+
+# Anillo de las puntas: cv2.circle con grosor > 1 traza un polígono de 20 lados
+# (un vértice cada 18° para radio 10) en coma fija de 16 bits; el mismo polígono
+# con cv2.polylines pinta los mismos píxeles y admite todas las puntas a la vez
+BITS_ANILLO = 16
+ANGULOS_ANILLO = np.deg2rad(np.arange(0, 361, 18))
+ANILLO_PUNTA = np.round(np.stack([np.cos(ANGULOS_ANILLO), np.sin(ANGULOS_ANILLO)], axis=1)
+                        * 10 * (1 << BITS_ANILLO)).astype(np.int64)
+
+# Esquinas del recuadro de cada mano: dirección hacia dentro desde cada esquina
+DIRECCION_ESQUINAS = np.array([(1, 1), (-1, 1), (1, -1), (-1, -1)])
+
+
+def dibujar_puntos(img, puntos, radio, color):
+    """
+    Círculos rellenos de radio dado en todos los puntos (array (n, 2)) con una llamada:
+    un segmento de longitud cero con grosor 2 * radio - 1 da los mismos píxeles que
+    cv2.circle relleno de ese radio
+    """
+    if len(puntos):
+        cv2.polylines(img, np.repeat(puntos[:, None], 2, axis=1), False, color, 2 * radio - 1)
+
+
+def dibujar_manos(img, lista_landmarks, antialias=None, puntos_manos=True):
+    """
+    Dibuja el esqueleto, los puntos y las esquinas del recuadro de todas las manos.
+    Todas las manos se pasan a píxeles en una operación de NumPy y cada elemento se
+    dibuja con una sola llamada a OpenCV, sea cual sea el número de manos.
+    antialias: None = ANTIALIAS_LANDMARKS; puntos_manos=False dibuja solo el esqueleto.
+    """
+    if len(lista_landmarks) == 0:
+        return
+    h, w, _ = img.shape
+    puntos = (landmarks_a_array(lista_landmarks)[:, :, :2] * (w, h)).astype(np.int32)
+    antialias = ANTIALIAS_LANDMARKS if antialias is None else antialias
+    tipo = cv2.LINE_AA if antialias else cv2.LINE_8
     
-    # Dibujar conexiones con gradiente
-    for conexion in conexiones:
-        pt1 = puntos[conexion[0]]
-        pt2 = puntos[conexion[1]]
-        cv2.line(img, pt1, pt2, COLORES["cyan"], 3, cv2.LINE_AA)
-        cv2.line(img, pt1, pt2, (255, 255, 255), 1, cv2.LINE_AA)
-    
-    # Dibujar puntos
-    for i, punto in enumerate(puntos):
-        if i in TIP_IDS:
-            cv2.circle(img, punto, 10, COLORES["error"], -1)
-            cv2.circle(img, punto, 10, (255, 255, 255), 2)
-        else:
-            cv2.circle(img, punto, 6, COLORES["secundario"], -1)
-            cv2.circle(img, punto, 6, (255, 255, 255), 1)
+    # Conexiones con gradiente: trazo grueso de color y trazo fino blanco encima
+    trazos = puntos[:, TRAZOS_MANO].reshape(-1, TRAZOS_MANO.shape[1], 2)
+    cv2.polylines(img, trazos, False, COLORES["cyan"], 3, tipo)
+    cv2.polylines(img, trazos, False, (255, 255, 255), 1, tipo)
+    if not puntos_manos:
+        return
     
-    # Bounding box elegante
-    x_coords = [p[0] for p in puntos]
-    y_coords = [p[1] for p in puntos]
-    x_min, x_max = min(x_coords), max(x_coords)
-    y_min, y_max = min(y_coords), max(y_coords)
+    # Puntos: disco blanco y relleno de color encima, que deja el borde blanco
+    articulaciones = puntos[:, ~ES_PUNTA].reshape(-1, 2)
+    dibujar_puntos(img, articulaciones, 6, (255, 255, 255))
+    dibujar_puntos(img, articulaciones, 5, COLORES["secundario"])
+    # Puntas: disco de color y anillo blanco de grosor 2, como cv2.circle(..., 10, blanco, 2)
+    puntas = puntos[:, ES_PUNTA].reshape(-1, 2)
+    dibujar_puntos(img, puntas, 10, COLORES["error"])
+    if len(puntas):
+        anillos = (puntas[:, None].astype(np.int64) << BITS_ANILLO) + ANILLO_PUNTA
+        cv2.polylines(img, anillos.astype(np.int32), True, (255, 255, 255), 2, cv2.LINE_8, BITS_ANILLO)
     
+    # Bounding box elegante: esquinas decorativas en L
     padding = 25
-    # Esquinas decorativas
     largo = 20
-    cv2.line(img, (x_min - padding, y_min - padding), (x_min - padding + largo, y_min - padding), COLORES["acento"], 3)
-    cv2.line(img, (x_min - padding, y_min - padding), (x_min - padding, y_min - padding + largo), COLORES["acento"], 3)
-    
-    cv2.line(img, (x_max + padding, y_min - padding), (x_max + padding - largo, y_min - padding), COLORES["acento"], 3)
-    cv2.line(img, (x_max + padding, y_min - padding), (x_max + padding, y_min - padding + largo), COLORES["acento"], 3)
-    
-    cv2.line(img, (x_min - padding, y_max + padding), (x_min - padding + largo, y_max + padding), COLORES["acento"], 3)
-    cv2.line(img, (x_min - padding, y_max + padding), (x_min - padding, y_max + padding - largo), COLORES["acento"], 3)
-    
-    cv2.line(img, (x_max + padding, y_max + padding), (x_max + padding - largo, y_max + padding), COLORES["acento"], 3)
-    cv2.line(img, (x_max + padding, y_max + padding), (x_max + padding, y_max + padding - largo), COLORES["acento"], 3)
+    minimos = puntos.min(axis=1) - padding
+    maximos = puntos.max(axis=1) + padding
+    esquinas = np.stack([
+        minimos,
+        np.stack([maximos[:, 0], minimos[:, 1]], axis=1),
+        np.stack([minimos[:, 0], maximos[:, 1]], axis=1),
+        maximos,
+    ], axis=1)
+    brazo_x = esquinas + DIRECCION_ESQUINAS * (largo, 0)
+    brazo_y = esquinas + DIRECCION_ESQUINAS * (0, largo)
+    esquinas_l = np.stack([brazo_x, esquinas, brazo_y], axis=2).reshape(-1, 3, 2).astype(np.int32)
+    cv2.polylines(img, esquinas_l, False, COLORES["acento"], 3)
+
+
+def dibujar_landmarks(img, hand_landmarks, handedness):
+    """Dibuja los landmarks de una mano; para varias manos es más rápido dibujar_manos"""
+    dibujar_manos(img, [hand_landmarks])
 
 
 def contar_dedos(hand_landmarks, handedness, img_width, img_height):
@@ -269,37 +510,35 @@ def contar_dedos(hand_landmarks, handedness, img_width, img_height):
     """
     dedos = []
     
-    # Convertir landmarks a coordenadas de píxeles
-    landmarks = []
-    for lm in hand_landmarks:
-        landmarks.append({
-            'x': lm.x * img_width,
-            'y': lm.y * img_height,
-            'z': lm.z
-        })
+    # Convertir landmarks a coordenadas de píxeles (dos listas de floats, sin un dict por punto)
+    xs = [lm.x * img_width for lm in hand_landmarks]
+    ys = [lm.y * img_height for lm in hand_landmarks]
     
     # ===== PULGAR =====
     # El pulgar se detecta comparando la distancia horizontal
-    # Punto 4 (punta) vs Punto 3 (articulación) vs Punto 2 (base)
-    thumb_tip = landmarks[4]
-    thumb_ip = landmarks[3]  # Articulación intermedia
-    thumb_mcp = landmarks[2]  # Base del pulgar
-    wrist = landmarks[0]  # Muñeca
+    # Punto 4 (punta) vs Punto 3 (articulación)
+    thumb_tip = 4
+    thumb_ip = 3  # Articulación intermedia
+    
+    # Umbrales en píxeles escalados a la resolución del frame
+    escala = img_width / ANCHO_REFERENCIA
+    margen_pulgar = UMBRAL_PULGAR * escala
+    umbral_minimo = UMBRAL_DEDO * escala
     
     # Calcular si el pulgar está extendido
     # Comparamos la distancia de la punta al centro de la palma
-    palm_center_x = (landmarks[0]['x'] + landmarks[9]['x']) / 2
+    palm_center_x = (xs[0] + xs[9]) / 2
     
     # Para mano derecha (en imagen volteada aparece como Left en la detección)
     if handedness == "Right":
         # El pulgar está arriba si la punta está más a la derecha que la articulación
-        if thumb_tip['x'] > thumb_ip['x'] + 20:  # Margen de 20 píxeles
+        if xs[thumb_tip] > xs[thumb_ip] + margen_pulgar:  # Margen de 20 píxeles a 1280
             dedos.append(1)
         else:
             dedos.append(0)
     else:  # Left
         # El pulgar está arriba si la punta está más a la izquierda que la articulación
-        if thumb_tip['x'] < thumb_ip['x'] - 20:
+        if xs[thumb_tip] < xs[thumb_ip] - margen_pulgar:
             dedos.append(1)
         else:
             dedos.append(0)
@@ -316,16 +555,12 @@ def contar_dedos(hand_landmarks, handedness, img_width, img_height):
     ]
     
     for tip_id, pip_id, mcp_id in dedos_indices:
-        tip = landmarks[tip_id]
-        pip = landmarks[pip_id]
-        mcp = landmarks[mcp_id]
-        
         # El dedo está levantado si la punta está significativamente más arriba que PIP
         # Usamos un umbral proporcional a la distancia entre articulaciones
-        distancia_ref = abs(pip['y'] - mcp['y'])
-        umbral = max(distancia_ref * 0.3, 15)  # Al menos 15 píxeles o 30% de la distancia
+        distancia_ref = abs(ys[pip_id] - ys[mcp_id])
+        umbral = max(distancia_ref * 0.3, umbral_minimo)  # Al menos 15 píxeles (a 1280) o 30% de la distancia
         
-        if tip['y'] < pip['y'] - umbral:
+        if ys[tip_id] < ys[pip_id] - umbral:
             dedos.append(1)
         else:
             dedos.append(0)
@@ -333,35 +568,676 @@ def contar_dedos(hand_landmarks, handedness, img_width, img_height):
     return sum(dedos)
 
 
+# Índices de punta, PIP y MCP de índice, medio, anular y meñique
+DEDOS_TIP = np.array([8, 12, 16, 20])
+DEDOS_PIP = np.array([6, 10, 14, 18])
+DEDOS_MCP = np.array([5, 9, 13, 17])
+
+
+def landmarks_a_array(lista_landmarks):
+    """Convierte los landmarks de todas las manos en un array (n_manos, 21, 3)"""
+    if isinstance(lista_landmarks, np.ndarray):
+        # Landmarks ya en array, p. ej. de una grabación (grabacion.py)
+        return lista_landmarks.astype(np.float64)
+    if len(lista_landmarks) and isinstance(lista_landmarks[0], np.ndarray):
+        return np.array(lista_landmarks, dtype=np.float64)
+    if not lista_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float64)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in mano] for mano in lista_landmarks], dtype=np.float64)
+
+
+def contar_dedos_lote(landmarks, es_derecha, img_width, img_height):
+    """
+    Versión vectorizada de contar_dedos para todas las manos a la vez.
+    landmarks: array (n_manos, 21, 3) normalizado; es_derecha: array bool (n_manos,).
+    Devuelve (levantados, totales): máscara (n_manos, 5) pulgar..meñique y suma por mano.
+    Usa los mismos umbrales que contar_dedos y da exactamente el mismo resultado.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    es_derecha = np.asarray(es_derecha, dtype=bool)
+    x = landmarks[:, :, 0] * img_width
+    y = landmarks[:, :, 1] * img_height
+    escala = img_width / ANCHO_REFERENCIA
+    
+    levantados = np.empty((landmarks.shape[0], 5), dtype=bool)
+    
+    # Pulgar: punta (4) frente a la articulación (3) con margen de 20 píxeles a 1280
+    margen_pulgar = UMBRAL_PULGAR * escala
+    levantados[:, 0] = np.where(es_derecha, x[:, 4] > x[:, 3] + margen_pulgar, x[:, 4] < x[:, 3] - margen_pulgar)
+    
+    # Otros 4 dedos: punta por encima de PIP con umbral proporcional a PIP-MCP
+    pip_y = y[:, DEDOS_PIP]
+    umbral = np.maximum(np.abs(pip_y - y[:, DEDOS_MCP]) * 0.3, UMBRAL_DEDO * escala)
+    levantados[:, 1:] = y[:, DEDOS_TIP] < pip_y - umbral
+    
+    return levantados, levantados.sum(axis=1)
+
+
 def obtener_centro_mano(hand_landmarks, img_width, img_height):
     """Obtiene el centro de la mano"""
     landmark = hand_landmarks[9]
     return int(landmark.x * img_width), int(landmark.y * img_height)
 
 
-def procesar_manos(detection_result, img):
-    """Procesa el resultado de la detección de manos"""
-    manos = []
-    h, w, _ = img.shape
+# ============================================
+# REGISTROS DE MANOS
+# ============================================
+
+class Mano:
+    """
+    Una mano detectada. Con __slots__ no hay un dict por mano y los registros se
+    pueden reutilizar de un frame a otro (AlmacenManos).
+    landmarks es un array (21, 3) normalizado al frame completo; id y dedos_frame
+    los rellena SeguidorManos y son None sin seguimiento.
+    """
     
-    if detection_result.hand_landmarks:
-        for i, hand_landmarks in enumerate(detection_result.hand_landmarks):
-            handedness = detection_result.handedness[i][0].category_name
-            num_dedos = contar_dedos(hand_landmarks, handedness, w, h)
-            centro = obtener_centro_mano(hand_landmarks, w, h)
-            dibujar_landmarks(img, hand_landmarks, handedness)
-            
-            manos.append({
-                "handedness": handedness,
-                "dedos": num_dedos,
-                "centro_x": centro[0],
-                "centro_y": centro[1],
-                "landmarks": hand_landmarks
-            })
+    __slots__ = ("handedness", "dedos", "centro_x", "centro_y", "puntuacion", "landmarks", "id", "dedos_frame")
+    
+    def __init__(self, handedness="Right", dedos=0, centro_x=0, centro_y=0, puntuacion=1.0, landmarks=None,
+                 id=None, dedos_frame=None):
+        self.handedness = handedness
+        self.dedos = dedos
+        self.centro_x = centro_x
+        self.centro_y = centro_y
+        self.puntuacion = puntuacion
+        self.landmarks = landmarks
+        self.id = id
+        self.dedos_frame = dedos_frame
+    
+    def rellenar(self, handedness, dedos, centro_x, centro_y, puntuacion, landmarks):
+        """Reutiliza el registro para otra detección (sin datos de seguimiento)"""
+        self.handedness = handedness
+        self.dedos = dedos
+        self.centro_x = centro_x
+        self.centro_y = centro_y
+        self.puntuacion = puntuacion
+        self.landmarks = landmarks
+        self.id = None
+        self.dedos_frame = None
+    
+    def __repr__(self):
+        return f"Mano(id={self.id}, {self.handedness}, dedos={self.dedos}, centro=({self.centro_x}, {self.centro_y}))"
+
+
+class AlmacenManos:
+    """
+    Registros Mano y landmarks preasignados para procesar_manos. Cada detección
+    ocupa el siguiente de `frames` huecos en anillo: sus landmarks son filas de un
+    array fijo (frames, max_manos, 21, 3) y sus registros se crean una sola vez.
+    Las manos de una detección valen hasta que llegan `frames` detecciones más;
+    quien tenga que guardarlas más tiempo (u otro proceso) debe copiarlas.
+    
+    Con LIVE_STREAM los registros se rellenan en el hilo del callback y los lee el
+    bucle de frames sin copiarlos. Vale porque ese bucle manda un frame al detector
+    por iteración y recoge el resultado más reciente en la siguiente: nunca hay más
+    de uno o dos resultados sin recoger, lejos de `frames`. Un consumidor que pueda
+    quedarse más de `frames` resultados atrás tiene que copiar las manos.
+    """
+    
+    def __init__(self, max_manos=NUM_MANOS, frames=8):
+        self.max_manos = max_manos
+        self.frames = frames
+        self.landmarks = np.zeros((frames, max_manos, 21, 3))
+        self.registros = [[Mano() for _ in range(max_manos)] for _ in range(frames)]
+        # next() de un count es atómico: vale con varios hilos productores
+        self.turnos = itertools.count()
+    
+    def reservar(self, n):
+        """Devuelve (array (n, 21, 3), lista de n registros) del siguiente hueco"""
+        if n > self.max_manos:
+            # Más manos de las previstas: registros nuevos en vez de crecer el almacén
+            return np.zeros((n, 21, 3)), [Mano() for _ in range(n)]
+        hueco = next(self.turnos) % self.frames
+        return self.landmarks[hueco, :n], self.registros[hueco][:n]
+
+
+def procesar_manos(detection_result, img, dibujar=True, region=None, almacen=None):
+    """
+    Procesa el resultado de la detección de manos y devuelve una lista de Mano.
+    region: RegionDeteccion de la imagen que vio el detector; los landmarks se pasan
+    a coordenadas del frame completo y se cuenta a su resolución.
+    almacen: AlmacenManos del que tomar los registros; sin él se crean nuevos.
+    """
+    if region is None:
+        h, w, _ = img.shape
+    else:
+        w, h = region.ancho_frame, region.alto_frame
+    
+    if not len(detection_result.hand_landmarks):
+        return []
+    
+    array = landmarks_a_array(detection_result.hand_landmarks)
+    if region is not None and (not region.completa or region.espejo):
+        array = reubicar_landmarks(array, region)
+    
+    # Conteo de dedos de todas las manos en una sola pasada
+    lados = [categorias[0].category_name for categorias in detection_result.handedness]
+    puntuaciones = [categorias[0].score for categorias in detection_result.handedness]
+    if region is not None and region.espejo:
+        # En la imagen sin voltear MediaPipe ve la mano contraria
+        lados = ["Left" if lado == "Right" else "Right" for lado in lados]
+    es_derecha = np.array([lado == "Right" for lado in lados], dtype=bool)
+    _, totales = contar_dedos_lote(array, es_derecha, w, h)
+    
+    if almacen is None:
+        manos = [Mano() for _ in range(len(array))]
+    else:
+        destino, manos = almacen.reservar(len(array))
+        destino[...] = array
+        array = destino
+    
+    # Igual que obtener_centro_mano, con el landmark 9 de todas las manos a la vez
+    centros = (array[:, 9, :2] * (w, h)).astype(np.int64).tolist()
+    for i, mano in enumerate(manos):
+        mano.rellenar(lados[i], int(totales[i]), centros[i][0], centros[i][1], puntuaciones[i], array[i])
+    
+    if dibujar:
+        dibujar_manos(img, array)
     
     return manos
 
 
+# ============================================
+# CAMINO DE FRAMES
+# ============================================
+
+class CaminoFrames:
+    """
+    Buffers preasignados del frame de cada iteración: la captura, en la que escribe
+    la cámara, y la pantalla, con el frame volteado sobre el que se dibuja.
+    Con reutilizar=False se crea un frame nuevo cada vez (necesario cuando los
+    frames pasan a otros hilos, como en el modo pipeline).
+    """
+    
+    def __init__(self, reutilizar=REUTILIZAR_BUFFERS):
+        self.reutilizar = reutilizar
+        self.captura = None
+        self.pantalla = None
+    
+    def leer(self, camara):
+        """Lee un frame en el buffer de captura; devuelve (success, img)"""
+        if not self.reutilizar or self.captura is None:
+            success, img = camara.read()
+        else:
+            # read escribe en el buffer si el tamaño coincide y si no crea uno nuevo
+            success, img = camara.read(self.captura)
+        if success:
+            self.captura = img
+        return success, img
+    
+    def voltear(self, img):
+        """Frame en espejo para la pantalla, escrito en el buffer de pantalla"""
+        if not self.reutilizar:
+            return cv2.flip(img, 1)
+        if self.pantalla is None or self.pantalla.shape != img.shape:
+            self.pantalla = np.empty_like(img)
+        return cv2.flip(img, 1, dst=self.pantalla)
+
+
+# ============================================
+# ENTRADA DEL DETECTOR
+# ============================================
+
+class RegionDeteccion(namedtuple("RegionDeteccion", "x y ancho alto ancho_frame alto_frame espejo",
+                                 defaults=(False,))):
+    """
+    Zona del frame (en píxeles) que se pasó al detector y tamaño del frame completo.
+    Con espejo el detector vio el frame sin voltear y la zona está en sus coordenadas.
+    """
+    
+    __slots__ = ()
+    
+    @property
+    def completa(self):
+        return self.ancho == self.ancho_frame and self.alto == self.alto_frame
+
+
+def tamano_deteccion(ancho, alto, resolucion):
+    """(ancho, alto) de la imagen que recibe el detector: la de entrada reducida hasta caber en resolucion"""
+    if resolucion is not None:
+        escala = min(resolucion[0] / ancho, resolucion[1] / alto)
+        if escala < 1:
+            return max(int(ancho * escala), 1), max(int(alto * escala), 1)
+    return ancho, alto
+
+
+def reubicar_landmarks(array, region):
+    """
+    Pasa landmarks normalizados al recorte de la región a normalizados al frame completo.
+    Devuelve un array (n_manos, 21, 3) nuevo.
+    """
+    array = array.copy()
+    array[:, :, 0] = (region.x + array[:, :, 0] * region.ancho) / region.ancho_frame
+    array[:, :, 1] = (region.y + array[:, :, 1] * region.alto) / region.alto_frame
+    if region.espejo:
+        array[:, :, 0] = 1 - array[:, :, 0]
+    # z usa la misma escala que x
+    array[:, :, 2] *= region.ancho / region.ancho_frame
+    return array
+
+
+class EntradaDetector:
+    """
+    Prepara la imagen que recibe el detector a partir del frame de la cámara:
+    la reduce a RESOLUCION_DETECCION y, en modo ROI, la recorta a las manos del
+    frame anterior. Recorta y reduce antes de convertir a RGB, así la conversión
+    y la inferencia solo tocan los píxeles que se usan. Con reutilizar, la imagen
+    se escribe en buffers preasignados: solo vale si nadie la guarda más allá de
+    crear el mp.Image, que copia los píxeles.
+    """
+    
+    def __init__(self, resolucion=RESOLUCION_DETECCION, roi=MODO_ROI, margen=MARGEN_ROI, refresco=REFRESCO_ROI,
+                 reutilizar=False):
+        self.resolucion = resolucion
+        self.roi = roi
+        self.margen = margen
+        self.refresco = refresco
+        self.reutilizar = reutilizar
+        self.buffers = {}
+        self.caja = None
+        self.frames_recortados = 0
+    
+    def buffer(self, nombre, alto, ancho):
+        """
+        Array (alto, ancho, 3) contiguo sobre un buffer preasignado; solo crece, nunca se encoge.
+        El buffer es plano: mp.Image no respeta el paso entre filas, así que una vista
+        [:alto, :ancho] de un buffer más ancho le llegaría con las filas desplazadas.
+        """
+        if not self.reutilizar:
+            return None
+        tamano = alto * ancho * 3
+        buffer = self.buffers.get(nombre)
+        if buffer is None or buffer.size < tamano:
+            buffer = self.buffers[nombre] = np.empty(tamano, dtype=np.uint8)
+        return buffer[:tamano].reshape(alto, ancho, 3)
+    
+    def preparar(self, img, espejo=False):
+        """
+        Devuelve (img_rgb, region) con la imagen para el detector y de qué zona del frame sale.
+        espejo: img es el frame sin voltear; los landmarks se voltearán en procesar_manos.
+        """
+        alto_frame, ancho_frame = img.shape[:2]
+        caja = self.caja
+        if caja is not None and self.frames_recortados < self.refresco:
+            x0, y0, x1, y1 = caja
+            if espejo:
+                # La caja está en coordenadas de pantalla (volteadas)
+                x0, x1 = ancho_frame - x1, ancho_frame - x0
+            self.frames_recortados += 1
+        else:
+            # Frame completo: sin manos previas o toca buscar manos nuevas
+            x0, y0, x1, y1 = 0, 0, ancho_frame, alto_frame
+            self.frames_recortados = 0
+        
+        recorte = img[y0:y1, x0:x1]
+        ancho, alto = x1 - x0, y1 - y0
+        tamano = tamano_deteccion(ancho, alto, self.resolucion)
+        if tamano != (ancho, alto):
+            # INTER_AREA es varias veces más lento con escalas no enteras
+            recorte = cv2.resize(recorte, tamano, dst=self.buffer("reducido", tamano[1], tamano[0]),
+                                 interpolation=cv2.INTER_LINEAR)
+        
+        img_rgb = cv2.cvtColor(recorte, cv2.COLOR_BGR2RGB, dst=self.buffer("rgb", *recorte.shape[:2]))
+        return img_rgb, RegionDeteccion(x0, y0, ancho, alto, ancho_frame, alto_frame, espejo)
+    
+    def actualizar(self, manos, ancho_frame, alto_frame):
+        """Calcula el recorte del siguiente frame: la unión de las cajas de las manos más el margen"""
+        if not self.roi:
+            return
+        if not manos:
+            self.caja = None
+            return
+        
+        array = landmarks_a_array([mano.landmarks for mano in manos])
+        xs = array[:, :, 0] * ancho_frame
+        ys = array[:, :, 1] * alto_frame
+        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
+        margen = self.margen * max(x1 - x0, y1 - y0)
+        
+        caja = (max(int(x0 - margen), 0), max(int(y0 - margen), 0),
+                min(int(x1 + margen) + 1, ancho_frame), min(int(y1 + margen) + 1, alto_frame))
+        # Una caja vacía (manos fuera del frame) obliga a volver al frame completo
+        self.caja = caja if caja[2] > caja[0] and caja[3] > caja[1] else None
+
+
+# ============================================
+# PLANIFICACIÓN DE LA DETECCIÓN
+# ============================================
+
+class PlanificadorDeteccion:
+    """
+    Decide en cada frame si hay que pasar el detector. Compara una miniatura en
+    grises del frame con la del último frame detectado: si la diferencia media no
+    llega al umbral, el frame se salta y las manos se extrapolan linealmente a
+    partir de las dos últimas detecciones.
+    """
+    
+    def __init__(self, activo=DETECCION_ADAPTATIVA, umbral=UMBRAL_MOVIMIENTO,
+                 max_saltados=MAX_FRAMES_SALTADOS, tamano=(64, 36), horizonte=0.2):
+        self.activo = activo
+        self.umbral = umbral
+        self.max_saltados = max_saltados
+        self.tamano = tamano
+        self.horizonte = horizonte  # Segundos máximos que se extrapola hacia delante
+        self.referencia = None
+        self.saltados = 0
+        self.total_saltados = 0
+        self.ultima = None          # (instante, manos, array) de la última detección
+        self.penultima = None
+        # Con cadencia n se detecta como mucho uno de cada n frames (lo fija el autoajuste)
+        self.cadencia = 1
+        self.frames_cadencia = 0
+    
+    @property
+    def extrapola(self):
+        return self.activo or self.cadencia > 1
+    
+    def miniatura(self, img):
+        pequena = cv2.resize(img, self.tamano, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(pequena, cv2.COLOR_BGR2GRAY)
+    
+    def movimiento(self, miniatura):
+        """Diferencia media por píxel con la miniatura del último frame detectado"""
+        return cv2.norm(miniatura, self.referencia, cv2.NORM_L1) / miniatura.size
+    
+    def debe_detectar(self, img):
+        if self.cadencia > 1:
+            self.frames_cadencia = (self.frames_cadencia + 1) % self.cadencia
+            if self.frames_cadencia != 0:
+                self.total_saltados += 1
+                return False
+        if not self.activo:
+            return True
+        
+        miniatura = self.miniatura(img)
+        if (self.referencia is None or self.saltados >= self.max_saltados
+                or self.movimiento(miniatura) >= self.umbral):
+            self.referencia = miniatura
+            self.saltados = 0
+            return True
+        
+        self.saltados += 1
+        self.total_saltados += 1
+        return False
+    
+    def registrar(self, manos, ahora):
+        """Guarda el resultado de una detección para poder extrapolar"""
+        if not self.extrapola:
+            return
+        self.penultima = self.ultima
+        self.ultima = (ahora, manos, landmarks_a_array([mano.landmarks for mano in manos]))
+    
+    def estimar(self, ahora, img_width, img_height):
+        """
+        Manos para un frame saltado. Cada mano de la última detección se empareja con
+        la más cercana del mismo lado en la penúltima y se mueve a su velocidad; las
+        que no tienen pareja se quedan donde estaban. El número de dedos no cambia.
+        """
+        if self.ultima is None:
+            return []
+        t1, manos, actual = self.ultima
+        if self.penultima is None or not manos:
+            return manos
+        t0, manos_previas, previo = self.penultima
+        if not manos_previas or t1 <= t0:
+            return manos
+        
+        # Emparejar por la posición de la muñeca
+        distancias = np.linalg.norm(actual[:, None, 0, :2] - previo[None, :, 0, :2], axis=2)
+        lados = np.array([mano.handedness for mano in manos])
+        lados_previos = np.array([mano.handedness for mano in manos_previas])
+        distancias[lados[:, None] != lados_previos[None, :]] = np.inf
+        pareja = distancias.argmin(axis=1)
+        emparejada = distancias[np.arange(len(manos)), pareja] < 0.1
+        
+        velocidad = np.where(emparejada[:, None, None], (actual - previo[pareja]) / (t1 - t0), 0.0)
+        estimado = actual + velocidad * min(ahora - t1, self.horizonte)
+        
+        centros = (estimado[:, 9, :2] * (img_width, img_height)).astype(np.int64).tolist()
+        return [Mano(mano.handedness, mano.dedos, cx, cy, mano.puntuacion, puntos, mano.id, mano.dedos_frame)
+                for mano, puntos, (cx, cy) in zip(manos, estimado, centros)]
+
+
+# ============================================
+# AUTOAJUSTE DE CALIDAD
+# ============================================
+
+class AutoAjuste:
+    """
+    Elige el perfil de PERFILES_CALIDAD que mantiene FPS_OBJETIVO. Al cerrar cada
+    ventana de medida toma las muestras nuevas de las métricas y estima los FPS con
+    la mediana del tiempo por frame; en modo pipeline cuenta también la etapa de
+    detección, que corre en su hilo. Durante la calibración baja de perfil en cuanto
+    una ventana no llega al objetivo. Después aplica histéresis: baja tras
+    `persistencia` ventanas seguidas por debajo de margen_bajada * objetivo y sube tras
+    otras tantas por encima de margen_subida * objetivo. Si hubo que dejar un perfil
+    poco después de subir a él, cada vez hacen falta el doble de ventanas para volver.
+    Mientras está en pausa (fuera de las fases que controla el perfil) no mide y el
+    tiempo de calibración no corre.
+    """
+    
+    def __init__(self, perfiles=PERFILES_CALIDAD, fps_objetivo=FPS_OBJETIVO, calibracion=CALIBRACION_AUTOAJUSTE,
+                 intervalo=INTERVALO_AUTOAJUSTE, margen_bajada=0.9, margen_subida=1.4, persistencia=3):
+        self.perfiles = perfiles
+        self.fps_objetivo = fps_objetivo
+        self.calibracion = calibracion
+        self.intervalo = intervalo
+        self.margen_bajada = margen_bajada
+        self.margen_subida = margen_subida
+        self.persistencia = persistencia
+        
+        self.indice = 0
+        self.inicio = None
+        self.fin_ventana = None
+        self.vistas = {}            # Muestras ya consumidas de cada histograma
+        self.descartar = False      # La ventana tras un cambio mezcla dos perfiles
+        self.por_debajo = 0
+        self.por_encima = 0
+        self.fallos = [0] * len(perfiles)
+        self.ultima_subida = None   # (instante, índice del perfil al que se subió)
+        self.ultima_medida = None   # (fps, {etapa: p50 en ms}) de la última ventana
+        self.pausa = None           # Instante en que se pausó la medida
+    
+    @property
+    def perfil(self):
+        return self.perfiles[self.indice]
+    
+    def muestras_nuevas(self, nombre, histograma):
+        nuevas = histograma.total - self.vistas.get(nombre, 0)
+        self.vistas[nombre] = histograma.total
+        return histograma.recientes(nuevas)
+    
+    def medir(self, metricas, pipeline):
+        """FPS y mediana en ms de cada etapa desde la ventana anterior; FPS None si hay pocos frames"""
+        frames = self.muestras_nuevas("frame", metricas.frames)
+        etapas = {}
+        for etapa, histograma in list(metricas.histogramas.items()):
+            muestras = self.muestras_nuevas(etapa, histograma)
+            if len(muestras):
+                etapas[etapa] = float(np.median(muestras)) * 1000
+        if len(frames) < 3:
+            return None, etapas
+        
+        tiempo = float(np.median(frames))
+        if pipeline:
+            # La detección solo tiene que seguir a uno de cada `cadencia` frames
+            deteccion = (etapas.get("deteccion", 0.0) + etapas.get("conteo", 0.0)) / 1000
+            tiempo = max(tiempo, deteccion / self.perfil["cadencia"])
+        return 1 / tiempo if tiempo > 0 else None, etapas
+    
+    def pausar(self, ahora):
+        """Deja de medir hasta la siguiente llamada a evaluar"""
+        if self.pausa is None:
+            self.pausa = ahora
+    
+    def evaluar(self, metricas, ahora, pipeline=False):
+        """Devuelve el perfil al que hay que cambiar, o None si se mantiene el actual"""
+        if self.pausa is not None:
+            pausa, self.pausa = self.pausa, None
+            if self.inicio is not None:
+                # Lo medido en pausa no cuenta: empezar una ventana nueva
+                self.inicio += ahora - pausa
+                self.fin_ventana = ahora + self.intervalo
+                self.por_debajo = 0
+                self.por_encima = 0
+                self.medir(metricas, pipeline)
+                return None
+        if self.inicio is None:
+            # Lo medido antes de arrancar (carga del detector) no cuenta
+            self.inicio = ahora
+            self.fin_ventana = ahora + self.intervalo
+            self.medir(metricas, pipeline)
+            return None
+        if ahora < self.fin_ventana:
+            return None
+        # Calibrando, ventanas más cortas para llegar antes a un perfil que aguante
+        calibrando = ahora - self.inicio < self.calibracion
+        self.fin_ventana = ahora + (self.intervalo / 4 if calibrando else self.intervalo)
+        
+        fps, etapas = self.medir(metricas, pipeline)
+        if fps is None or self.descartar:
+            self.descartar = False
+            return None
+        self.ultima_medida = (fps, etapas)
+        anterior = self.indice
+        
+        if fps < self.fps_objetivo * self.margen_bajada:
+            self.por_debajo += 1
+            self.por_encima = 0
+            if self.indice < len(self.perfiles) - 1 and (calibrando or self.por_debajo >= self.persistencia):
+                subida = self.ultima_subida
+                if subida is not None and subida[1] == self.indice and ahora - subida[0] < 10 * self.persistencia * self.intervalo:
+                    self.fallos[self.indice] = min(self.fallos[self.indice] + 1, 5)
+                self.indice += 1
+        elif fps > self.fps_objetivo * self.margen_subida:
+            self.por_encima += 1
+            self.por_debajo = 0
+            if (self.indice > 0 and not calibrando
+                    and self.por_encima >= self.persistencia * 2 ** self.fallos[self.indice - 1]):
+                self.indice -= 1
+                self.ultima_subida = (ahora, self.indice)
+        else:
+            self.por_debajo = 0
+            self.por_encima = 0
+        
+        if self.indice == anterior:
+            return None
+        self.por_debajo = 0
+        self.por_encima = 0
+        self.descartar = True
+        return self.perfil
+
+
+# ============================================
+# SEGUIMIENTO DE MANOS
+# ============================================
+
+class SeguidorManos:
+    """
+    Asigna a cada mano un ID que se mantiene entre frames emparejando su centro con
+    el más cercano de las manos ya seguidas. Cada ID guarda sus últimos conteos de
+    dedos en un anillo y publica el más votado, así un frame mal contado no cambia
+    el resultado. Todo el estado vive en arrays, una fila por mano seguida.
+    """
+    
+    def __init__(self, activo=SEGUIMIENTO_MANOS, votos=VOTOS_SEGUIMIENTO,
+                 distancia=DISTANCIA_SEGUIMIENTO, frames_perdida=FRAMES_PERDIDA):
+        self.activo = activo
+        self.votos = votos
+        self.distancia = distancia
+        self.frames_perdida = frames_perdida
+        self.siguiente_id = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.centros = np.zeros((0, 2))
+        self.historial = np.full((0, votos), -1, dtype=np.int8)
+        self.posiciones = np.zeros(0, dtype=np.int64)
+        self.perdidos = np.zeros(0, dtype=np.int64)
+    
+    def asociar(self, centros, distancia_max):
+        """
+        Empareja cada centro con una mano seguida, de la pareja más cercana a la más
+        lejana. Devuelve el índice de la mano seguida de cada centro o -1 si es nueva.
+        """
+        n, m = len(centros), len(self.centros)
+        asignadas = np.full(n, -1, dtype=np.int64)
+        if n == 0 or m == 0:
+            return asignadas
+        
+        distancias = np.linalg.norm(centros[:, None, :] - self.centros[None, :, :], axis=2)
+        libre_centro = np.ones(n, dtype=bool)
+        libre_seguida = np.ones(m, dtype=bool)
+        pendientes = min(n, m)
+        for k in np.argsort(distancias, axis=None):
+            i, j = divmod(int(k), m)
+            if distancias[i, j] > distancia_max:
+                break
+            if libre_centro[i] and libre_seguida[j]:
+                asignadas[i] = j
+                libre_centro[i] = libre_seguida[j] = False
+                pendientes -= 1
+                if pendientes == 0:
+                    break
+        return asignadas
+    
+    def votar(self, filas, dedos):
+        """Conteo más frecuente del historial de cada fila; en caso de empate gana el actual"""
+        historial = self.historial[filas]
+        frecuencias = (historial[:, :, None] == np.arange(6)).sum(axis=1)
+        maximo = frecuencias.max(axis=1)
+        actual = frecuencias[np.arange(len(filas)), dedos]
+        return np.where(actual == maximo, dedos, frecuencias.argmax(axis=1))
+    
+    def actualizar(self, manos, ancho_frame):
+        """
+        Rellena id y dedos_frame (el conteo sin votar) de cada mano, sustituye dedos
+        por el conteo votado y devuelve las manos ordenadas de la más antigua a la más nueva.
+        """
+        if not self.activo:
+            return manos
+        
+        centros = np.array([(mano.centro_x, mano.centro_y) for mano in manos], dtype=np.float64).reshape(-1, 2)
+        dedos = np.array([mano.dedos for mano in manos], dtype=np.int64)
+        filas = self.asociar(centros, self.distancia * ancho_frame)
+        
+        vistas = np.zeros(len(self.ids), dtype=bool)
+        vistas[filas[filas >= 0]] = True
+        self.perdidos[~vistas] += 1
+        self.perdidos[vistas] = 0
+        
+        # Dar de alta las manos nuevas
+        nuevas = filas < 0
+        n_nuevas = int(nuevas.sum())
+        if n_nuevas:
+            filas[nuevas] = len(self.ids) + np.arange(n_nuevas)
+            self.ids = np.concatenate([self.ids, self.siguiente_id + np.arange(n_nuevas)])
+            self.siguiente_id += n_nuevas
+            self.centros = np.concatenate([self.centros, np.zeros((n_nuevas, 2))])
+            self.historial = np.concatenate([self.historial, np.full((n_nuevas, self.votos), -1, dtype=np.int8)])
+            self.posiciones = np.concatenate([self.posiciones, np.zeros(n_nuevas, dtype=np.int64)])
+            self.perdidos = np.concatenate([self.perdidos, np.zeros(n_nuevas, dtype=np.int64)])
+        
+        self.centros[filas] = centros
+        self.historial[filas, self.posiciones[filas]] = dedos
+        self.posiciones[filas] = (self.posiciones[filas] + 1) % self.votos
+        votados = self.votar(filas, dedos)
+        
+        for mano, id_mano, votado in zip(manos, self.ids[filas].tolist(), votados.tolist()):
+            mano.id = id_mano
+            mano.dedos_frame = mano.dedos
+            mano.dedos = votado
+        
+        # Olvidar las manos que llevan demasiado tiempo sin verse
+        vivas = self.perdidos <= self.frames_perdida
+        if not vivas.all():
+            self.ids = self.ids[vivas]
+            self.centros = self.centros[vivas]
+            self.historial = self.historial[vivas]
+            self.posiciones = self.posiciones[vivas]
+            self.perdidos = self.perdidos[vivas]
+        
+        return sorted(manos, key=lambda mano: mano.id)
+
+
 def dibujar_menu(img):
     """Dibuja el menú de selección en el lateral izquierdo"""
     h, w, _ = img.shape
@@ -398,32 +1274,49 @@ def dibujar_menu(img):
     dibujar_texto_con_sombra(img, "Manten 2 seg", (25, 285), 0.45, (150, 150, 150), 1)
 
 
+def dibujar_confirmacion_fondo(img, dedos):
+    """Dibuja la parte estática de la confirmación: panel y nombre de la operación"""
+    h, w, _ = img.shape
+    op = operaciones[dedos]
+    
+    # Panel en esquina inferior derecha
+    panel_x = w - 290
+    panel_y = h - 130
+    dibujar_panel_redondeado(img, panel_x, panel_y, 280, 120, (40, 40, 40), 0.85)
+    
+    # Texto de operación
+    dibujar_texto_con_sombra(img, "Detectando:", (panel_x + 15, panel_y + 30), 0.5, (180, 180, 180), 1)
+    dibujar_texto_con_sombra(img, op['nombre'], (panel_x + 15, panel_y + 60), 0.9, op["color"], 2)
+
+
 def dibujar_confirmacion(img, dedos, progreso):
     """Dibuja la confirmación en el lateral derecho"""
     h, w, _ = img.shape
     
     if dedos in operaciones:
-        op = operaciones[dedos]
+        componer_capa(img, ("confirmacion", dedos), dibujar_confirmacion_fondo, dedos)
         
-        # Panel en esquina inferior derecha
         panel_x = w - 290
         panel_y = h - 130
-        dibujar_panel_redondeado(img, panel_x, panel_y, 280, 120, (40, 40, 40), 0.85)
-        
-        # Texto de operación
-        dibujar_texto_con_sombra(img, "Detectando:", (panel_x + 15, panel_y + 30), 0.5, (180, 180, 180), 1)
-        dibujar_texto_con_sombra(img, op['nombre'], (panel_x + 15, panel_y + 60), 0.9, op["color"], 2)
         
         # Barra de progreso
-        dibujar_barra_progreso(img, panel_x + 15, panel_y + 75, 250, 18, progreso, (60, 60, 60), COLORES["exito"])
+        pegar_barra_progreso(img, panel_x + 15, panel_y + 75, 250, 18, progreso, (60, 60, 60), COLORES["exito"])
         
         # Porcentaje
         porcentaje = int(progreso * 100)
-        dibujar_texto_con_sombra(img, f"{porcentaje}%", (panel_x + 120, panel_y + 110), 0.5, (255, 255, 255), 1)
+        pegar_texto(img, f"{porcentaje}%", (panel_x + 120, panel_y + 110), 0.5, (255, 255, 255), 1,
+                    porcentajes, MAX_PORCENTAJES)
 
 
-def dibujar_pantalla_calculo(img, operacion, num_izq, num_der, resultado):
-    """Dibuja la pantalla de cálculo con UI en los laterales"""
+def dibujar_aviso(img, texto, x_texto, color_panel, color_texto):
+    """Dibuja un aviso de una línea en el lateral derecho"""
+    h, w, _ = img.shape
+    dibujar_panel_redondeado(img, w - 290, h - 80, 280, 40, color_panel, 0.8)
+    dibujar_texto_con_sombra(img, texto, (w - x_texto, h - 55), 0.55, color_texto, 1)
+
+
+def dibujar_pantalla_calculo_fondo(img, operacion):
+    """Dibuja la parte estática de la pantalla de cálculo: paneles, etiquetas y controles"""
     h, w, _ = img.shape
     op = operaciones[operacion]
     
@@ -438,9 +1331,6 @@ def dibujar_pantalla_calculo(img, operacion, num_izq, num_der, resultado):
     dibujar_texto_con_sombra(img, "IZQUIERDA", (panel_izq_x + 15, 40), 0.5, COLORES["cyan"], 1)
     cv2.line(img, (panel_izq_x + 15, 50), (panel_izq_x + 135, 50), (80, 80, 80), 1)
     
-    # Número grande izquierdo
-    dibujar_circulo_numero(img, panel_izq_x + 75, 120, num_izq, COLORES["cyan"], 45)
-    
     # ===== PANEL DERECHO =====
     panel_der_x = w - 160
     dibujar_panel_redondeado(img, panel_der_x, 10, 150, 180, (20, 20, 20), 0.75)
@@ -449,9 +1339,6 @@ def dibujar_pantalla_calculo(img, operacion, num_izq, num_der, resultado):
     dibujar_texto_con_sombra(img, "DERECHA", (panel_der_x + 25, 40), 0.5, COLORES["secundario"], 1)
     cv2.line(img, (panel_der_x + 15, 50), (panel_der_x + 135, 50), (80, 80, 80), 1)
     
-    # Número grande derecho
-    dibujar_circulo_numero(img, panel_der_x + 75, 120, num_der, COLORES["secundario"], 45)
-    
     # ===== PANEL INFERIOR - RESULTADO =====
     panel_res_w = 350
     panel_res_x = w//2 - panel_res_w//2
@@ -460,15 +1347,182 @@ def dibujar_pantalla_calculo(img, operacion, num_izq, num_der, resultado):
     # Operación seleccionada
     dibujar_texto_con_sombra(img, f"Operacion: {op['nombre']}", (panel_res_x + 15, h - 65), 0.5, op["color"], 1)
     
+    # ===== CONTROLES - Esquina inferior derecha =====
+    dibujar_panel_redondeado(img, w - 200, h - 40, 190, 35, (20, 20, 20), 0.7)
+    dibujar_texto_con_sombra(img, "[R] Reset [Q] Salir", (w - 190, h - 18), 0.45, (150, 150, 150), 1)
+
+
+def dibujar_pantalla_calculo(img, operacion, num_izq, num_der, resultado):
+    """Dibuja la pantalla de cálculo con UI en los laterales"""
+    h, w, _ = img.shape
+    op = operaciones[operacion]
+    
+    componer_capa(img, ("calculo", operacion), dibujar_pantalla_calculo_fondo, operacion)
+    
+    # Números grandes izquierdo y derecho
+    pegar_circulo_numero(img, 10 + 75, 120, num_izq, COLORES["cyan"], 45)
+    pegar_circulo_numero(img, w - 160 + 75, 120, num_der, COLORES["secundario"], 45)
+    
     # Resultado
+    panel_res_x = w//2 - 350//2
     resultado_texto = f"{num_izq} {op['simbolo']} {num_der} = {resultado}"
-    dibujar_texto_con_sombra(img, resultado_texto, (panel_res_x + 15, h - 30), 1.0, COLORES["acento"], 2)
+    pegar_texto(img, resultado_texto, (panel_res_x + 15, h - 30), 1.0, COLORES["acento"], 2)
+
+
+# Colores de los operandos en la pantalla de zonas
+COLORES_ZONAS = [COLORES["cyan"], COLORES["secundario"], COLORES["acento"],
+                 COLORES["rosa"], COLORES["primario"], COLORES["exito"]]
+
+
+def dibujar_pantalla_zonas_fondo(img, operacion, distribucion):
+    """Parte estática de la pantalla de cálculo con zonas: contornos, etiquetas y controles"""
+    h, w, _ = img.shape
+    op = operaciones[operacion]
+    cajas = distribucion.geometria(w, h)["cajas"]
+    
+    dibujar_zonas(img, distribucion)
+    
+    # Etiqueta de cada zona en su esquina superior izquierda
+    paso = 2 if distribucion.modo == "calculadoras" else 1
+    for z, (x0, y0, _, _) in enumerate(cajas[::paso]):
+        dibujar_texto_con_sombra(img, f"ZONA {z + 1}", (x0 + 15, y0 + 30), 0.5, COLORES_ZONAS[z % len(COLORES_ZONAS)], 1)
+    
+    if distribucion.modo == "operandos":
+        # Panel inferior con el resultado de la operación encadenada
+        panel_res_w = min(w - 20, 200 + 90 * distribucion.num_operandos)
+        panel_res_x = w//2 - panel_res_w//2
+        dibujar_panel_redondeado(img, panel_res_x, h - 90, panel_res_w, 80, (30, 30, 30), 0.85)
+        dibujar_texto_con_sombra(img, f"Operacion: {op['nombre']}", (panel_res_x + 15, h - 65), 0.5, op["color"], 1)
+    else:
+        dibujar_panel_redondeado(img, 10, h - 40, 200, 35, (20, 20, 20), 0.7)
+        dibujar_texto_con_sombra(img, f"Operacion: {op['nombre']}", (20, h - 18), 0.5, op["color"], 1)
     
     # ===== CONTROLES - Esquina inferior derecha =====
     dibujar_panel_redondeado(img, w - 200, h - 40, 190, 35, (20, 20, 20), 0.7)
     dibujar_texto_con_sombra(img, "[R] Reset [Q] Salir", (w - 190, h - 18), 0.45, (150, 150, 150), 1)
 
 
+def dibujar_pantalla_zonas(img, operacion, sumas, resultados, distribucion):
+    """Pantalla de cálculo con zonas: un círculo por operando y el resultado de cada calculadora"""
+    h, w, _ = img.shape
+    op = operaciones[operacion]
+    cajas = distribucion.geometria(w, h)["cajas"]
+    
+    componer_capa(img, ("zonas", operacion, distribucion.clave), dibujar_pantalla_zonas_fondo, operacion, distribucion)
+    
+    # Número de cada operando arriba y en el centro de su caja
+    paso = 2 if distribucion.modo == "calculadoras" else 1
+    for i, ((x0, y0, x1, _), suma) in enumerate(zip(cajas, sumas)):
+        color = COLORES_ZONAS[(i // paso) % len(COLORES_ZONAS)]
+        pegar_circulo_numero(img, (x0 + x1) // 2, y0 + 90, suma, color, 45)
+    
+    if distribucion.modo == "operandos":
+        panel_res_w = min(w - 20, 200 + 90 * distribucion.num_operandos)
+        resultado_texto = f" {op['simbolo']} ".join(str(suma) for suma in sumas) + f" = {resultados[0]}"
+        pegar_texto(img, resultado_texto, (w//2 - panel_res_w//2 + 15, h - 30), 1.0, COLORES["acento"], 2)
+    else:
+        # Resultado de cada calculadora en la parte inferior de su zona
+        for (x0, _, _, y1), a, b, resultado in zip(cajas[::2], sumas[::2], sumas[1::2], resultados):
+            pegar_texto(img, f"{a} {op['simbolo']} {b} = {resultado}", (x0 + 15, y1 - 55), 0.9, COLORES["acento"], 2)
+
+
+# ============================================
+# CAPAS DE INTERFAZ EN CACHÉ
+# ============================================
+
+# Reutilizar la interfaz estática pre-renderizada en vez de redibujarla cada frame
+CACHE_UI = True
+
+capas_ui = {}
+tamano_capas_ui = None
+
+
+def pre_renderizar(alto, ancho, dibujar):
+    """
+    Dibuja sobre fondo negro y blanco y devuelve (premultiplicado, inversa):
+    negro = alpha * color y blanco - negro = (1 - alpha) * 255
+    """
+    negro = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    blanco = np.full((alto, ancho, 3), 255, dtype=np.uint8)
+    dibujar(negro)
+    dibujar(blanco)
+    return negro, cv2.subtract(blanco, negro)
+
+
+def mezclar(roi, premultiplicado, inversa):
+    """Mezcla en su sitio: roi = color + roi * (1 - alpha)"""
+    cv2.multiply(roi, inversa, roi, scale=1 / 255)
+    cv2.add(roi, premultiplicado, roi)
+
+
+def unir_cajas_solapadas(cajas):
+    """Une las cajas (x, y, w, h) que se solapan para que ningún píxel se mezcle dos veces"""
+    cajas = list(cajas)
+    unidas = True
+    while unidas:
+        unidas = False
+        for i in range(len(cajas)):
+            for j in range(i + 1, len(cajas)):
+                xi, yi, wi, hi = cajas[i]
+                xj, yj, wj, hj = cajas[j]
+                if xi < xj + wj and xj < xi + wi and yi < yj + hj and yj < yi + hi:
+                    x0, y0 = min(xi, xj), min(yi, yj)
+                    x1, y1 = max(xi + wi, xj + wj), max(yi + hi, yj + hj)
+                    cajas[i] = (x0, y0, x1 - x0, y1 - y0)
+                    del cajas[j]
+                    unidas = True
+                    break
+            if unidas:
+                break
+    return cajas
+
+
+class CapaUI:
+    """
+    Interfaz estática pre-renderizada una vez por resolución.
+    Se dibuja sobre fondo negro y blanco para obtener el color premultiplicado
+    y la transparencia de cada píxel; al componer solo se tocan las ROIs cubiertas.
+    """
+    
+    def __init__(self, alto, ancho, dibujar):
+        negro, inversa = pre_renderizar(alto, ancho, dibujar)
+        cubierto = (inversa.min(axis=2) < 255).astype(np.uint8)
+        
+        # Unir elementos cercanos (letras, segmentos de la línea) en una sola ROI
+        cubierto = cv2.dilate(cubierto, np.ones((25, 25), dtype=np.uint8))
+        n, _, stats, _ = cv2.connectedComponentsWithStats(cubierto)
+        cajas = unir_cajas_solapadas([tuple(int(v) for v in stats[i, :4]) for i in range(1, n)])
+        
+        self.rois = []
+        for x, y, w, h in cajas:
+            self.rois.append((x, y, w, h, negro[y:y + h, x:x + w].copy(), inversa[y:y + h, x:x + w].copy()))
+    
+    def componer(self, img):
+        """Mezcla la capa sobre img: img = color + img * (1 - alpha)"""
+        for x, y, w, h, premultiplicado, inversa in self.rois:
+            mezclar(img[y:y + h, x:x + w], premultiplicado, inversa)
+
+
+def componer_capa(img, clave, dibujar, *args):
+    """Compone la capa estática identificada por clave, creándola si no existe"""
+    global tamano_capas_ui
+    if not CACHE_UI:
+        dibujar(img, *args)
+        return
+    
+    alto, ancho = img.shape[:2]
+    # Un cambio de resolución invalida todas las capas
+    if tamano_capas_ui != (alto, ancho):
+        capas_ui.clear()
+        tamano_capas_ui = (alto, ancho)
+    
+    capa = capas_ui.get(clave)
+    if capa is None:
+        capa = CapaUI(alto, ancho, lambda lienzo: dibujar(lienzo, *args))
+        capas_ui[clave] = capa
+    capa.componer(img)
+
+
 def realizar_operacion(num_izq, num_der, operacion):
     """Realiza la operación matemática seleccionada"""
     if operacion == 1:
@@ -490,118 +1544,1019 @@ def clasificar_manos_por_posicion(manos, ancho_pantalla):
     if len(manos) == 0:
         return 0, 0
     
-    centro = ancho_pantalla // 2
-    dedos_izquierda = 0
-    dedos_derecha = 0
+    centros_x = np.array([mano.centro_x for mano in manos])
+    dedos = np.array([mano.dedos for mano in manos])
     
     # Sumar todos los dedos de las manos en cada lado
-    for mano in manos:
-        if mano["centro_x"] < centro:
-            dedos_izquierda += mano["dedos"]
-        else:
-            dedos_derecha += mano["dedos"]
+    izquierda = centros_x < ancho_pantalla // 2
+    return int(dedos[izquierda].sum()), int(dedos[~izquierda].sum())
+
+
+def elegir_mano(manos, criterio, ancho_pantalla, alto_pantalla):
+    """
+    Mano que cuenta en la fase de selección (None si no hay ninguna):
+    "antigua" la primera (con seguimiento, la vista desde hace más tiempo),
+    "grande" la de mayor caja de landmarks y "central" la más cercana al centro.
+    """
+    if len(manos) <= 1 or criterio == "antigua":
+        return manos[0] if manos else None
+    if criterio == "grande":
+        puntos = np.array([mano.landmarks for mano in manos])[:, :, :2] * (ancho_pantalla, alto_pantalla)
+        lados = puntos.max(axis=1) - puntos.min(axis=1)
+        return manos[int((lados[:, 0] * lados[:, 1]).argmax())]
+    if criterio == "central":
+        centros = np.array([(mano.centro_x, mano.centro_y) for mano in manos], dtype=np.float64)
+        distancias = np.hypot(centros[:, 0] - ancho_pantalla / 2, centros[:, 1] - alto_pantalla / 2)
+        return manos[int(distancias.argmin())]
+    raise ValueError(f"Criterio de selección desconocido: {criterio!r}")
+
+
+class DistribucionZonas:
+    """
+    Zonas de jugadores de la fase de cálculo. Cada zona (o cada mitad de zona en
+    modo calculadoras) es un operando. Las zonas se rasterizan una vez por resolución
+    en un mapa de etiquetas, así asignar manos a operandos es una sola indexación
+    de NumPy y no depende del número ni de la forma de las zonas.
+    """
+    
+    def __init__(self, zonas=ZONAS, modo=MODO_ZONAS):
+        self.clasica = zonas is None
+        if zonas is None:
+            zonas = [(0, 0, 0.5, 1), (0.5, 0, 1, 1)]
+        self.zonas = [np.asarray(zona, dtype=np.float64) for zona in zonas]
+        self.modo = modo
+        self.num_operandos = len(self.zonas) * (2 if modo == "calculadoras" else 1)
+        # Identifica la distribución en la caché de capas de interfaz
+        self.clave = (tuple(tuple(zona.ravel().tolist()) for zona in self.zonas), modo)
+        self.geometrias = {}
+    
+    def geometria(self, ancho, alto):
+        """Mapa de etiquetas (alto, ancho), polígonos en píxeles y caja de cada operando"""
+        geometria = self.geometrias.get((ancho, alto))
+        if geometria is not None:
+            return geometria
+        
+        etiquetas = np.full((alto, ancho), -1, dtype=np.int16)
+        poligonos = [None] * len(self.zonas)
+        cajas = [None] * self.num_operandos
+        columnas = np.arange(ancho)
+        escala = np.array([ancho, alto])
+        
+        # De la última a la primera para que en los solapes gane la primera
+        for z in reversed(range(len(self.zonas))):
+            zona = self.zonas[z]
+            mascara = np.zeros((alto, ancho), dtype=bool)
+            if zona.ndim == 1:
+                # Rectángulo semiabierto [x0, x1) x [y0, y1), igual que el corte en ancho // 2
+                x0, y0, x1, y1 = (zona * np.tile(escala, 2)).astype(int).tolist()
+                mascara[y0:y1, x0:x1] = True
+                poligono = np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], dtype=np.int32)
+            else:
+                poligono = (zona * escala).astype(np.int32)
+                relleno = np.zeros((alto, ancho), dtype=np.uint8)
+                cv2.fillPoly(relleno, [poligono], 1)
+                mascara = relleno.astype(bool)
+            poligonos[z] = poligono
+            
+            (x0, y0), (x1, y1) = poligono.min(axis=0).tolist(), poligono.max(axis=0).tolist()
+            if self.modo == "calculadoras":
+                medio = (x0 + x1) // 2
+                izquierda = columnas < medio
+                etiquetas[mascara & izquierda] = 2 * z
+                etiquetas[mascara & ~izquierda] = 2 * z + 1
+                cajas[2 * z], cajas[2 * z + 1] = (x0, y0, medio, y1), (medio, y0, x1, y1)
+            else:
+                etiquetas[mascara] = z
+                cajas[z] = (x0, y0, x1, y1)
+        
+        geometria = {"etiquetas": etiquetas, "poligonos": poligonos, "cajas": cajas}
+        self.geometrias = {(ancho, alto): geometria}
+        return geometria
+    
+    def asignar(self, centros, ancho, alto):
+        """Operando de cada centro (array (n, 2) en píxeles); -1 si está fuera de todas las zonas"""
+        etiquetas = self.geometria(ancho, alto)["etiquetas"]
+        centros = np.asarray(centros, dtype=np.int64).reshape(-1, 2)
+        xs = np.clip(centros[:, 0], 0, ancho - 1)
+        ys = np.clip(centros[:, 1], 0, alto - 1)
+        return etiquetas[ys, xs]
     
-    return dedos_izquierda, dedos_derecha
+    def sumar(self, manos, ancho, alto):
+        """Suma de dedos de cada operando, array (num_operandos,)"""
+        if not manos:
+            return np.zeros(self.num_operandos, dtype=np.int64)
+        centros = np.array([(mano.centro_x, mano.centro_y) for mano in manos])
+        dedos = np.array([mano.dedos for mano in manos])
+        operandos = self.asignar(centros, ancho, alto)
+        dentro = operandos >= 0
+        return np.bincount(operandos[dentro], weights=dedos[dentro], minlength=self.num_operandos).astype(np.int64)
+    
+    def calcular(self, sumas, operacion):
+        """Resultado de cada calculadora: una sola en modo operandos, una por zona en modo calculadoras"""
+        sumas = [int(suma) for suma in sumas]
+        if self.modo == "calculadoras":
+            return [realizar_operacion(a, b, operacion) for a, b in zip(sumas[::2], sumas[1::2])]
+        
+        # Operandos encadenados de izquierda a derecha: ((a op b) op c) ...
+        resultado = sumas[0]
+        for suma in sumas[1:]:
+            if isinstance(resultado, str):
+                break
+            resultado = realizar_operacion(resultado, suma, operacion)
+        return [resultado]
 
 
 # ============================================
-# BUCLE PRINCIPAL
+# SPRITES DE WIDGETS DINÁMICOS
 # ============================================
 
-print()
-print("╔" + "═" * 50 + "╗")
-print("║" + " CALCULADORA CON GESTOS DE MANOS ".center(50) + "║")
-print("╠" + "═" * 50 + "╣")
-print("║" + " Controles:".ljust(50) + "║")
-print("║" + "   [R] - Reiniciar / Cambiar operación".ljust(50) + "║")
-print("║" + "   [Q] - Salir del programa".ljust(50) + "║")
-print("╚" + "═" * 50 + "╝")
-print()
+# Máximo de sprites en caché; se descartan los usados hace más tiempo
+MAX_SPRITES = 256
+
+sprites = OrderedDict()
+estadisticas_sprites = {"aciertos": 0, "fallos": 0}
 
-while True:
-    success, img = cap.read()
+# Cachés propias para que el avance de la confirmación no expulse los sprites
+# compartidos: barras por tamaño y colores, y los textos de porcentaje (0-100 %)
+MAX_BARRAS = 8
+MAX_PORCENTAJES = 101
+barras = OrderedDict()
+porcentajes = OrderedDict()
+
+
+class Sprite:
+    """Widget pre-renderizado que se pega con su origen (ox, oy) en la posición pedida"""
     
-    if not success:
-        print("  ✗ Error: No se puede acceder a la cámara")
-        break
+    def __init__(self, ancho, alto, ox, oy, dibujar):
+        self.premultiplicado, self.inversa = pre_renderizar(alto, ancho, dibujar)
+        self.ox, self.oy = ox, oy
     
-    img = cv2.flip(img, 1)
-    h, w, _ = img.shape
+    def pegar(self, img, x, y):
+        """Mezcla el sprite sobre img recortándolo a los bordes de la imagen"""
+        alto, ancho = self.inversa.shape[:2]
+        x0, y0 = x - self.ox, y - self.oy
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x0 + ancho, img.shape[1]), min(y0 + alto, img.shape[0])
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        
+        sx, sy = cx0 - x0, cy0 - y0
+        mezclar(img[cy0:cy1, cx0:cx1],
+                self.premultiplicado[sy:sy + cy1 - cy0, sx:sx + cx1 - cx0],
+                self.inversa[sy:sy + cy1 - cy0, sx:sx + cx1 - cx0])
+
+
+def obtener_sprite(clave, crear, cache=sprites, maximo=MAX_SPRITES):
+    """Devuelve el sprite de la caché o lo crea con crear(); expulsa el menos usado si se llena"""
+    sprite = cache.get(clave)
+    if sprite is not None:
+        cache.move_to_end(clave)
+        estadisticas_sprites["aciertos"] += 1
+        return sprite
+    
+    estadisticas_sprites["fallos"] += 1
+    sprite = crear()
+    cache[clave] = sprite
+    if len(cache) > maximo:
+        cache.popitem(last=False)
+    return sprite
+
+
+def pegar_circulo_numero(img, x, y, numero, color, radio=60):
+    """Versión en caché de dibujar_circulo_numero"""
+    if not CACHE_UI:
+        dibujar_circulo_numero(img, x, y, numero, color, radio)
+        return
+    
+    def crear():
+        (tw, th), base = cv2.getTextSize(str(numero), cv2.FONT_HERSHEY_SIMPLEX, 2.5, 5)
+        # Margen para la sombra del círculo y números más anchos que el círculo
+        ox = max(radio + 2, tw // 2 + 4)
+        oy = max(radio + 2, th // 2 + 4)
+        ancho = ox + max(radio + 6, tw // 2 + 6)
+        alto = oy + max(radio + 6, th // 2 + base + 6)
+        return Sprite(ancho, alto, ox, oy, lambda lienzo: dibujar_circulo_numero(lienzo, ox, oy, numero, color, radio))
     
-    # Convertir para MediaPipe
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+    obtener_sprite(("circulo", numero, color, radio), crear).pegar(img, x, y)
+
+
+class BarraProgreso:
+    """
+    Gradiente de la barra pre-renderizado a todo lo ancho. Cada frame se dibujan
+    fondo y bordes (rectángulos de OpenCV) y se copian las columnas de avance,
+    sin una entrada de caché por píxel de avance.
+    """
     
-    # Detectar manos
-    detection_result = hand_detector.detect(mp_image)
-    manos = procesar_manos(detection_result, img)
+    def __init__(self, ancho, alto, color_fondo, color_barra):
+        self.ancho, self.alto = ancho, alto
+        self.color_fondo = color_fondo
+        # Bloque (alto + 1, ancho, 3): se copia tal cual, sin difundir la fila cada frame
+        self.gradiente = np.repeat(gradiente_barra(ancho, color_barra)[None], alto + 1, axis=0)
+    
+    def pegar(self, img, x, y, progreso_ancho):
+        dibujar_barra_progreso_px(img, x, y, self.ancho, self.alto, progreso_ancho, self.color_fondo, None,
+                                  self.gradiente)
+
+
+def pegar_barra_progreso(img, x, y, ancho, alto, progreso, color_fondo, color_barra):
+    """Versión en caché de dibujar_barra_progreso: una barra por tamaño y colores, no por avance"""
+    if not CACHE_UI:
+        dibujar_barra_progreso(img, x, y, ancho, alto, progreso, color_fondo, color_barra)
+        return
     
-    # FASE 1: SELECCIÓN
-    if fase_actual == "seleccion":
-        dibujar_menu(img)
+    clave = (ancho, alto, color_fondo, color_barra)
+    barra = obtener_sprite(clave, lambda: BarraProgreso(ancho, alto, color_fondo, color_barra), barras, MAX_BARRAS)
+    barra.pegar(img, x, y, int(ancho * progreso))
+
+
+def pegar_texto(img, texto, posicion, escala=1, color=(255, 255, 255), grosor=2, cache=sprites, maximo=MAX_SPRITES):
+    """Versión en caché de dibujar_texto_con_sombra"""
+    if not CACHE_UI:
+        dibujar_texto_con_sombra(img, texto, posicion, escala, color, grosor)
+        return
+    
+    def crear():
+        (tw, th), base = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, escala, grosor + 1)
+        margen = grosor + 3
+        ox, oy = margen, th + margen
+        return Sprite(tw + 2 * margen + 2, th + base + 2 * margen + 2, ox, oy,
+                      lambda lienzo: dibujar_texto_con_sombra(lienzo, texto, (ox, oy), escala, color, grosor))
+    
+    obtener_sprite(("texto", texto, escala, color, grosor), crear, cache, maximo).pegar(img, *posicion)
+
+
+# ============================================
+# LÓGICA DE FASES
+# ============================================
+
+# Avisos del panel lateral derecho: texto, desplazamiento x, color del panel y del texto
+AVISOS = {
+    "levanta": ("Levanta 1-4 dedos", 275, (60, 40, 40), COLORES["error"]),
+    "maximo": ("Maximo 4 dedos", 260, (60, 40, 40), COLORES["error"]),
+    "muestra": ("Muestra tu mano", 260, (40, 60, 40), COLORES["exito"]),
+}
+
+
+def dibujar_fase(img, estado, distribucion=None):
+    """Dibuja la interfaz de la fase según el estado devuelto por avanzar_fase"""
+    if estado["fase"] == "seleccion":
+        componer_capa(img, ("menu",), dibujar_menu)
         
-        if manos:
-            total_dedos = manos[0]["dedos"]
-            
-            if 1 <= total_dedos <= 4:
-                if total_dedos == dedos_detectados:
-                    if tiempo_inicio_deteccion is not None:
-                        tiempo_transcurrido = time.time() - tiempo_inicio_deteccion
-                        progreso = min(tiempo_transcurrido / TIEMPO_CONFIRMACION, 1.0)
-                        dibujar_confirmacion(img, total_dedos, progreso)
-                        
-                        if tiempo_transcurrido >= TIEMPO_CONFIRMACION:
-                            operacion_seleccionada = total_dedos
-                            fase_actual = "calculo"
-                            print(f"  ✓ Operación seleccionada: {operaciones[total_dedos]['nombre']}")
+        if "progreso" in estado:
+            dibujar_confirmacion(img, estado["total_dedos"], estado["progreso"])
+        
+        # Mensaje en panel lateral derecho
+        if "aviso" in estado:
+            componer_capa(img, ("aviso", estado["aviso"]), dibujar_aviso, *AVISOS[estado["aviso"]])
+    
+    elif estado["fase"] == "calculo":
+        if distribucion is None or distribucion.clasica:
+            dibujar_pantalla_calculo(img, estado["operacion"], estado["num_izq"], estado["num_der"], estado["resultado"])
+        else:
+            dibujar_pantalla_zonas(img, estado["operacion"], estado["sumas"], estado["resultados"], distribucion)
+
+
+def poner_ultimo(cola, dato):
+    """Mete un dato en una cola acotada descartando el más antiguo si está llena"""
+    while True:
+        try:
+            cola.put_nowait(dato)
+            return
+        except queue.Full:
+            try:
+                cola.get_nowait()
+            except queue.Empty:
+                pass
+
+
+# ============================================
+# MÁQUINA DE FASES
+# ============================================
+
+# Eventos de la máquina de fases; ahora es el instante del evento en segundos
+EventoManos = namedtuple("EventoManos", "manos ahora ancho alto")
+EventoTecla = namedtuple("EventoTecla", "tecla ahora")
+EventoTick = namedtuple("EventoTick", "ahora")
+
+
+class MaquinaFases:
+    """
+    Lógica de las fases sin E/S: no lee el reloj ni el teclado y no dibuja.
+    Consume eventos (manos detectadas, tecla pulsada, paso del tiempo) y devuelve
+    el estado a mostrar, así que la misma secuencia de eventos da siempre el
+    mismo resultado, venga de la cámara, de una grabación o de un bucle asyncio.
+    """
+    
+    def __init__(self, zonas=None, criterio_seleccion=MANO_SELECCION):
+        self.zonas = zonas if zonas is not None else DistribucionZonas()
+        self.criterio_seleccion = criterio_seleccion
+        # Últimas manos recibidas; un tick vuelve a evaluarlas en un instante posterior
+        self.manos = []
+        self.ancho = 0
+        self.alto = 0
+        self.reiniciar()
+    
+    def reiniciar(self):
+        """Vuelve a la fase de selección"""
+        self.fase_actual = "seleccion"
+        self.operacion_seleccionada = None
+        self.dedos_detectados = 0
+        self.tiempo_inicio_deteccion = None
+    
+    def procesar(self, evento):
+        """Aplica un evento y devuelve el estado resultante"""
+        if isinstance(evento, EventoManos):
+            self.manos, self.ancho, self.alto = evento.manos, evento.ancho, evento.alto
+            return self.avanzar(evento.ahora)
+        if isinstance(evento, EventoTick):
+            return self.avanzar(evento.ahora)
+        if isinstance(evento, EventoTecla):
+            return self.pulsar(evento.tecla)
+        raise TypeError(f"Evento desconocido: {evento!r}")
+    
+    def pulsar(self, tecla):
+        """R reinicia y Q pide salir (estado["salir"]); el resto de teclas no cambian la fase"""
+        if isinstance(tecla, int):
+            tecla = chr(tecla & 0xFF)
+        tecla = tecla.lower()
+        
+        if tecla == "r":
+            self.reiniciar()
+        estado = {"fase": self.fase_actual, "operacion": self.operacion_seleccionada}
+        if tecla == "r":
+            estado["reiniciada"] = True
+        elif tecla == "q":
+            estado["salir"] = True
+        return estado
+    
+    def avanzar(self, ahora):
+        """Evalúa las últimas manos en el instante ahora"""
+        estado = {"fase": self.fase_actual, "operacion": self.operacion_seleccionada}
+        
+        # FASE 1: SELECCIÓN
+        if self.fase_actual == "seleccion":
+            if self.manos:
+                mano = elegir_mano(self.manos, self.criterio_seleccion, self.ancho, self.alto)
+                total_dedos = mano.dedos
+                estado["total_dedos"] = total_dedos
+                
+                if 1 <= total_dedos <= 4:
+                    if total_dedos == self.dedos_detectados:
+                        if self.tiempo_inicio_deteccion is not None:
+                            tiempo_transcurrido = ahora - self.tiempo_inicio_deteccion
+                            estado["progreso"] = min(tiempo_transcurrido / TIEMPO_CONFIRMACION, 1.0)
+                            
+                            if tiempo_transcurrido >= TIEMPO_CONFIRMACION:
+                                self.operacion_seleccionada = total_dedos
+                                self.fase_actual = "calculo"
+                                estado["seleccionada"] = total_dedos
+                        else:
+                            self.tiempo_inicio_deteccion = ahora
                     else:
-                        tiempo_inicio_deteccion = time.time()
+                        self.dedos_detectados = total_dedos
+                        self.tiempo_inicio_deteccion = ahora
                 else:
-                    dedos_detectados = total_dedos
-                    tiempo_inicio_deteccion = time.time()
+                    self.dedos_detectados = 0
+                    self.tiempo_inicio_deteccion = None
+                    estado["aviso"] = "levanta" if total_dedos == 0 else "maximo"
             else:
-                dedos_detectados = 0
-                tiempo_inicio_deteccion = None
-                if total_dedos == 0:
-                    # Mensaje en panel lateral derecho
-                    dibujar_panel_redondeado(img, w - 290, h - 80, 280, 40, (60, 40, 40), 0.8)
-                    dibujar_texto_con_sombra(img, "Levanta 1-4 dedos", (w - 275, h - 55), 0.55, COLORES["error"], 1)
-                elif total_dedos == 5:
-                    dibujar_panel_redondeado(img, w - 290, h - 80, 280, 40, (60, 40, 40), 0.8)
-                    dibujar_texto_con_sombra(img, "Maximo 4 dedos", (w - 260, h - 55), 0.55, COLORES["error"], 1)
-        else:
-            dedos_detectados = 0
-            tiempo_inicio_deteccion = None
-            # Mensaje en panel lateral derecho
-            dibujar_panel_redondeado(img, w - 290, h - 80, 280, 40, (40, 60, 40), 0.8)
-            dibujar_texto_con_sombra(img, "Muestra tu mano", (w - 260, h - 55), 0.55, COLORES["exito"], 1)
+                self.dedos_detectados = 0
+                self.tiempo_inicio_deteccion = None
+                estado["aviso"] = "muestra"
+        
+        # FASE 2: CÁLCULO
+        elif self.fase_actual == "calculo":
+            # Suma de dedos de cada zona en un solo paso vectorizado
+            sumas = self.zonas.sumar(self.manos, self.ancho, self.alto).tolist()
+            resultados = self.zonas.calcular(sumas, self.operacion_seleccionada)
+            estado["sumas"] = sumas
+            estado["resultados"] = resultados
+            if len(resultados) == 1:
+                estado["resultado"] = resultados[0]
+            if self.zonas.clasica:
+                estado["num_izq"], estado["num_der"] = sumas
+        
+        return estado
+
+
+# ============================================
+# APLICACIÓN
+# ============================================
+
+class CalculadoraApp:
+    """
+    Estado y bucle de la calculadora. Crearla no abre la cámara ni carga el modelo:
+    eso ocurre en iniciar(), que carga el detector en paralelo con la apertura de
+    la cámara y lo calienta con un frame vacío antes del primer frame real.
+    """
+    
+    def __init__(self, modo_deteccion=MODO_DETECCION, pipeline=MODO_PIPELINE, instrumentacion=INSTRUMENTACION):
+        self.modo_deteccion = modo_deteccion
+        self.pipeline = pipeline
+        self.metricas = Metricas(activa=instrumentacion, ruta_exportacion=RUTA_METRICAS,
+                                 intervalo_exportacion=INTERVALO_METRICAS)
+        self.mostrar_hud = False
+        self.vista = ServidorVista(HOST_VISTA, PUERTO_VISTA, CALIDAD_JPEG) if PUERTO_VISTA is not None else None
+        if CONTAR_ASIGNACIONES:
+            self.metricas.asignaciones = ContadorAsignaciones()
+        self.grabador = None
+        self.video = GrabadorVideo(DIRECTORIO_VIDEO, FPS_VIDEO, CODEC_VIDEO, COLA_VIDEO, POLITICA_VIDEO,
+                                   DURACION_SEGMENTO_VIDEO,
+                                   TAMANO_SEGMENTO_VIDEO * 1024 * 1024 if TAMANO_SEGMENTO_VIDEO else None)
+        self.metricas.registrar_indicador("video_descartados_total", "Frames de vídeo descartados con la cola llena",
+                                          lambda: self.video.descartados, "counter")
+        self.metricas.registrar_indicador("video_escritos_total", "Frames escritos en el vídeo de la sesión",
+                                          lambda: self.video.escritos, "counter")
+        self.metricas.registrar_indicador("video_cola", "Frames pendientes de codificar",
+                                          lambda: self.video.profundidad)
+        
+        # El autoajuste decide con las latencias por etapa: necesita las métricas
+        self.autoajuste = AutoAjuste() if AUTOAJUSTE else None
+        if self.autoajuste is not None:
+            self.metricas.activa = True
+        self.antialias = ANTIALIAS_LANDMARKS
+        self.puntos_manos = True
+        
+        # Detector en uso y el de cada fase; las fases con la misma configuración lo comparten
+        self.detector = None
+        self.detectores = {}
+        self.config_fases = {fase: configuracion_fase(fase) for fase in FASES}
+        self.fase_detector = None
+        self.cap = None
+        # (fases, detector) con otro num_hands creado en segundo plano; detectar() lo pone en uso
+        self.detector_pendiente = None
+        self.cerrojo_detector = threading.Lock()
+        
+        # Resultados de detección más recientes: (timestamp_ms, manos)
+        self.cola_resultados = queue.Queue(maxsize=1)
+        self.ultimo_timestamp_ms = 0
+        # Timestamps de las detecciones de calentamiento: su resultado no se publica
+        self.timestamps_calentamiento = set()
+        
+        # Imagen que ve el detector; en LIVE_STREAM la región de cada timestamp pendiente
+        # En el pipeline los frames pasan entre hilos: no se pueden reutilizar sus buffers
+        reutilizar = REUTILIZAR_BUFFERS and not pipeline
+        self.frames = CaminoFrames(reutilizar)
+        self.entrada = EntradaDetector(reutilizar=reutilizar)
+        self.regiones = {}
+        # Registros de manos reutilizados entre detecciones en vez de crear dicts nuevos
+        self.almacen = AlmacenManos()
+        self.planificador = PlanificadorDeteccion()
+        self.seguidor = SeguidorManos()
+        self.zonas = DistribucionZonas()
+        self.maquina = MaquinaFases(self.zonas)
     
-    # FASE 2: CÁLCULO
-    elif fase_actual == "calculo":
-        num_izq, num_der = clasificar_manos_por_posicion(manos, w)
-        resultado = realizar_operacion(num_izq, num_der, operacion_seleccionada)
-        dibujar_pantalla_calculo(img, operacion_seleccionada, num_izq, num_der, resultado)
+    # ============================================
+    # ARRANQUE
+    # ============================================
     
-    # Mostrar imagen
-    cv2.imshow("Calculadora con Gestos", img)
+    def cargar_detector(self, config):
+        """Crea un detector con el número de manos y la confianza de config"""
+        return crear_detector(self.modo_deteccion, result_callback=self.al_recibir_resultado,
+                              num_manos=config["max_manos"], confianza=config["confianza"])
     
-    key = cv2.waitKey(1) & 0xFF
+    def calentar_detectores(self, ancho_frame, alto_frame):
+        """
+        Una detección sobre un frame negro con cada detector, al tamaño con el que
+        detectará (frame de la cámara reducido a la resolución de su fase) y con la
+        misma secuencia de timestamps, para que el primer frame real no pague la
+        inicialización. El resultado se descarta por su timestamp.
+        """
+        calentados = set()
+        for fase, detector in self.detectores.items():
+            if id(detector) in calentados:
+                continue
+            calentados.add(id(detector))
+            ancho, alto = tamano_deteccion(ancho_frame, alto_frame, self.config_fases[fase]["resolucion"])
+            vacio = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.zeros((alto, ancho, 3), dtype=np.uint8))
+            timestamp_ms = self.timestamp_monotono_ms()
+            self.timestamps_calentamiento.add(timestamp_ms)
+            self.detectar(vacio, timestamp_ms, detector)
+            if self.modo_deteccion != "LIVE_STREAM":
+                self.timestamps_calentamiento.discard(timestamp_ms)
     
-    if key == ord('q') or key == ord('Q'):
-        print("  → Saliendo del programa...")
-        break
+    def cargar_detectores(self):
+        """Crea el detector de cada fase; devuelve {fase: detector}"""
+        detectores = {}
+        por_config = {}
+        for fase, config in self.config_fases.items():
+            clave = (config["max_manos"], config["confianza"])
+            if clave not in por_config:
+                por_config[clave] = self.cargar_detector(config)
+            detectores[fase] = por_config[clave]
+        return detectores
+    
+    def usar_detector_fase(self, fase):
+        """Pone en uso el detector ya creado de la fase y su resolución; no carga nada"""
+        self.detector = self.detectores[fase]
+        self.entrada.resolucion = self.config_fases[fase]["resolucion"]
+        self.fase_detector = fase
+    
+    def iniciar(self):
+        """Carga el detector en un hilo mientras se abre la cámara en el hilo principal"""
+        if self.detector is not None and self.cap is not None:
+            return
+        
+        resultado = {}
+        
+        def cargar():
+            try:
+                resultado["detectores"] = self.cargar_detectores()
+            except Exception as e:
+                resultado["error"] = e
+        
+        hilo = None
+        if self.detector is None:
+            hilo = threading.Thread(target=cargar, daemon=True)
+            hilo.start()
+        if self.cap is None:
+            self.cap = abrir_camara()
+        if hilo is not None:
+            hilo.join()
+            if "error" in resultado:
+                raise resultado["error"]
+            self.detectores = resultado["detectores"]
+            self.usar_detector_fase(self.maquina.fase_actual)
+            # El calentamiento necesita el tamaño real de la cámara: va después de abrirla
+            ancho_frame = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
+            alto_frame = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 720
+            self.calentar_detectores(ancho_frame, alto_frame)
+        
+        if self.vista is not None and not self.vista.activo:
+            self.vista.iniciar()
+            print(f"  ✓ Vista previa en {self.vista.url}")
+        
+        if RUTA_GRABACION and self.grabador is None:
+            self.grabador = GrabadorLandmarks(RUTA_GRABACION)
+            print(f"  ✓ Grabando landmarks en {RUTA_GRABACION}")
+        
+        if GRABAR_VIDEO:
+            self.video.empezar()
+    
+    def cerrar(self):
+        if self.vista is not None:
+            self.vista.cerrar()
+        self.video.cerrar()
+        if self.grabador is not None:
+            self.grabador.cerrar()
+            self.grabador = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        # Un detector compartido por varias fases se cierra una sola vez
+        detectores = {id(detector): detector for detector in [self.detector, *self.detectores.values()]
+                      if detector is not None}
+        for detector in detectores.values():
+            detector.close()
+        self.detector = None
+        self.detectores = {}
+        self.fase_detector = None
+        with self.cerrojo_detector:
+            if self.detector_pendiente is not None:
+                self.detector_pendiente[1].close()
+                self.detector_pendiente = None
+    
+    # ============================================
+    # FASES
+    # ============================================
+    
+    def avanzar_fase(self, manos, ahora, ancho_pantalla, alto_pantalla):
+        """
+        Avanza la máquina de fases con las manos detectadas en el instante ahora (segundos).
+        No dibuja nada: devuelve un dict con lo que hay que mostrar en este frame.
+        """
+        return self.maquina.procesar(EventoManos(manos, ahora, ancho_pantalla, alto_pantalla))
+    
+    def actualizar_fase(self, img, manos):
+        """Avanza la máquina de fases con las manos detectadas y dibuja su interfaz"""
+        estado = self.avanzar_fase(manos, time.time(), img.shape[1], img.shape[0])
+        dibujar_fase(img, estado, self.zonas)
+        
+        if "seleccionada" in estado:
+            print(f"  ✓ Operación seleccionada: {operaciones[estado['seleccionada']]['nombre']}")
+        return estado
+    
+    @property
+    def fase_actual(self):
+        return self.maquina.fase_actual
+    
+    @property
+    def operacion_seleccionada(self):
+        return self.maquina.operacion_seleccionada
+    
+    def reiniciar(self):
+        """Vuelve a la fase de selección"""
+        self.maquina.reiniciar()
     
-    if key == ord('r') or key == ord('R'):
-        fase_actual = "seleccion"
-        operacion_seleccionada = None
-        dedos_detectados = 0
-        tiempo_inicio_deteccion = None
-        print("  → Reiniciando - Selecciona nueva operación")
+    def manejar_tecla(self, key):
+        """Procesa las teclas R/Q/H/V. Devuelve False si hay que salir del programa"""
+        estado = self.maquina.procesar(EventoTecla(key, time.time()))
+        if estado.get("salir"):
+            print("  → Saliendo del programa...")
+            return False
+        
+        if estado.get("reiniciada"):
+            print("  → Reiniciando - Selecciona nueva operación")
+        
+        if key == ord('h') or key == ord('H'):
+            self.mostrar_hud = not self.mostrar_hud
+            # El HUD necesita las métricas aunque la instrumentación empezara desactivada
+            self.metricas.activa = self.metricas.activa or self.mostrar_hud
+        
+        if key == ord('v') or key == ord('V'):
+            # Solo cambia un indicador: abrir y cerrar el fichero lo hace el hilo del vídeo
+            if self.video.alternar():
+                print("  → Grabación de vídeo iniciada")
+            else:
+                print("  → Grabación de vídeo detenida")
+        
+        return True
+    
+    def dibujar_hud(self, img):
+        """Dibuja FPS y el desglose de latencia por etapa en la parte superior central"""
+        resumen = self.metricas.resumen()
+        h, w, _ = img.shape
+        alto = 40 + 20 * (len(resumen) + (self.metricas.asignaciones is not None) + self.video.grabando)
+        x = w // 2 - 130
+        dibujar_panel_redondeado(img, x, 10, 260, alto, (20, 20, 20), 0.75)
+        texto = f"FPS: {self.metricas.fps():.1f}"
+        if self.autoajuste is not None:
+            texto += f"  [{self.autoajuste.perfil['nombre']}]"
+        dibujar_texto_con_sombra(img, texto, (x + 15, 35), 0.6, COLORES["acento"], 2)
+        
+        for i, (etapa, (ultimo, p50, p95, _)) in enumerate(resumen.items()):
+            texto = f"{etapa:<10} {ultimo:6.1f} ms  p95 {p95:6.1f}"
+            dibujar_texto_con_sombra(img, texto, (x + 15, 60 + 20 * i), 0.45, (200, 200, 200), 1)
+        
+        asignaciones = self.metricas.asignaciones
+        if asignaciones is not None:
+            texto = f"memoria/frame {asignaciones.bytes.ultimo() / 1024:7.1f} KB"
+            dibujar_texto_con_sombra(img, texto, (x + 15, 60 + 20 * len(resumen)), 0.45, (200, 200, 200), 1)
+        
+        if self.video.grabando:
+            fila = len(resumen) + (asignaciones is not None)
+            texto = f"REC cola {self.video.profundidad:2d}/{self.video.capacidad}  desc. {self.video.descartados}"
+            dibujar_texto_con_sombra(img, texto, (x + 15, 60 + 20 * fila), 0.45, COLORES["error"], 1)
+    
+    # ============================================
+    # AUTOAJUSTE
+    # ============================================
+    
+    def ajustar_calidad(self):
+        """Consulta al autoajuste al final de cada frame y aplica el perfil que elija"""
+        if self.autoajuste is None:
+            return
+        ahora = time.monotonic()
+        if self.fase_detector not in self.fases_autoajuste():
+            # El perfil no cambia el detector en uso: medirlo calibraría con otro más barato
+            self.autoajuste.pausar(ahora)
+            return
+        perfil = self.autoajuste.evaluar(self.metricas, ahora, self.pipeline)
+        if perfil is None:
+            return
+        
+        fps, etapas = self.autoajuste.ultima_medida
+        desglose = ", ".join(f"{etapa} {ms:.1f} ms" for etapa, ms in etapas.items())
+        print(f"  → Autoajuste: perfil {perfil['nombre']} "
+              f"({fps:.1f} FPS, objetivo {self.autoajuste.fps_objetivo:.0f}; {desglose})")
+        self.aplicar_perfil(perfil)
+    
+    def fases_autoajuste(self):
+        """Fases cuyo detector cambia el perfil de calidad"""
+        # Con un detector por fase el perfil solo cambia el del cálculo: el de la selección ya es barato
+        return ("calculo",) if DETECTOR_POR_FASE else FASES
+    
+    def aplicar_perfil(self, perfil):
+        fases = self.fases_autoajuste()
+        for fase in fases:
+            self.config_fases[fase]["resolucion"] = perfil["resolucion"]
+        if self.fase_detector in fases:
+            self.entrada.resolucion = perfil["resolucion"]
+        self.planificador.cadencia = perfil["cadencia"]
+        self.antialias = perfil["antialias"]
+        self.puntos_manos = perfil["puntos"]
+        if perfil["max_manos"] != self.config_fases[fases[0]]["max_manos"]:
+            # Crear un detector tarda: se hace en un hilo y el bucle no se para
+            for fase in fases:
+                self.config_fases[fase]["max_manos"] = perfil["max_manos"]
+            threading.Thread(target=self.preparar_detector, args=(fases,), daemon=True).start()
+    
+    def preparar_detector(self, fases):
+        """Crea un detector nuevo para las fases; el siguiente detectar() lo cambia por el suyo"""
+        config = self.config_fases[fases[0]]
+        detector = crear_detector(self.modo_deteccion, result_callback=self.al_recibir_resultado,
+                                  num_manos=config["max_manos"], confianza=config["confianza"])
+        with self.cerrojo_detector:
+            anterior, self.detector_pendiente = self.detector_pendiente, (fases, detector)
+        if anterior is not None:
+            anterior[1].close()
+    
+    def cambiar_detector(self):
+        """
+        Pone en uso el detector pendiente y el de la fase actual; solo lo llama el hilo
+        que detecta. Cambiar de fase solo cambia de detector: todos están ya creados.
+        """
+        with self.cerrojo_detector:
+            pendiente, self.detector_pendiente = self.detector_pendiente, None
+        if pendiente is not None:
+            fases, detector = pendiente
+            anteriores = {id(self.detectores[fase]): self.detectores[fase] for fase in fases}
+            for fase in fases:
+                self.detectores[fase] = detector
+            en_uso = {id(detector) for detector in self.detectores.values()}
+            for id_anterior, anterior in anteriores.items():
+                if id_anterior not in en_uso:
+                    anterior.close()
+            self.fase_detector = None
+        
+        fase = self.maquina.fase_actual
+        if fase != self.fase_detector and fase in self.detectores:
+            self.usar_detector_fase(fase)
+    
+    # ============================================
+    # DETECCIÓN
+    # ============================================
+    
+    def timestamp_monotono_ms(self):
+        """Devuelve un timestamp en ms estrictamente creciente, como exige MediaPipe"""
+        timestamp_ms = int(time.monotonic() * 1000)
+        if timestamp_ms <= self.ultimo_timestamp_ms:
+            timestamp_ms = self.ultimo_timestamp_ms + 1
+        self.ultimo_timestamp_ms = timestamp_ms
+        return timestamp_ms
+    
+    def al_recibir_resultado(self, detection_result, output_image, timestamp_ms):
+        """Callback de LIVE_STREAM: cuenta los dedos y publica el resultado"""
+        if timestamp_ms in self.timestamps_calentamiento:
+            self.timestamps_calentamiento.discard(timestamp_ms)
+            return
+        cronometro = self.metricas.cronometro()
+        region = self.regiones.pop(timestamp_ms, None)
+        # Registros del almacén sin copiar: el bucle los recoge antes de que se reutilicen (ver AlmacenManos)
+        manos = procesar_manos(detection_result, output_image.numpy_view(), dibujar=False, region=region, almacen=self.almacen)
+        self.grabar(timestamp_ms, manos, region)
+        if region is not None:
+            manos = self.seguidor.actualizar(manos, region.ancho_frame)
+            manos = self.manos_de_fase(manos, region.ancho_frame, region.alto_frame)
+            self.entrada.actualizar(manos, region.ancho_frame, region.alto_frame)
+        cronometro.marcar("conteo")
+        poner_ultimo(self.cola_resultados, (timestamp_ms, manos))
+    
+    def manos_de_fase(self, manos, ancho_frame, alto_frame):
+        """En la selección solo cuenta una mano: el resto ni se extrapola ni se dibuja"""
+        if not DETECTOR_POR_FASE or self.maquina.fase_actual != "seleccion" or len(manos) <= 1:
+            return manos
+        return [elegir_mano(manos, self.maquina.criterio_seleccion, ancho_frame, alto_frame)]
+    
+    def grabar(self, timestamp_ms, manos, region):
+        """Guarda las manos de una detección si hay una grabación en curso"""
+        if self.grabador is not None and region is not None:
+            self.grabador.grabar(timestamp_ms, manos, region.ancho_frame, region.alto_frame)
+    
+    def detectar(self, mp_image, timestamp_ms, detector=None, region=None):
+        """
+        Ejecuta el detector según el modo de detección.
+        En LIVE_STREAM devuelve None: el resultado llega por al_recibir_resultado.
+        """
+        if detector is None:
+            self.cambiar_detector()
+            detector = self.detector
+        if self.modo_deteccion == "VIDEO":
+            return detector.detect_for_video(mp_image, timestamp_ms)
+        if self.modo_deteccion == "LIVE_STREAM":
+            # detect_async descarta frames si va ocupado: no guardar regiones sin resultado
+            for pendiente in list(self.regiones)[:-8]:
+                self.regiones.pop(pendiente, None)
+            if region is not None:
+                self.regiones[timestamp_ms] = region
+            detector.detect_async(mp_image, timestamp_ms)
+            return None
+        return detector.detect(mp_image)
+    
+    def recoger_resultado(self, ultimo_timestamp, manos):
+        """Toma el resultado publicado más reciente; si no hay uno nuevo conserva el anterior"""
+        try:
+            timestamp_ms, nuevas_manos = self.cola_resultados.get_nowait()
+            # Los resultados llegan en orden; nunca retroceder a uno anterior
+            if timestamp_ms > ultimo_timestamp:
+                return timestamp_ms, nuevas_manos
+        except queue.Empty:
+            pass
+        return ultimo_timestamp, manos
+    
+    def mostrar(self, img, estado, manos):
+        """Muestra el frame en la ventana y lo publica en la vista previa; devuelve la tecla pulsada"""
+        if self.vista is not None:
+            self.vista.publicar(img, estado, manos)
+        self.video.enviar(img)
+        
+        if not MOSTRAR_VENTANA:
+            return 0xFF
+        cv2.imshow("Calculadora con Gestos", img)
+        return cv2.waitKey(1) & 0xFF
+    
+    # ============================================
+    # PIPELINE CON HILOS
+    # ============================================
+    
+    def etapa_captura(self, cola_deteccion, cola_dibujo, parar):
+        """Lee la cámara, voltea y convierte a RGB; reparte el frame a detección y dibujo"""
+        while not parar.is_set():
+            cronometro = self.metricas.cronometro()
+            success, img = self.cap.read()
+            if not success:
+                print("  ✗ Error: No se puede acceder a la cámara")
+                break
+            cronometro.marcar("captura")
+            
+            img = cv2.flip(img, 1)
+            # Un frame saltado no se envía a detección; el dibujo reutiliza el último resultado
+            if self.planificador.debe_detectar(img):
+                img_rgb, region = self.entrada.preparar(img)
+                poner_ultimo(cola_deteccion, (img_rgb, region))
+            cronometro.marcar("preparar")
+            
+            # La detección solo lee img_rgb y el dibujo solo escribe en img
+            poner_ultimo(cola_dibujo, img)
+        parar.set()
+    
+    def etapa_deteccion(self, cola_deteccion, parar):
+        """Detecta manos y cuenta dedos sobre el frame más reciente disponible"""
+        while not parar.is_set():
+            try:
+                img_rgb, region = cola_deteccion.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            cronometro = self.metricas.cronometro()
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+            timestamp_ms = self.timestamp_monotono_ms()
+            detection_result = self.detectar(mp_image, timestamp_ms, region=region)
+            cronometro.marcar("deteccion")
+            if detection_result is not None:
+                manos = procesar_manos(detection_result, img_rgb, dibujar=False, region=region, almacen=self.almacen)
+                self.grabar(timestamp_ms, manos, region)
+                manos = self.seguidor.actualizar(manos, region.ancho_frame)
+                manos = self.manos_de_fase(manos, region.ancho_frame, region.alto_frame)
+                self.entrada.actualizar(manos, region.ancho_frame, region.alto_frame)
+                cronometro.marcar("conteo")
+                poner_ultimo(self.cola_resultados, (timestamp_ms, manos))
+    
+    def bucle_pipeline(self):
+        """Bucle principal en modo pipeline: el dibujo va al ritmo de la cámara"""
+        cola_deteccion = queue.Queue(maxsize=1)
+        cola_dibujo = queue.Queue(maxsize=1)
+        parar = threading.Event()
+        
+        hilos = [
+            threading.Thread(target=self.etapa_captura, args=(cola_deteccion, cola_dibujo, parar), daemon=True),
+            threading.Thread(target=self.etapa_deteccion, args=(cola_deteccion, parar), daemon=True),
+        ]
+        for hilo in hilos:
+            hilo.start()
+        
+        # Último resultado de detección; se reutiliza hasta que llegue uno más nuevo
+        ultimo_timestamp = 0
+        manos = []
+        
+        try:
+            while not parar.is_set():
+                try:
+                    img = cola_dibujo.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                
+                cronometro = self.metricas.cronometro()
+                ultimo_timestamp, manos = self.recoger_resultado(ultimo_timestamp, manos)
+                
+                dibujar_manos(img, [mano.landmarks for mano in manos], self.antialias, self.puntos_manos)
+                estado = self.actualizar_fase(img, manos)
+                if self.mostrar_hud:
+                    self.dibujar_hud(img)
+                cronometro.marcar("dibujo")
+                
+                key = self.mostrar(img, estado, manos)
+                cronometro.marcar("mostrar")
+                self.metricas.marcar_frame()
+                self.metricas.exportar_si_toca()
+                self.ajustar_calidad()
+                if not self.manejar_tecla(key):
+                    break
+        finally:
+            parar.set()
+            for hilo in hilos:
+                hilo.join(timeout=1.0)
+    
+    def bucle_secuencial(self):
+        """Bucle principal clásico: captura, detección y dibujo uno tras otro"""
+        ultimo_timestamp = 0
+        manos = []
+        
+        asignaciones = self.metricas.asignaciones
+        
+        while True:
+            if asignaciones is not None:
+                asignaciones.empezar_frame()
+            cronometro = self.metricas.cronometro()
+            success, captura = self.frames.leer(self.cap)
+            
+            if not success:
+                print("  ✗ Error: No se puede acceder a la cámara")
+                break
+            cronometro.marcar("captura")
+            
+            img = self.frames.voltear(captura)
+            ahora = time.monotonic()
+            
+            if self.planificador.debe_detectar(img):
+                # Convertir para MediaPipe (reducida o recortada según la configuración)
+                img_rgb, region = self.entrada.preparar(img)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+                cronometro.marcar("preparar")
+                
+                # Detectar manos
+                timestamp_ms = self.timestamp_monotono_ms()
+                detection_result = self.detectar(mp_image, timestamp_ms, region=region)
+                cronometro.marcar("deteccion")
+            else:
+                detection_result = None
+                cronometro.marcar("preparar")
+            
+            if detection_result is not None:
+                manos = procesar_manos(detection_result, img, dibujar=False, region=region, almacen=self.almacen)
+                self.grabar(timestamp_ms, manos, region)
+                manos = self.seguidor.actualizar(manos, region.ancho_frame)
+                manos = self.manos_de_fase(manos, region.ancho_frame, region.alto_frame)
+                self.entrada.actualizar(manos, region.ancho_frame, region.alto_frame)
+                self.planificador.registrar(manos, ahora)
+                cronometro.marcar("conteo")
+            elif self.modo_deteccion == "LIVE_STREAM":
+                # Usar el último resultado entregado por el callback
+                ultimo_timestamp, manos = self.recoger_resultado(ultimo_timestamp, manos)
+            else:
+                # Escena quieta: extrapolar las manos de las últimas detecciones
+                manos = self.planificador.estimar(ahora, img.shape[1], img.shape[0])
+                cronometro.marcar("estimacion")
+            
+            dibujar_manos(img, [mano.landmarks for mano in manos], self.antialias, self.puntos_manos)
+            estado = self.actualizar_fase(img, manos)
+            if self.mostrar_hud:
+                self.dibujar_hud(img)
+            cronometro.marcar("dibujo")
+            
+            # Mostrar imagen
+            key = self.mostrar(img, estado, manos)
+            cronometro.marcar("mostrar")
+            self.metricas.marcar_frame()
+            self.metricas.exportar_si_toca()
+            self.ajustar_calidad()
+            if asignaciones is not None:
+                asignaciones.terminar_frame()
+            if not self.manejar_tecla(key):
+                break
+    
+    def ejecutar(self):
+        """Inicia la cámara y el detector y ejecuta el bucle hasta pulsar Q"""
+        self.iniciar()
+        try:
+            if self.pipeline:
+                self.bucle_pipeline()
+            else:
+                self.bucle_secuencial()
+        finally:
+            self.cerrar()
+            cv2.destroyAllWindows()
+
 
 # ============================================
-# LIMPIEZA
+# BUCLE PRINCIPAL
 # ============================================
-cap.release()
-cv2.destroyAllWindows()
-print("  ✓ Programa finalizado correctamente")
-print()
+
+def main():
+    print()
+    print("╔" + "═" * 50 + "╗")
+    print("║" + " CALCULADORA CON GESTOS DE MANOS ".center(50) + "║")
+    print("╠" + "═" * 50 + "╣")
+    print("║" + " Controles:".ljust(50) + "║")
+    print("║" + "   [R] - Reiniciar / Cambiar operación".ljust(50) + "║")
+    print("║" + "   [H] - Mostrar / ocultar métricas".ljust(50) + "║")
+    print("║" + "   [V] - Grabar / parar vídeo de la sesión".ljust(50) + "║")
+    print("║" + "   [Q] - Salir del programa".ljust(50) + "║")
+    print("╚" + "═" * 50 + "╝")
+    print()
+    
+    try:
+        CalculadoraApp().ejecutar()
+    except RuntimeError as e:
+        print(f"  ✗ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        # Sin ventana la única forma de salir es Ctrl+C
+        print("  → Saliendo del programa...")
+    
+    print("  ✓ Programa finalizado correctamente")
+    print()
+
+
+if __name__ == "__main__":
+    main()
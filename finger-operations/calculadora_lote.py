@@ -0,0 +1,149 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║           CALCULADORA CON GESTOS - MODO SIN PANTALLA          ║
+║                                                               ║
+║  Procesa un vídeo, una carpeta de imágenes o un glob sin      ║
+║  cámara ni ventana y escribe un JSON por frame (JSONL)        ║
+║                                                               ║
+║  Uso: python calculadora_lote.py sesion.mp4 -o sesion.jsonl   ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+import cv2
+import mediapipe as mp
+
+import calculadora_dedos as calc
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+# ============================================
+# FUENTES DE FRAMES
+# ============================================
+
+def listar_imagenes(fuente):
+    """Devuelve las rutas de imagen ordenadas de una carpeta o de un glob"""
+    if os.path.isdir(fuente):
+        rutas = (os.path.join(fuente, nombre) for nombre in os.listdir(fuente))
+    else:
+        rutas = glob.iglob(fuente)
+    return sorted(ruta for ruta in rutas if ruta.lower().endswith(EXTENSIONES_IMAGEN))
+
+
+def iterar_frames(fuente, fps_imagenes=30.0):
+    """
+    Genera (indice, timestamp_ms, img, nombre) frame a frame.
+    Solo hay un frame en memoria a la vez, sea cual sea la duración del vídeo.
+    """
+    if os.path.isfile(fuente) and not fuente.lower().endswith(EXTENSIONES_IMAGEN):
+        video = cv2.VideoCapture(fuente)
+        if not video.isOpened():
+            raise ValueError(f"No se puede abrir el vídeo: {fuente}")
+
+        fps = video.get(cv2.CAP_PROP_FPS) or fps_imagenes
+        ultimo_timestamp = -1
+        indice = 0
+        try:
+            while True:
+                success, img = video.read()
+                if not success:
+                    break
+                # Timestamp del contenedor; si falta o no avanza, derivarlo del índice
+                timestamp_ms = int(video.get(cv2.CAP_PROP_POS_MSEC))
+                if timestamp_ms <= ultimo_timestamp:
+                    timestamp_ms = max(int(indice * 1000 / fps), ultimo_timestamp + 1)
+                ultimo_timestamp = timestamp_ms
+                yield indice, timestamp_ms, img, None
+                indice += 1
+        finally:
+            video.release()
+        return
+
+    rutas = listar_imagenes(fuente)
+    if not rutas:
+        raise ValueError(f"No se encontraron imágenes en: {fuente}")
+
+    for indice, ruta in enumerate(rutas):
+        img = cv2.imread(ruta)
+        if img is None:
+            print(f"  ✗ No se puede leer la imagen: {ruta}", file=sys.stderr)
+            continue
+        yield indice, int(indice * 1000 / fps_imagenes), img, ruta
+
+
+# ============================================
+# PROCESAMIENTO
+# ============================================
+
+def procesar_fuente(fuente, espejo=True, fps_imagenes=30.0):
+    """
+    Pasa cada frame por el detector, el conteo de dedos y la máquina de fases.
+    Genera un dict por frame; no dibuja nada.
+    """
+    detector = calc.crear_detector("VIDEO")
+    # Solo la lógica de fases: sin ventana, métricas ni detectores de la app en vivo
+    maquina = calc.MaquinaFases()
+    almacen = calc.AlmacenManos()
+    seguidor = calc.SeguidorManos()
+    entrada = calc.EntradaDetector(reutilizar=True)
+
+    try:
+        for indice, timestamp_ms, img, nombre in iterar_frames(fuente, fps_imagenes):
+            # La cámara en vivo se voltea; de las grabaciones en crudo se voltean los
+            # landmarks en vez de los píxeles, con el mismo resultado y sin copiar el frame
+            w = img.shape[1]
+            img_rgb, region = entrada.preparar(img, espejo=espejo)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+            detection_result = detector.detect_for_video(mp_image, timestamp_ms)
+            manos = calc.procesar_manos(detection_result, img, dibujar=False, region=region, almacen=almacen)
+            manos = seguidor.actualizar(manos, w)
+
+            num_izq, num_der = calc.clasificar_manos_por_posicion(manos, w)
+            estado = maquina.procesar(calc.EventoManos(manos, timestamp_ms / 1000, w, img.shape[0]))
+
+            registro = {
+                "frame": indice,
+                "timestamp_ms": timestamp_ms,
+                "manos": len(manos),
+                # Conteo de cada frame, comparable con salidas anteriores, y el votado por el seguidor
+                "dedos": [mano.dedos if mano.dedos_frame is None else mano.dedos_frame for mano in manos],
+                "dedos_votados": [mano.dedos for mano in manos],
+                "izquierda": num_izq,
+                "derecha": num_der,
+                "fase": estado["fase"],
+                "operacion": estado["operacion"],
+                "resultado": estado.get("resultado"),
+                "sumas": estado.get("sumas"),
+            }
+            if nombre is not None:
+                registro["imagen"] = nombre
+            yield registro
+    finally:
+        detector.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculadora con gestos sin pantalla: escribe un JSON por frame")
+    parser.add_argument("fuente", help="vídeo, carpeta de imágenes o glob (entre comillas)")
+    parser.add_argument("-o", "--salida", default="-", help="fichero JSONL de salida (por defecto la salida estándar)")
+    parser.add_argument("--sin-espejo", action="store_true", help="no voltear los frames (la grabación ya está en espejo)")
+    parser.add_argument("--fps", type=float, default=30.0, help="fps supuestos para secuencias de imágenes")
+    args = parser.parse_args(argv)
+
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    try:
+        for registro in procesar_fuente(args.fuente, espejo=not args.sin_espejo, fps_imagenes=args.fps):
+            salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+
+if __name__ == "__main__":
+    main()
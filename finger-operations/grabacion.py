@@ -0,0 +1,131 @@
+"""
+Grabación compacta de los resultados del detector para reproducirlos sin cámara.
+
+Cada fichero es un .npy con un array estructurado de DTYPE_REGISTRO: una fila por
+mano detectada (o una fila vacía con manos=0 si el frame no tenía ninguna), con el
+timestamp del detector, el lado y los 21 landmarks en float32. Los landmarks se
+guardan ya en coordenadas del frame completo que se muestra (sin recorte, escala
+ni espejo del detector), así que la reproducción no depende de esa configuración.
+
+Las filas se añaden al final según llegan y la cabecera tiene tamaño fijo: al
+cerrar solo se reescribe el número de filas. cargar_grabacion() calcula las filas
+por el tamaño del fichero, de modo que una grabación cortada a medias (cierre
+brusco) también se puede leer.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+DTYPE_REGISTRO = np.dtype([
+    ("frame", "<u4"),
+    ("timestamp_ms", "<i8"),
+    ("ancho", "<u2"),
+    ("alto", "<u2"),
+    ("manos", "u1"),            # Manos del frame; 0 en la fila de un frame sin manos
+    ("derecha", "?"),
+    ("puntuacion", "<f4"),      # Confianza del lado según MediaPipe
+    ("landmarks", "<f4", (21, 3)),
+])
+
+# Cabecera .npy de tamaño fijo (múltiplo de 64) para poder reescribirla al cerrar
+TAMANO_CABECERA = 256
+
+
+def cabecera_npy(filas):
+    """Cabecera .npy v1.0 de TAMANO_CABECERA bytes para filas registros"""
+    texto = repr({
+        "descr": np.lib.format.dtype_to_descr(DTYPE_REGISTRO),
+        "fortran_order": False,
+        "shape": (filas,),
+    })
+    prefijo = np.lib.format.magic(1, 0)
+    relleno = TAMANO_CABECERA - len(prefijo) - 2 - len(texto) - 1
+    if relleno < 0:
+        raise ValueError("La cabecera de la grabación no cabe en TAMANO_CABECERA")
+    return prefijo + struct.pack("<H", TAMANO_CABECERA - len(prefijo) - 2) + (texto + " " * relleno + "\n").encode("latin1")
+
+
+def landmarks_de_manos(manos):
+    """Array (n_manos, 21, 3) float32 con los landmarks de las manos de procesar_manos"""
+    return np.array([mano.landmarks for mano in manos], dtype=np.float32).reshape(len(manos), 21, 3)
+
+
+class GrabadorLandmarks:
+    """Añade a un .npy los landmarks de cada detección según llegan"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.fichero = open(ruta, "wb")
+        self.fichero.write(cabecera_npy(0))
+        self.frames = 0
+        self.filas = 0
+
+    def grabar(self, timestamp_ms, manos, ancho, alto):
+        """Guarda las manos de una detección (antes del seguimiento) y su timestamp"""
+        if self.fichero is None:
+            return
+        n = len(manos)
+        registros = np.zeros(max(n, 1), dtype=DTYPE_REGISTRO)
+        registros["frame"] = self.frames
+        registros["timestamp_ms"] = timestamp_ms
+        registros["ancho"] = ancho
+        registros["alto"] = alto
+        registros["manos"] = n
+        if n:
+            registros["derecha"] = [mano.handedness == "Right" for mano in manos]
+            registros["puntuacion"] = [mano.puntuacion for mano in manos]
+            registros["landmarks"] = landmarks_de_manos(manos)
+        registros.tofile(self.fichero)
+        self.frames += 1
+        self.filas += len(registros)
+
+    def cerrar(self):
+        if self.fichero is None:
+            return
+        self.fichero.seek(0)
+        self.fichero.write(cabecera_npy(self.filas))
+        self.fichero.close()
+        self.fichero = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def cargar_grabacion(ruta):
+    """Registros de una grabación como array estructurado mapeado en memoria (solo lectura)"""
+    with open(ruta, "rb") as f:
+        np.lib.format.read_magic(f)
+        _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        inicio = f.tell()
+    if dtype != DTYPE_REGISTRO:
+        raise ValueError(f"{ruta} no es una grabación de landmarks")
+
+    filas = (os.path.getsize(ruta) - inicio) // DTYPE_REGISTRO.itemsize
+    if filas == 0:
+        return np.zeros(0, dtype=DTYPE_REGISTRO)
+    return np.memmap(ruta, dtype=DTYPE_REGISTRO, mode="r", offset=inicio, shape=(filas,))
+
+
+def iterar_detecciones(registros):
+    """
+    Genera (frame, timestamp_ms, ancho, alto, filas) por detección grabada;
+    filas es la porción de registros con sus manos (vacía si no había ninguna).
+    """
+    if len(registros) == 0:
+        return
+    # Vista como ndarray normal (sigue mapeada): indexar un np.memmap es bastante más lento
+    registros = registros.view(np.ndarray)
+    cortes = np.flatnonzero(np.diff(registros["frame"])) + 1
+    inicios = np.concatenate(([0], cortes))
+    finales = np.concatenate((cortes, [len(registros)]))
+    for inicio, final in zip(inicios.tolist(), finales.tolist()):
+        filas = registros[inicio:final]
+        primera = filas[0]
+        if primera["manos"] == 0:
+            filas = filas[:0]
+        yield int(primera["frame"]), int(primera["timestamp_ms"]), int(primera["ancho"]), int(primera["alto"]), filas
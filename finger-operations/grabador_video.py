@@ -0,0 +1,208 @@
+"""
+Grabación de la sesión anotada en vídeo sin frenar el bucle principal.
+
+El bucle solo copia el frame a una cola acotada (a buffers que se reciclan); un
+hilo los codifica con cv2.VideoWriter y reparte la sesión en segmentos de una
+duración o un tamaño máximos. Si el codificador no da abasto y la cola se llena,
+se descarta un frame según la política:
+
+- "antiguos": sale el frame más viejo de la cola (el vídeo salta, pero no se atrasa)
+- "nuevos":   se descarta el frame que llega (el vídeo se congela un momento)
+
+Empezar y parar la grabación solo cambian un indicador: abrir y cerrar los
+ficheros lo hace también el hilo, así que una tecla nunca detiene la detección.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+POLITICAS = ("antiguos", "nuevos")
+
+# Extensión del fichero según el codec (FourCC) de cv2.VideoWriter
+EXTENSIONES = {"mp4v": ".mp4", "avc1": ".mp4", "MJPG": ".avi", "XVID": ".avi"}
+
+
+class GrabadorVideo:
+    """Cola acotada de frames anotados y un hilo que los escribe en segmentos de vídeo"""
+
+    def __init__(self, directorio="grabaciones", fps=30.0, codec="mp4v", capacidad=32, politica="antiguos",
+                 duracion_segmento=300.0, tamano_segmento=None, prefijo="sesion"):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de descarte desconocida: {politica!r} (válidas: {', '.join(POLITICAS)})")
+        self.directorio = directorio
+        self.fps = fps
+        self.codec = codec
+        self.capacidad = capacidad
+        self.politica = politica
+        self.duracion_segmento = duracion_segmento  # Segundos de vídeo; None = sin límite
+        self.tamano_segmento = tamano_segmento      # Bytes; None = sin límite
+        self.prefijo = prefijo
+
+        # Cola de (frame, sesión) y buffers ya escritos para reutilizar
+        self.hay_frames = threading.Condition()
+        self.cola = deque()
+        self.libres = []
+        self.grabando = False
+        self.cerrado = False
+        self.sesion = 0
+        self.hilo = None
+
+        # Estado del segmento abierto; solo lo toca el hilo escritor
+        self.escritor = None
+        self.ruta = None
+        self.sesion_segmento = None
+        self.tamano_frame = None
+        self.frames_segmento = 0
+        # Sesión cuyo fichero no se pudo abrir: el resto de sus frames se descarta
+        self.sesion_fallida = None
+
+        # Contadores para el HUD y las métricas
+        self.escritos = 0
+        self.descartados = 0
+        self.cola_maxima = 0
+        self.segmentos = 0
+        self.error = None
+
+    @property
+    def profundidad(self):
+        return len(self.cola)
+
+    def empezar(self):
+        """Empieza una grabación nueva: el siguiente frame abre un segmento nuevo"""
+        with self.hay_frames:
+            if self.cerrado or self.grabando:
+                return
+            self.grabando = True
+            self.sesion += 1
+            self.error = None
+            if self.hilo is None:
+                self.hilo = threading.Thread(target=self.escribir, daemon=True)
+                self.hilo.start()
+
+    def parar(self):
+        """Deja de aceptar frames; el hilo escribe los que quedan en la cola y cierra el fichero"""
+        with self.hay_frames:
+            self.grabando = False
+            self.hay_frames.notify()
+
+    def alternar(self):
+        """Empieza o para la grabación; devuelve si queda grabando"""
+        if self.grabando:
+            self.parar()
+        else:
+            self.empezar()
+        return self.grabando
+
+    def enviar(self, img):
+        """Encola una copia del frame; nunca espera al codificador"""
+        if not self.grabando:
+            return
+        with self.hay_frames:
+            if len(self.cola) >= self.capacidad:
+                self.descartados += 1
+                if self.politica == "nuevos":
+                    return
+                buffer, _ = self.cola.popleft()
+            elif self.libres:
+                buffer = self.libres.pop()
+            else:
+                buffer = None
+
+        if buffer is None or buffer.shape != img.shape:
+            buffer = np.empty_like(img)
+        np.copyto(buffer, img)
+
+        with self.hay_frames:
+            self.cola.append((buffer, self.sesion))
+            self.cola_maxima = max(self.cola_maxima, len(self.cola))
+            self.hay_frames.notify()
+
+    def cerrar(self, timeout=5.0):
+        """Para la grabación y espera a que se escriba lo pendiente"""
+        with self.hay_frames:
+            self.grabando = False
+            self.cerrado = True
+            self.hay_frames.notify()
+        if self.hilo is not None:
+            self.hilo.join(timeout)
+
+    # ============================================
+    # HILO ESCRITOR
+    # ============================================
+
+    def escribir(self):
+        """Hilo escritor: vacía la cola en el segmento abierto y lo cierra al parar"""
+        while True:
+            with self.hay_frames:
+                while not self.cola and not self.cerrado and (self.grabando or self.escritor is None):
+                    self.hay_frames.wait()
+                img, sesion = self.cola.popleft() if self.cola else (None, None)
+
+            if img is None:
+                # Grabación parada (o cierre) con la cola vacía: terminar el segmento
+                self.cerrar_segmento()
+                if self.cerrado:
+                    return
+                continue
+
+            if self.escritor is not None and (sesion != self.sesion_segmento or self.segmento_lleno(img)):
+                self.cerrar_segmento()
+            if self.escritor is None and sesion != self.sesion_fallida:
+                self.abrir_segmento(img, sesion)
+            if self.escritor is not None:
+                self.escritor.write(img)
+                self.escritos += 1
+                self.frames_segmento += 1
+
+            with self.hay_frames:
+                if self.escritor is None:
+                    # El bucle también cuenta descartes: se suman con el cerrojo
+                    self.descartados += 1
+                if len(self.libres) < self.capacidad:
+                    self.libres.append(img)
+
+    def segmento_lleno(self, img):
+        """Toca empezar otro fichero: límite de duración o de tamaño, o cambio de resolución"""
+        if img.shape[:2] != self.tamano_frame:
+            return True
+        if self.duracion_segmento and self.frames_segmento >= self.duracion_segmento * self.fps:
+            return True
+        # El tamaño del fichero se consulta una vez por segundo de vídeo
+        if self.tamano_segmento and self.frames_segmento % max(int(self.fps), 1) == 0:
+            return os.path.getsize(self.ruta) >= self.tamano_segmento
+        return False
+
+    def abrir_segmento(self, img, sesion):
+        os.makedirs(self.directorio, exist_ok=True)
+        self.segmentos += 1
+        nombre = f"{self.prefijo}_{time.strftime('%Y%m%d_%H%M%S')}_{self.segmentos:03d}"
+        self.ruta = os.path.join(self.directorio, nombre + EXTENSIONES.get(self.codec, ".avi"))
+        self.tamano_frame = img.shape[:2]
+        self.sesion_segmento = sesion
+        self.frames_segmento = 0
+
+        escritor = cv2.VideoWriter(self.ruta, cv2.VideoWriter_fourcc(*self.codec), self.fps,
+                                   (img.shape[1], img.shape[0]))
+        if not escritor.isOpened():
+            self.error = f"No se puede abrir {self.ruta} con el codec {self.codec}"
+            print(f"  ✗ Vídeo: {self.error}")
+            self.segmentos -= 1
+            self.sesion_fallida = sesion
+            with self.hay_frames:
+                if self.sesion == sesion:
+                    self.grabando = False
+            return
+        self.escritor = escritor
+        print(f"  ● Grabando vídeo en {self.ruta}")
+
+    def cerrar_segmento(self):
+        if self.escritor is None:
+            return
+        self.escritor.release()
+        self.escritor = None
+        print(f"  ✓ Vídeo guardado: {self.ruta} ({self.frames_segmento} frames)")
@@ -0,0 +1,227 @@
+"""
+Métricas de latencia por etapa del bucle principal.
+
+Cada etapa guarda sus últimas muestras en un histograma de anillo de tamaño fijo.
+Con la instrumentación desactivada los cronómetros son objetos nulos que no hacen nada.
+Las métricas se pueden exportar periódicamente en formato de texto de Prometheus
+(.prom) o CSV (.csv). Opcionalmente se mide con tracemalloc la memoria asignada
+en cada frame.
+"""
+
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+
+class HistogramaAnillo:
+    """Últimas `capacidad` muestras en segundos, más el total y la suma acumulados"""
+
+    def __init__(self, capacidad=512):
+        self.muestras = np.zeros(capacidad)
+        self.indice = 0
+        self.total = 0
+        self.suma = 0.0
+
+    def agregar(self, valor):
+        self.muestras[self.indice] = valor
+        self.indice = (self.indice + 1) % len(self.muestras)
+        self.total += 1
+        self.suma += valor
+
+    def valores(self):
+        """Muestras guardadas (sin los huecos si aún no se ha llenado)"""
+        return self.muestras[:min(self.total, len(self.muestras))]
+
+    def ultimo(self):
+        return self.muestras[self.indice - 1] if self.total else 0.0
+
+    def recientes(self, n):
+        """Las últimas n muestras (como mucho las que caben en el anillo)"""
+        n = min(n, self.total, len(self.muestras))
+        return np.take(self.muestras, range(self.indice - n, self.indice), mode="wrap")
+
+    def percentiles(self, qs=(50, 95, 99)):
+        valores = self.valores()
+        if len(valores) == 0:
+            return [0.0] * len(qs)
+        return [float(p) for p in np.percentile(valores, qs)]
+
+
+class Cronometro:
+    """Mide etapas consecutivas: cada marca registra el tiempo desde la anterior"""
+
+    __slots__ = ("metricas", "anterior")
+
+    def __init__(self, metricas):
+        self.metricas = metricas
+        self.anterior = time.perf_counter()
+
+    def marcar(self, etapa):
+        ahora = time.perf_counter()
+        self.metricas.registrar(etapa, ahora - self.anterior)
+        self.anterior = ahora
+
+
+class CronometroNulo:
+    """Cronómetro de la instrumentación desactivada"""
+
+    __slots__ = ()
+
+    def marcar(self, etapa):
+        pass
+
+
+CRONOMETRO_NULO = CronometroNulo()
+
+
+class ContadorAsignaciones:
+    """
+    Memoria asignada durante cada frame: el pico de tracemalloc del frame menos la
+    memoria en uso al empezarlo. Un valor que no crece y no llega al tamaño de un
+    frame indica que el bucle reutiliza sus buffers. Registra los arrays de NumPy y
+    las salidas de OpenCV, no las copias internas de MediaPipe (C++).
+    """
+    
+    def __init__(self, capacidad=512):
+        self.bytes = HistogramaAnillo(capacidad)
+        self.inicio = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def empezar_frame(self):
+        tracemalloc.reset_peak()
+        self.inicio = tracemalloc.get_traced_memory()[0]
+    
+    def terminar_frame(self):
+        actual, pico = tracemalloc.get_traced_memory()
+        self.bytes.agregar(pico - self.inicio)
+    
+    def detener(self):
+        tracemalloc.stop()
+
+
+class Metricas:
+    """
+    Histogramas por etapa, FPS y exportación periódica a fichero.
+    Cada etapa la registra un solo hilo; las lecturas copian la lista de etapas
+    porque otro hilo puede añadir una nueva mientras tanto.
+    """
+
+    def __init__(self, activa=False, capacidad=512, ruta_exportacion=None, intervalo_exportacion=10.0):
+        self.activa = activa
+        self.capacidad = capacidad
+        self.ruta_exportacion = ruta_exportacion
+        self.intervalo_exportacion = intervalo_exportacion
+        self.histogramas = {}
+        self.frames = HistogramaAnillo(capacidad)
+        self.ultimo_frame = None
+        self.ultima_exportacion = time.monotonic()
+        # ContadorAsignaciones si se miden las asignaciones por frame
+        self.asignaciones = None
+        # Valores de otros componentes que se leen al exportar: {nombre: (tipo, ayuda, funcion)}
+        self.indicadores = {}
+
+    def cronometro(self):
+        return Cronometro(self) if self.activa else CRONOMETRO_NULO
+
+    def registrar(self, etapa, segundos):
+        histograma = self.histogramas.get(etapa)
+        if histograma is None:
+            histograma = self.histogramas[etapa] = HistogramaAnillo(self.capacidad)
+        histograma.agregar(segundos)
+
+    def registrar_indicador(self, nombre, ayuda, funcion, tipo="gauge"):
+        """Exporta funcion() como calculadora_<nombre>; tipo "counter" para totales acumulados"""
+        self.indicadores[nombre] = (tipo, ayuda, funcion)
+
+    def marcar_frame(self):
+        """Registra el intervalo desde el frame mostrado anterior"""
+        if not self.activa:
+            return
+        ahora = time.perf_counter()
+        if self.ultimo_frame is not None:
+            self.frames.agregar(ahora - self.ultimo_frame)
+        self.ultimo_frame = ahora
+
+    def fps(self):
+        valores = self.frames.valores()
+        return len(valores) / valores.sum() if len(valores) and valores.sum() > 0 else 0.0
+
+    def resumen(self):
+        """Devuelve {etapa: (ultimo_ms, p50_ms, p95_ms, p99_ms)} en orden de registro"""
+        resumen = {}
+        for etapa, histograma in list(self.histogramas.items()):
+            p50, p95, p99 = histograma.percentiles()
+            resumen[etapa] = (histograma.ultimo() * 1000, p50 * 1000, p95 * 1000, p99 * 1000)
+        return resumen
+
+    # ============================================
+    # EXPORTACIÓN
+    # ============================================
+
+    def exportar_si_toca(self):
+        """Exporta a ruta_exportacion si ha pasado el intervalo configurado"""
+        if not self.activa or not self.ruta_exportacion:
+            return
+        ahora = time.monotonic()
+        if ahora - self.ultima_exportacion >= self.intervalo_exportacion:
+            self.ultima_exportacion = ahora
+            self.exportar(self.ruta_exportacion)
+
+    def exportar(self, ruta):
+        """Escribe las métricas en CSV (.csv, añadiendo filas) o texto de Prometheus (resto)"""
+        if ruta.endswith(".csv"):
+            self.exportar_csv(ruta)
+        else:
+            self.exportar_prometheus(ruta)
+
+    def exportar_prometheus(self, ruta):
+        lineas = [
+            "# HELP calculadora_etapa_segundos Latencia por etapa del bucle principal",
+            "# TYPE calculadora_etapa_segundos summary",
+        ]
+        for etapa, histograma in list(self.histogramas.items()):
+            for q, valor in zip(("0.5", "0.95", "0.99"), histograma.percentiles()):
+                lineas.append(f'calculadora_etapa_segundos{{etapa="{etapa}",quantile="{q}"}} {valor:.6f}')
+            lineas.append(f'calculadora_etapa_segundos_sum{{etapa="{etapa}"}} {histograma.suma:.6f}')
+            lineas.append(f'calculadora_etapa_segundos_count{{etapa="{etapa}"}} {histograma.total}')
+        if self.asignaciones is not None:
+            histograma = self.asignaciones.bytes
+            lineas += [
+                "# HELP calculadora_asignacion_frame_bytes Memoria asignada durante cada frame",
+                "# TYPE calculadora_asignacion_frame_bytes summary",
+            ]
+            for q, valor in zip(("0.5", "0.95", "0.99"), histograma.percentiles()):
+                lineas.append(f'calculadora_asignacion_frame_bytes{{quantile="{q}"}} {valor:.0f}')
+            lineas.append(f"calculadora_asignacion_frame_bytes_sum {histograma.suma:.0f}")
+            lineas.append(f"calculadora_asignacion_frame_bytes_count {histograma.total}")
+        lineas += [
+            "# HELP calculadora_fps Frames mostrados por segundo",
+            "# TYPE calculadora_fps gauge",
+            f"calculadora_fps {self.fps():.2f}",
+        ]
+        for nombre, (tipo, ayuda, funcion) in list(self.indicadores.items()):
+            lineas += [
+                f"# HELP calculadora_{nombre} {ayuda}",
+                f"# TYPE calculadora_{nombre} {tipo}",
+                f"calculadora_{nombre} {funcion()}",
+            ]
+
+        # Escritura atómica para que el scraper nunca lea un fichero a medias
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(temporal, ruta)
+
+    def exportar_csv(self, ruta):
+        nuevo = not os.path.exists(ruta)
+        marca = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(ruta, "a", encoding="utf-8") as f:
+            if nuevo:
+                f.write("timestamp,etapa,muestras,p50_ms,p95_ms,p99_ms\n")
+            # La fila "frame" es el intervalo entre frames mostrados (1000 / p50_ms = FPS)
+            for etapa, histograma in [*list(self.histogramas.items()), ("frame", self.frames)]:
+                p50, p95, p99 = histograma.percentiles()
+                f.write(f"{marca},{etapa},{histograma.total},{p50 * 1000:.3f},{p95 * 1000:.3f},{p99 * 1000:.3f}\n")
@@ -0,0 +1,158 @@
+"""
+Gestión del modelo de detección de manos (hand_landmarker.task).
+
+- Caché local en un directorio configurable (CALCULADORA_CACHE_MODELOS).
+- Verificación de integridad: el .task es un ZIP y se comprueba entero, y su SHA-256
+  tiene que ser el publicado para la versión que se descarga (MODEL_SHA256). Una
+  descarga con otro hash se rechaza.
+- Descarga atómica: se escribe en un temporal del mismo directorio y se renombra
+  solo si se verifica, así nunca queda un modelo truncado en la caché.
+- Copia preparada de antemano (CALCULADORA_MODELO) para instalaciones sin red.
+- Buffer en memoria leído una vez por proceso y reutilizado por todos los
+  detectores de ese proceso (cada proceso tiene su propia copia).
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import urllib.request
+import zipfile
+
+MODEL_URL = "https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task"
+NOMBRE_MODELO = "hand_landmarker.task"
+
+# SHA-256 publicado de la versión del modelo de MODEL_URL (float16/1, 7819105 bytes).
+# Las descargas y la copia en caché se comparan con él y se rechazan si no coincide.
+# CALCULADORA_MODELO_SHA256 lo sustituye; al cambiar MODEL_URL de versión hay que
+# cambiar también el hash
+MODEL_SHA256 = (os.environ.get("CALCULADORA_MODELO_SHA256")
+                or "fbc2a30080c3c557093b5ddfc334698132eb341044ccee322ccf8bcf3607cde1")
+
+DIRECTORIO_CACHE = os.environ.get("CALCULADORA_CACHE_MODELOS", os.path.dirname(os.path.abspath(__file__)))
+RUTA_MODELO = os.environ.get("CALCULADORA_MODELO")
+
+_verificados = set()
+_buffers = {}
+_cerrojo = threading.Lock()
+
+
+class ModeloInvalido(RuntimeError):
+    """El modelo no existe, está truncado o no coincide con el hash esperado"""
+
+
+def sha256_fichero(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def identidad(ruta):
+    """Clave que cambia si el fichero se reemplaza o se modifica"""
+    info = os.stat(ruta)
+    return os.path.realpath(ruta), info.st_size, info.st_mtime_ns
+
+
+def comprobar_zip(ruta):
+    """Lee el .task (un ZIP) completo; un fichero truncado pierde el índice del final"""
+    try:
+        with zipfile.ZipFile(ruta) as paquete:
+            if paquete.testzip() is not None:
+                raise ModeloInvalido(f"El modelo está corrupto: {ruta}")
+    except zipfile.BadZipFile as e:
+        raise ModeloInvalido(f"El modelo está truncado o no es un .task: {ruta}") from e
+
+
+def verificar_modelo(ruta, sha256=MODEL_SHA256):
+    """Lanza ModeloInvalido si el fichero no es un .task íntegro o su hash no es el fijado"""
+    if not os.path.isfile(ruta):
+        raise ModeloInvalido(f"No existe el modelo: {ruta}")
+
+    clave = identidad(ruta)
+    if clave in _verificados:
+        return
+
+    comprobar_zip(ruta)
+    if sha256 is not None:
+        obtenido = sha256_fichero(ruta)
+        if obtenido != sha256.lower():
+            raise ModeloInvalido(f"El hash de {ruta} no coincide: {obtenido} != {sha256}")
+
+    _verificados.add(clave)
+
+
+def descargar_modelo(destino, url=MODEL_URL, sha256=MODEL_SHA256):
+    """Descarga a un temporal, comprueba el hash fijado y solo entonces lo mueve a destino"""
+    if sha256 is None:
+        # Sin hash no hay forma de saber si la primera descarga ya viene dañada o alterada
+        raise ModeloInvalido(f"No hay un SHA-256 fijado para {url}: define MODEL_SHA256 "
+                             "(o CALCULADORA_MODELO_SHA256) con el hash publicado")
+    directorio = os.path.dirname(destino) or "."
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".tmp-", suffix=".task")
+    os.close(descriptor)
+    try:
+        urllib.request.urlretrieve(url, temporal)
+        verificar_modelo(temporal, sha256)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def obtener_modelo(ruta=RUTA_MODELO, directorio=DIRECTORIO_CACHE, url=MODEL_URL, sha256=MODEL_SHA256, descargar=True):
+    """
+    Devuelve la ruta de un modelo verificado.
+    Con ruta se usa esa copia local tal cual, sin red; si no, se busca en la caché
+    y se descarga (o se vuelve a descargar si está dañado) cuando hace falta.
+    """
+    if ruta:
+        verificar_modelo(ruta, sha256)
+        return ruta
+
+    destino = os.path.join(directorio, NOMBRE_MODELO)
+    if os.path.exists(destino):
+        try:
+            verificar_modelo(destino, sha256)
+            return destino
+        except ModeloInvalido as e:
+            print(f"  ✗ {e}; se descargará de nuevo", file=sys.stderr)
+            if not descargar:
+                raise
+
+    if not descargar:
+        raise ModeloInvalido(f"No hay modelo en {destino} y la descarga está desactivada")
+
+    print("=" * 60, file=sys.stderr)
+    print("  Descargando modelo de detección de manos...", file=sys.stderr)
+    print("=" * 60, file=sys.stderr)
+    try:
+        descargar_modelo(destino, url, sha256)
+    except Exception as e:
+        print(f"  ✗ Error al descargar el modelo: {e}", file=sys.stderr)
+        print("  Por favor descarga manualmente desde:", file=sys.stderr)
+        print(f"  {url}", file=sys.stderr)
+        raise ModeloInvalido(f"No se pudo descargar el modelo: {e}") from e
+    print("  ✓ Modelo descargado correctamente!", file=sys.stderr)
+    return destino
+
+
+def cargar_buffer_modelo(ruta):
+    """
+    Contenido del modelo para BaseOptions(model_asset_buffer=...).
+    Se lee de disco una vez por proceso y todos los detectores del proceso
+    reutilizan el mismo objeto bytes. MediaPipe exige bytes (c_char_p) y no
+    acepta un mapeo ni un memoryview, así que cada proceso tiene su copia.
+    """
+    clave = identidad(ruta)
+    with _cerrojo:
+        buffer = _buffers.get(clave)
+        if buffer is None:
+            with open(ruta, "rb") as f:
+                buffer = f.read()
+            _buffers.clear()
+            _buffers[clave] = buffer
+    return buffer
@@ -0,0 +1,393 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║           CALCULADORA CON GESTOS - VARIAS CÁMARAS             ║
+║                                                               ║
+║  Una calculadora independiente por cámara en una sola         ║
+║  máquina: cada cámara escribe en su anillo de memoria         ║
+║  compartida y un grupo de procesos detectores los consume.    ║
+║                                                               ║
+║  Uso: python multicamara.py 0 1 2 --trabajadores 4            ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import json
+import multiprocessing as mproc
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import calculadora_dedos as calc
+
+# Frames que guarda el anillo de cada cámara
+SLOTS_ANILLO = 4
+
+# Veces que se puede reponer un proceso detector caído antes de abandonar
+MAX_REINICIOS_DETECTOR = 10
+
+
+# ============================================
+# ANILLO DE FRAMES EN MEMORIA COMPARTIDA
+# ============================================
+
+class AnilloFrames:
+    """
+    Anillo de frames BGR de tamaño fijo en memoria compartida.
+    Un único escritor (el proceso de captura) y varios lectores. Cada slot guarda
+    el número de secuencia de su frame; un lector copia el frame y comprueba que
+    la secuencia no cambió durante la copia, si cambió el frame se descarta.
+    """
+
+    def __init__(self, nombre, alto, ancho, slots=SLOTS_ANILLO, crear=False):
+        self.alto, self.ancho, self.slots = alto, ancho, slots
+        tamano_frame = alto * ancho * 3
+        # Cabecera: última secuencia escrita + secuencia y timestamp de cada slot
+        tamano_cabecera = 8 * (1 + 2 * slots)
+        self.shm = shared_memory.SharedMemory(name=nombre, create=crear,
+                                              size=tamano_cabecera + slots * tamano_frame)
+        self.cabecera = np.ndarray((1 + 2 * slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots, alto, ancho, 3), dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=tamano_cabecera)
+        if crear:
+            self.cabecera[:] = 0
+
+    @property
+    def nombre(self):
+        return self.shm.name
+
+    def ultima_secuencia(self):
+        return int(self.cabecera[0])
+
+    def escribir(self, secuencia, timestamp_ms, img):
+        slot = secuencia % self.slots
+        # Marcar el slot como en escritura antes de tocar los píxeles
+        self.cabecera[1 + slot] = -1
+        if img.shape[:2] != (self.alto, self.ancho):
+            cv2.resize(img, (self.ancho, self.alto), dst=self.frames[slot])
+        else:
+            np.copyto(self.frames[slot], img)
+        self.cabecera[1 + self.slots + slot] = timestamp_ms
+        self.cabecera[1 + slot] = secuencia
+        self.cabecera[0] = secuencia
+
+    def leer(self, secuencia, destino=None):
+        """Copia el frame de esa secuencia; devuelve (img, timestamp_ms) o None si ya se sobrescribió"""
+        slot = secuencia % self.slots
+        if self.cabecera[1 + slot] != secuencia:
+            return None
+        timestamp_ms = int(self.cabecera[1 + self.slots + slot])
+        if destino is None:
+            destino = np.empty((self.alto, self.ancho, 3), dtype=np.uint8)
+        np.copyto(destino, self.frames[slot])
+        if self.cabecera[1 + slot] != secuencia:
+            return None
+        return destino, timestamp_ms
+
+    def cerrar(self, borrar=False):
+        del self.cabecera, self.frames
+        self.shm.close()
+        if borrar:
+            self.shm.unlink()
+
+
+# ============================================
+# PROCESOS
+# ============================================
+
+def proceso_captura(fuente, nombre_anillo, alto, ancho, espejo, parar):
+    """Lee una cámara (o vídeo) y escribe cada frame en su anillo"""
+    anillo = AnilloFrames(nombre_anillo, alto, ancho)
+    captura = cv2.VideoCapture(int(fuente) if fuente.isdigit() else fuente)
+    captura.set(3, ancho)
+    captura.set(4, alto)
+
+    # Un vídeo se reproduce a su velocidad; una cámara ya entrega a su ritmo
+    es_fichero = not fuente.isdigit()
+    intervalo = 1 / (captura.get(cv2.CAP_PROP_FPS) or 30) if es_fichero else 0
+    secuencia = 0
+    try:
+        while not parar.is_set():
+            inicio = time.monotonic()
+            success, img = captura.read()
+            if not success:
+                print(f"  ✗ Error: No se puede leer la fuente {fuente}")
+                break
+            if espejo:
+                img = cv2.flip(img, 1)
+            secuencia += 1
+            anillo.escribir(secuencia, int(inicio * 1000), img)
+            if intervalo:
+                time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+    finally:
+        captura.release()
+        anillo.cerrar()
+
+
+def proceso_detector(nombres_anillos, alto, ancho, tareas, resultados, ocupacion, indice):
+    """
+    Trabajador del grupo de detectores. Toma (cámara, secuencia), lee el frame del
+    anillo y devuelve las manos. Tiene un detector VIDEO por cámara para que los
+    timestamps de cada una sigan siendo crecientes. Mientras trabaja deja la tarea
+    en ocupacion[2 * indice:2 * indice + 2], para que el coordinador pueda liberarla
+    si el proceso muere.
+    """
+    anillos = [AnilloFrames(nombre, alto, ancho) for nombre in nombres_anillos]
+    detectores = {}
+    img = np.empty((alto, ancho, 3), dtype=np.uint8)
+    img_rgb = np.empty_like(img)
+    ultimo_timestamp = {}
+
+    try:
+        while True:
+            tarea = tareas.get()
+            if tarea is None:
+                break
+            camara, secuencia = tarea
+            ocupacion[2 * indice], ocupacion[2 * indice + 1] = camara, secuencia
+
+            leido = anillos[camara].leer(secuencia, img)
+            if leido is None:
+                resultados.put((camara, secuencia, None))
+                ocupacion[2 * indice] = -1
+                continue
+            _, timestamp_ms = leido
+
+            detector = detectores.get(camara)
+            if detector is None:
+                detector = detectores[camara] = calc.crear_detector("VIDEO")
+            timestamp_ms = max(timestamp_ms, ultimo_timestamp.get(camara, -1) + 1)
+            ultimo_timestamp[camara] = timestamp_ms
+
+            cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img_rgb)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+            detection_result = detector.detect_for_video(mp_image, timestamp_ms)
+            # Sin AlmacenManos: las manos se serializan después en el hilo de la cola
+            manos = calc.procesar_manos(detection_result, img, dibujar=False)
+            resultados.put((camara, secuencia, manos))
+            ocupacion[2 * indice] = -1
+    finally:
+        for detector in detectores.values():
+            detector.close()
+        for anillo in anillos:
+            anillo.cerrar()
+
+
+# ============================================
+# SALIDAS
+# ============================================
+
+class SalidaVentana:
+    """Muestra la calculadora de una cámara en su propia ventana"""
+
+    def __init__(self, camara):
+        self.titulo = f"Calculadora con Gestos - Camara {camara}"
+
+    def mostrar(self, img, estado):
+        cv2.imshow(self.titulo, img)
+
+    def cerrar(self):
+        cv2.destroyWindow(self.titulo)
+
+
+class SalidaJSONL:
+    """Escribe el estado de cada frame de una cámara en un fichero JSONL"""
+
+    def __init__(self, camara, directorio):
+        self.fichero = open(os.path.join(directorio, f"camara_{camara}.jsonl"), "w", encoding="utf-8")
+
+    def mostrar(self, img, estado):
+        self.fichero.write(json.dumps(estado, ensure_ascii=False) + "\n")
+
+    def cerrar(self):
+        self.fichero.close()
+
+
+# ============================================
+# COORDINADOR
+# ============================================
+
+class Estacion:
+    """Estado de una cámara: máquina de fases, últimas manos y salida"""
+
+    def __init__(self, camara, anillo, salida, en_vuelo_max):
+        self.camara = camara
+        self.anillo = anillo
+        self.salida = salida
+        # Solo la lógica de fases: la detección la hacen los procesos detectores
+        self.maquina = calc.MaquinaFases()
+        self.seguidor = calc.SeguidorManos()
+        # Secuencias enviadas a los detectores que aún no han vuelto
+        self.pendientes = set()
+        self.en_vuelo_max = en_vuelo_max
+        self.despachada = 0
+        self.mostrada = 0
+        self.ultimo_resultado = 0
+        self.manos = []
+        self.img = np.empty((anillo.alto, anillo.ancho, 3), dtype=np.uint8)
+
+
+def en_vuelo_por_defecto(trabajadores, camaras):
+    """Frames de una cámara que se detectan a la vez: su parte del grupo (con una cámara, todos los detectores)"""
+    return max(1, -(-trabajadores // camaras))
+
+
+def servir(fuentes, trabajadores=None, alto=720, ancho=1280, espejo=True, directorio_salida=None, en_vuelo_max=None):
+    """Arranca una captura por fuente y un grupo de detectores, y coordina las estaciones"""
+    if trabajadores is None:
+        # Un núcleo por captura; el resto para detectar
+        trabajadores = max(1, (os.cpu_count() or 2) - len(fuentes))
+    if en_vuelo_max is None:
+        en_vuelo_max = en_vuelo_por_defecto(trabajadores, len(fuentes))
+
+    contexto = mproc.get_context("spawn")
+    parar = contexto.Event()
+    tareas = contexto.Queue()
+    resultados = contexto.Queue()
+    # (cámara, secuencia) que tiene entre manos cada detector; cámara -1 = libre
+    ocupacion = contexto.Array("q", [-1] * (2 * trabajadores), lock=False)
+
+    anillos = [AnilloFrames(None, alto, ancho, crear=True) for _ in fuentes]
+    nombres = [anillo.nombre for anillo in anillos]
+
+    def lanzar_detector(indice):
+        proceso = contexto.Process(target=proceso_detector, daemon=True,
+                                   args=(nombres, alto, ancho, tareas, resultados, ocupacion, indice))
+        proceso.start()
+        return proceso
+
+    capturas = [contexto.Process(target=proceso_captura, args=(fuente, nombre, alto, ancho, espejo, parar), daemon=True)
+                for fuente, nombre in zip(fuentes, nombres)]
+    for proceso in capturas:
+        proceso.start()
+    detectores = [lanzar_detector(indice) for indice in range(trabajadores)]
+    reinicios = 0
+
+    estaciones = []
+    for camara, anillo in enumerate(anillos):
+        salida = SalidaJSONL(camara, directorio_salida) if directorio_salida else SalidaVentana(camara)
+        estaciones.append(Estacion(camara, anillo, salida, en_vuelo_max))
+
+    print(f"  ✓ {len(fuentes)} cámaras, {trabajadores} procesos detectores, "
+          f"hasta {en_vuelo_max} frames por cámara a la vez")
+    try:
+        while not parar.is_set():
+            # Un detector caído no devuelve su tarea: liberar su hueco y reponerlo
+            for indice, proceso in enumerate(detectores):
+                if proceso.is_alive():
+                    continue
+                camara = ocupacion[2 * indice]
+                if camara >= 0:
+                    estaciones[camara].pendientes.discard(ocupacion[2 * indice + 1])
+                    ocupacion[2 * indice] = -1
+                print(f"  ✗ El detector {indice} terminó (código {proceso.exitcode})")
+                if reinicios == MAX_REINICIOS_DETECTOR:
+                    print("  ✗ Los detectores terminan una y otra vez; se detiene el servicio")
+                    parar.set()
+                    break
+                reinicios += 1
+                detectores[indice] = lanzar_detector(indice)
+
+            # Despachar el frame más reciente de cada cámara con hueco libre
+            for estacion in estaciones:
+                ultima = estacion.anillo.ultima_secuencia()
+                if len(estacion.pendientes) < estacion.en_vuelo_max and ultima > estacion.despachada:
+                    tareas.put((estacion.camara, ultima))
+                    estacion.despachada = ultima
+                    estacion.pendientes.add(ultima)
+
+            # Recoger resultados; nunca retroceder a uno anterior
+            try:
+                while True:
+                    camara, secuencia, manos = resultados.get(timeout=0.005)
+                    estacion = estaciones[camara]
+                    estacion.pendientes.discard(secuencia)
+                    if manos is not None and secuencia > estacion.ultimo_resultado:
+                        estacion.ultimo_resultado = secuencia
+                        estacion.manos = estacion.seguidor.actualizar(manos, ancho)
+            except queue.Empty:
+                pass
+
+            # Dibujar y enviar a la salida el frame más reciente de cada cámara
+            for estacion in estaciones:
+                ultima = estacion.anillo.ultima_secuencia()
+                if ultima <= estacion.mostrada:
+                    continue
+                leido = estacion.anillo.leer(ultima, estacion.img)
+                if leido is None:
+                    continue
+                estacion.mostrada = ultima
+                img, timestamp_ms = leido
+
+                if directorio_salida:
+                    estado = estacion.maquina.procesar(calc.EventoManos(estacion.manos, timestamp_ms / 1000, ancho, alto))
+                    estado.update(camara=estacion.camara, frame=ultima,
+                                  dedos=[mano.dedos for mano in estacion.manos])
+                else:
+                    calc.dibujar_manos(img, [mano.landmarks for mano in estacion.manos])
+                    estado = estacion.maquina.procesar(calc.EventoManos(estacion.manos, time.time(), ancho, alto))
+                    calc.dibujar_fase(img, estado, estacion.maquina.zonas)
+                    if "seleccionada" in estado:
+                        nombre = calc.operaciones[estado["seleccionada"]]["nombre"]
+                        print(f"  ✓ Cámara {estacion.camara}: operación seleccionada: {nombre}")
+                estacion.salida.mostrar(img, estado)
+
+            if not directorio_salida:
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == ord('Q'):
+                    break
+                if key == ord('r') or key == ord('R'):
+                    for estacion in estaciones:
+                        estacion.maquina.reiniciar()
+            elif not any(p.is_alive() for p in capturas):
+                # Sin ventanas el servicio termina cuando se acaban las fuentes
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        parar.set()
+        for _ in range(trabajadores):
+            tareas.put(None)
+        for proceso in capturas + detectores:
+            proceso.join(timeout=2.0)
+            if proceso.is_alive():
+                proceso.terminate()
+        for estacion in estaciones:
+            estacion.salida.cerrar()
+        for anillo in anillos:
+            anillo.cerrar(borrar=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varias calculadoras con gestos, una por cámara")
+    parser.add_argument("fuentes", nargs="+", help="índices de cámara o rutas de vídeo")
+    parser.add_argument("-j", "--trabajadores", type=int, default=None,
+                        help="procesos detectores (por defecto, núcleos libres tras las capturas)")
+    parser.add_argument("--ancho", type=int, default=1280)
+    parser.add_argument("--alto", type=int, default=720)
+    parser.add_argument("--sin-espejo", action="store_true", help="no voltear los frames")
+    parser.add_argument("--salida", metavar="DIR", help="sin ventanas: escribir camara_N.jsonl en DIR")
+    parser.add_argument("--en-vuelo", type=int, default=None,
+                        help="frames de una misma cámara que se pueden detectar a la vez "
+                             "(por defecto, los detectores repartidos entre las cámaras)")
+    args = parser.parse_args(argv)
+
+    if args.salida:
+        os.makedirs(args.salida, exist_ok=True)
+    try:
+        calc.asegurar_modelo()
+    except RuntimeError as e:
+        print(f"  ✗ {e}")
+        return 1
+
+    servir(args.fuentes, args.trabajadores, args.alto, args.ancho, not args.sin_espejo, args.salida, args.en_vuelo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
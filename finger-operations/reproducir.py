@@ -0,0 +1,95 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║        CALCULADORA CON GESTOS - REPRODUCCIÓN DE GRABACIONES   ║
+║                                                               ║
+║  Pasa una grabación de landmarks (RUTA_GRABACION) por el      ║
+║  conteo de dedos, el seguimiento y la máquina de fases sin    ║
+║  cámara ni detector, tan rápido como dé la CPU, con los       ║
+║  timestamps grabados. Escribe un JSON por detección (JSONL)   ║
+║                                                               ║
+║  Uso: python reproducir.py sesion.npy -o sesion.jsonl         ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+import calculadora_dedos as calc
+from grabacion import cargar_grabacion, iterar_detecciones
+
+# Lo mínimo de un HandLandmarkerResult que lee procesar_manos
+ResultadoGrabado = namedtuple("ResultadoGrabado", "hand_landmarks handedness")
+CategoriaGrabada = namedtuple("CategoriaGrabada", "category_name score")
+
+
+def resultado_grabado(filas):
+    """Reconstruye el resultado del detector de una detección grabada"""
+    handedness = [
+        [CategoriaGrabada("Right" if derecha else "Left", puntuacion)]
+        for derecha, puntuacion in zip(filas["derecha"].tolist(), filas["puntuacion"].tolist())
+    ]
+    return ResultadoGrabado(filas["landmarks"], handedness)
+
+
+def reproducir(ruta):
+    """
+    Genera un dict por detección grabada, como calculadora_lote.procesar_fuente.
+    El estado de la sesión (fase, operación, seguimiento) avanza con el tiempo
+    grabado, así que el resultado es el mismo en cada reproducción.
+    """
+    maquina = calc.MaquinaFases()
+    almacen = calc.AlmacenManos()
+    seguidor = calc.SeguidorManos()
+
+    for frame, timestamp_ms, ancho, alto, filas in iterar_detecciones(cargar_grabacion(ruta)):
+        # Los landmarks se grabaron ya en coordenadas del frame completo
+        region = calc.RegionDeteccion(0, 0, ancho, alto, ancho, alto)
+        manos = calc.procesar_manos(resultado_grabado(filas), None, dibujar=False, region=region,
+                                    almacen=almacen)
+        manos = seguidor.actualizar(manos, ancho)
+
+        num_izq, num_der = calc.clasificar_manos_por_posicion(manos, ancho)
+        estado = maquina.procesar(calc.EventoManos(manos, timestamp_ms / 1000, ancho, alto))
+
+        yield {
+            "frame": frame,
+            "timestamp_ms": timestamp_ms,
+            "manos": len(manos),
+            "dedos": [mano.dedos if mano.dedos_frame is None else mano.dedos_frame for mano in manos],
+            "dedos_votados": [mano.dedos for mano in manos],
+            "izquierda": num_izq,
+            "derecha": num_der,
+            "fase": estado["fase"],
+            "operacion": estado["operacion"],
+            "resultado": estado.get("resultado"),
+            "sumas": estado.get("sumas"),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una grabación de landmarks: escribe un JSON por detección")
+    parser.add_argument("grabacion", help="fichero .npy grabado con RUTA_GRABACION")
+    parser.add_argument("-o", "--salida", default="-", help="fichero JSONL de salida (por defecto la salida estándar)")
+    args = parser.parse_args(argv)
+
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    inicio = time.perf_counter()
+    detecciones = 0
+    try:
+        for registro in reproducir(args.grabacion):
+            salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            detecciones += 1
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    segundos = time.perf_counter() - inicio
+    print(f"  ✓ {detecciones} detecciones en {segundos:.2f} s ({detecciones / max(segundos, 1e-9):.0f}/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Vista previa remota de la calculadora por HTTP, para estaciones sin monitor.
+
+- /              página con la vista previa
+- /stream.mjpg   frames anotados en MJPEG (multipart/x-mixed-replace)
+- /estado.json   último estado de la calculadora
+
+El bucle principal solo copia el frame a una ranura que guarda el más reciente;
+un hilo lo codifica a JPEG y todos los clientes comparten ese JPEG, así que un
+cliente lento o varios a la vez nunca frenan la detección. Sin clientes de MJPEG
+no se copia ni se codifica nada y no se guarda el último JPEG; el resumen de manos
+de /estado.json solo se arma mientras alguien lo consulta.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+PAGINA = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Calculadora con Gestos</title></head>
+<body style="margin:0;background:#111;color:#eee;font-family:sans-serif;text-align:center">
+<img src="/stream.mjpg" style="max-width:100%">
+<pre id="estado"></pre>
+<script>
+setInterval(() => fetch("/estado.json").then(r => r.json())
+  .then(e => document.getElementById("estado").textContent = JSON.stringify(e, null, 1)), 500);
+</script>
+</body></html>
+"""
+
+# Segundos sin consultas a /estado.json tras los que se deja de resumir cada frame
+ESPERA_ESTADO = 2.0
+
+
+class ServidorVista:
+    """Servidor HTTP de la vista previa con un hilo de codificación JPEG"""
+
+    def __init__(self, host="127.0.0.1", puerto=8080, calidad=80):
+        self.host = host
+        self.puerto = puerto
+        self.calidad = calidad
+
+        # Ranura del frame más reciente y buffer que está codificando el hilo
+        self.cerrojo_frame = threading.Lock()
+        self.hay_frame = threading.Condition(self.cerrojo_frame)
+        self.pendiente = None
+        self.codificando = None
+        self.nuevo = False
+
+        # Último JPEG, compartido por todos los clientes
+        self.hay_jpeg = threading.Condition()
+        self.jpeg = None
+        self.secuencia = 0
+        self.codificados = 0
+
+        self.estado = {}
+        self.ultima_consulta = float("-inf")
+        self.cerrojo_clientes = threading.Lock()
+        self.clientes = 0
+
+        self.activo = False
+        self.servidor = None
+        self.hilos = []
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.puerto}/"
+
+    def iniciar(self):
+        """Abre el puerto y arranca los hilos del servidor y del codificador"""
+        self.servidor = ThreadingHTTPServer((self.host, self.puerto), ManejadorVista)
+        self.servidor.daemon_threads = True
+        self.servidor.vista = self
+        # Con puerto 0 el sistema elige uno libre
+        self.puerto = self.servidor.server_address[1]
+        self.activo = True
+
+        self.hilos = [
+            threading.Thread(target=self.servidor.serve_forever, daemon=True),
+            threading.Thread(target=self.codificar, daemon=True),
+        ]
+        for hilo in self.hilos:
+            hilo.start()
+
+    def cerrar(self):
+        if not self.activo:
+            return
+        self.activo = False
+        with self.hay_frame:
+            self.hay_frame.notify_all()
+        with self.hay_jpeg:
+            self.hay_jpeg.notify_all()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        for hilo in self.hilos:
+            hilo.join(timeout=1.0)
+
+    def publicar(self, img, estado=None, manos=None):
+        """
+        Publica el frame anotado y el estado del frame; no bloquea mientras se codifica.
+        El resumen de manos se añade al estado solo si alguien consulta /estado.json.
+        """
+        if estado is not None:
+            if manos is not None and time.monotonic() - self.ultima_consulta < ESPERA_ESTADO:
+                estado = dict(estado, manos=[{"id": mano.id, "lado": mano.handedness, "dedos": mano.dedos}
+                                             for mano in manos])
+            self.estado = estado
+        if self.clientes == 0:
+            return
+
+        with self.hay_frame:
+            if self.pendiente is None or self.pendiente.shape != img.shape:
+                self.pendiente = np.empty_like(img)
+            np.copyto(self.pendiente, img)
+            self.nuevo = True
+            self.hay_frame.notify()
+
+    def codificar(self):
+        """Hilo codificador: JPEG del frame más reciente; los intermedios se descartan"""
+        while True:
+            with self.hay_frame:
+                while self.activo and not self.nuevo:
+                    self.hay_frame.wait()
+                if not self.activo:
+                    return
+                # Intercambiar buffers: el bucle principal sigue escribiendo en el otro
+                self.pendiente, self.codificando = self.codificando, self.pendiente
+                self.nuevo = False
+
+            success, jpeg = cv2.imencode(".jpg", self.codificando, [cv2.IMWRITE_JPEG_QUALITY, self.calidad])
+            if success:
+                with self.hay_jpeg:
+                    # El último cliente se fue mientras se codificaba: no guardar el JPEG
+                    if self.clientes == 0:
+                        continue
+                    self.jpeg = jpeg.tobytes()
+                    self.secuencia += 1
+                    self.codificados += 1
+                    self.hay_jpeg.notify_all()
+
+    def esperar_jpeg(self, ultima, timeout=1.0):
+        """Espera un JPEG más nuevo que la secuencia ultima; devuelve (secuencia, jpeg)"""
+        with self.hay_jpeg:
+            self.hay_jpeg.wait_for(lambda: (self.secuencia > ultima and self.jpeg is not None) or not self.activo,
+                                   timeout)
+            return self.secuencia, self.jpeg
+
+    def cambiar_clientes(self, cambio):
+        with self.cerrojo_clientes:
+            self.clientes += cambio
+            if self.clientes == 0:
+                # Sin clientes no se guarda un JPEG viejo que el siguiente vería congelado
+                with self.hay_frame:
+                    self.nuevo = False
+                with self.hay_jpeg:
+                    self.jpeg = None
+
+
+class ManejadorVista(BaseHTTPRequestHandler):
+    """Atiende las peticiones de un cliente de la vista previa"""
+
+    def do_GET(self):
+        vista = self.server.vista
+        ruta = self.path.split("?")[0]
+
+        if ruta == "/":
+            self.responder(200, "text/html; charset=utf-8", PAGINA)
+        elif ruta == "/estado.json":
+            vista.ultima_consulta = time.monotonic()
+            cuerpo = json.dumps(vista.estado, ensure_ascii=False, default=str).encode("utf-8")
+            self.responder(200, "application/json; charset=utf-8", cuerpo)
+        elif ruta == "/stream.mjpg":
+            self.servir_mjpeg(vista)
+        else:
+            self.responder(404, "text/plain; charset=utf-8", b"No encontrado\n")
+
+    def responder(self, codigo, tipo, cuerpo):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def servir_mjpeg(self, vista):
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        vista.cambiar_clientes(1)
+        ultima = 0
+        try:
+            while vista.activo:
+                secuencia, jpeg = vista.esperar_jpeg(ultima)
+                if secuencia <= ultima or jpeg is None:
+                    continue
+                ultima = secuencia
+                self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            vista.cambiar_clientes(-1)
+
+    def log_message(self, formato, *args):
+        # Sin una línea por petición en la consola de la calculadora
+        pass
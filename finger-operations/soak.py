@@ -0,0 +1,184 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║        CALCULADORA CON GESTOS - PRUEBA DE RESISTENCIA         ║
+║                                                               ║
+║  Simula horas de sesión en unos minutos: resultados del       ║
+║  detector sintéticos (fixtures con ruido) pasan por el        ║
+║  conteo, el seguimiento, la extrapolación y la máquina de     ║
+║  fases con el tiempo acelerado. Toma muestras con tracemalloc ║
+║  y falla si la memoria no se mantiene plana.                  ║
+║                                                               ║
+║  Uso: python soak.py --horas 4 --fps 30                       ║
+╚═══════════════════════════════════════════════════════════════╝
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import calculadora_dedos as calc
+from benchmark import RUTA_FIXTURES, generar_fixtures
+from reproducir import CategoriaGrabada, ResultadoGrabado
+
+# Manos en escena en cada tramo del guion; se repite durante toda la prueba
+GUION_MANOS = (0, 1, 2, 5, 2, 20, 1)
+SEGUNDOS_TRAMO = 2.0
+
+
+def cargar_escenas(ruta=RUTA_FIXTURES):
+    """Landmarks (n, 21, 3) y lados de cada número de manos del guion"""
+    if not os.path.exists(ruta):
+        generar_fixtures(ruta)
+    escenas = {0: (np.zeros((0, 21, 3)), [])}
+    with np.load(ruta) as datos:
+        for n in set(GUION_MANOS) - {0}:
+            landmarks = datos[f"landmarks_{n}"].astype(np.float64)
+            lados = ["Right" if d else "Left" for d in datos[f"derecha_{n}"].tolist()]
+            escenas[n] = (landmarks, lados)
+    return escenas
+
+
+def simular(frames, fps, cadencia, dibujar, al_muestrear, cada, semilla=0):
+    """
+    Ejecuta frames del bucle secuencial sin cámara ni detector, con el reloj
+    simulado a fps. Cada `cada` frames llama a al_muestrear(frame, segundos_simulados).
+    """
+    ancho, alto = 1280, 720
+    region = calc.RegionDeteccion(0, 0, ancho, alto, ancho, alto)
+    rng = np.random.default_rng(semilla)
+    escenas = cargar_escenas()
+    categorias = {n: [[CategoriaGrabada(lado, 0.99)] for lado in lados] for n, (_, lados) in escenas.items()}
+
+    app = calc.CalculadoraApp(instrumentacion=True)
+    # Sin imagen no hay movimiento que medir: solo se salta por cadencia
+    app.planificador.activo = False
+    app.planificador.cadencia = cadencia
+    img = np.zeros((alto, ancho, 3), dtype=np.uint8) if dibujar else None
+    # Deriva lenta de cada mano más temblor por frame, como una mano real delante de la cámara
+    deriva = np.zeros((max(GUION_MANOS), 1, 3))
+    tramo_anterior = -1
+
+    for frame in range(frames):
+        ahora = frame / fps
+        tramo = int(ahora / SEGUNDOS_TRAMO)
+        if tramo != tramo_anterior:
+            tramo_anterior = tramo
+            if tramo % len(GUION_MANOS) == 0:
+                # Cada vuelta al guion empieza una operación nueva
+                app.maquina.procesar(calc.EventoTecla("r", ahora))
+        n = GUION_MANOS[tramo % len(GUION_MANOS)]
+
+        cronometro = app.metricas.cronometro()
+        if app.planificador.debe_detectar(img):
+            base, _ = escenas[n]
+            deriva[:n] = np.clip(deriva[:n] + rng.normal(0, 0.001, (n, 1, 3)), -0.05, 0.05)
+            landmarks = base + deriva[:n] + rng.normal(0, 0.002, base.shape)
+            resultado = ResultadoGrabado(landmarks, categorias[n])
+            cronometro.marcar("preparar")
+
+            manos = calc.procesar_manos(resultado, None, dibujar=False, region=region, almacen=app.almacen)
+            manos = app.seguidor.actualizar(manos, ancho)
+            app.entrada.actualizar(manos, ancho, alto)
+            app.planificador.registrar(manos, ahora)
+            cronometro.marcar("conteo")
+        else:
+            manos = app.planificador.estimar(ahora, ancho, alto)
+            cronometro.marcar("estimacion")
+
+        estado = app.avanzar_fase(manos, ahora, ancho, alto)
+        if dibujar:
+            img[:] = 0
+            calc.dibujar_manos(img, [mano.landmarks for mano in manos], app.antialias, app.puntos_manos)
+            calc.dibujar_fase(img, estado, app.zonas)
+        cronometro.marcar("dibujo")
+        app.metricas.marcar_frame()
+
+        if (frame + 1) % cada == 0:
+            al_muestrear(frame + 1, ahora)
+
+    app.cerrar()
+
+
+def medir_memoria(frames, fps, cadencia=2, dibujar=False, muestras=20, calentamiento=0.25, informar=print):
+    """
+    Simula frames y toma `muestras` medidas de tracemalloc repartidas tras el calentamiento.
+    Devuelve (bytes, horas, snapshot_inicial, snapshot_final): bytes en uso y horas
+    simuladas de cada muestra; la primera es la referencia.
+    """
+    cada = max(frames // (muestras + 1), 1)
+    valores = []
+    horas = []
+    inicio = {}
+
+    def al_muestrear(frame, segundos):
+        if frame < frames * calentamiento:
+            return
+        gc.collect()
+        if not inicio:
+            # La primera muestra tras el calentamiento es la referencia
+            tracemalloc.start()
+            inicio["snapshot"] = tracemalloc.take_snapshot()
+        actual = tracemalloc.get_traced_memory()[0]
+        valores.append(actual)
+        horas.append(segundos / 3600)
+        informar(f"  {segundos / 3600:6.2f} h simuladas  {frame:>9} frames  {actual / 1024:9.1f} KiB")
+
+    try:
+        simular(frames, fps, cadencia, dibujar, al_muestrear, cada)
+        gc.collect()
+        final = tracemalloc.take_snapshot() if inicio else None
+    finally:
+        tracemalloc.stop()
+    return valores, horas, inicio.get("snapshot"), final
+
+
+def crecimiento_memoria(valores):
+    """Crecimiento desde la referencia hasta el máximo posterior: un pico al final también es una fuga"""
+    return max(valores[1:]) - valores[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de resistencia: la memoria debe mantenerse plana en sesiones largas")
+    parser.add_argument("--horas", type=float, default=2.0, help="horas de sesión simuladas")
+    parser.add_argument("--fps", type=float, default=30.0, help="frames por segundo simulados")
+    parser.add_argument("--cadencia", type=int, default=2, help="detectar uno de cada n frames (el resto se extrapola)")
+    parser.add_argument("--dibujar", action="store_true", help="dibujar también manos e interfaz (más lento)")
+    parser.add_argument("--muestras", type=int, default=20, help="muestras de memoria a lo largo de la prueba")
+    parser.add_argument("--calentamiento", type=float, default=0.25,
+                        help="fracción inicial sin medir: deja llenarse las cachés acotadas (sprites, capas)")
+    parser.add_argument("--tolerancia", type=float, default=256, help="crecimiento permitido en KiB")
+    parser.add_argument("--top", type=int, default=10, help="líneas que más crecen a mostrar si falla")
+    args = parser.parse_args(argv)
+
+    frames = int(args.horas * 3600 * args.fps)
+    print(f"  Simulando {args.horas:g} h a {args.fps:g} FPS ({frames} frames)...")
+    reloj = time.perf_counter()
+    muestras, horas, inicial, final = medir_memoria(frames, args.fps, args.cadencia, args.dibujar,
+                                                    args.muestras, args.calentamiento)
+    segundos = time.perf_counter() - reloj
+    print(f"  ✓ {frames} frames en {segundos:.1f} s ({frames / max(segundos, 1e-9):.0f} frames/s)")
+
+    if len(muestras) < 2:
+        print("  ✗ Muy pocas muestras: sube --horas o --muestras")
+        return 1
+
+    crecimiento = crecimiento_memoria(muestras)
+    # La referencia se toma nada más arrancar tracemalloc, sin los objetos de un frame en curso
+    tendencia = np.polyfit(horas[1:], muestras[1:], 1)[0] / 1024 if len(muestras) > 2 else 0.0
+    print(f"\n  Tendencia: {tendencia:+.1f} KiB por hora simulada")
+    if crecimiento > args.tolerancia * 1024:
+        print(f"  ✗ La memoria crece {crecimiento / 1024:.1f} KiB (tolerancia {args.tolerancia:g} KiB). Lo que más crece:")
+        for diferencia in final.compare_to(inicial, "lineno")[:args.top]:
+            print(f"    {diferencia}")
+        return 1
+    print(f"  ✓ Memoria plana: {crecimiento / 1024:+.1f} KiB en {len(muestras)} muestras "
+          f"(tolerancia {args.tolerancia:g} KiB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
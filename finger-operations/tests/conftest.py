@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del proyecto están en la carpeta padre, junto a benchmark.py y soak.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,117 @@
+"""AutoAjuste baja de perfil al calibrar, aplica histéresis después y el perfil llega al detector"""
+
+import time
+
+import mediapipe as mp
+import numpy as np
+import pytest
+
+import benchmark
+import calculadora_dedos as calc
+from metricas import Metricas
+
+PERFILES = calc.PERFILES_CALIDAD
+
+
+@pytest.fixture
+def ajuste():
+    return calc.AutoAjuste(PERFILES, fps_objetivo=24.0, calibracion=3.0, intervalo=1.0, persistencia=3)
+
+
+@pytest.fixture
+def metricas():
+    return Metricas(activa=True)
+
+
+def ventana(ajuste, metricas, ahora, fps, frames=10):
+    """Registra una ventana de frames a fps y la evalúa en el instante ahora"""
+    for _ in range(frames):
+        metricas.frames.agregar(1 / fps)
+    return ajuste.evaluar(metricas, ahora)
+
+
+def test_calibracion_baja_en_cada_ventana_lenta(ajuste, metricas):
+    assert ventana(ajuste, metricas, 0.0, 10) is None
+    assert ventana(ajuste, metricas, 1.0, 10) is PERFILES[1]
+    # La ventana tras un cambio mezcla dos perfiles: se descarta
+    assert ventana(ajuste, metricas, 1.25, 10) is None
+    assert ventana(ajuste, metricas, 1.5, 10) is PERFILES[2]
+    assert ajuste.ultima_medida[0] == pytest.approx(10)
+
+
+def test_pocos_frames_no_cuentan(ajuste, metricas):
+    ventana(ajuste, metricas, 0.0, 10)
+    assert ventana(ajuste, metricas, 1.0, 10, frames=2) is None
+    assert ajuste.indice == 0
+
+
+def test_histeresis_tras_calibrar(ajuste, metricas):
+    ventana(ajuste, metricas, 0.0, 24)
+    assert ventana(ajuste, metricas, 10.0, 24) is None
+
+    # Baja tras tres ventanas seguidas por debajo; una en la banda reinicia la cuenta
+    assert ventana(ajuste, metricas, 11.0, 10) is None
+    assert ventana(ajuste, metricas, 12.0, 24) is None
+    assert [ventana(ajuste, metricas, t, 10) for t in (13.0, 14.0, 15.0)] == [None, None, PERFILES[1]]
+    assert ventana(ajuste, metricas, 16.0, 50) is None
+
+    # Sube tras tres ventanas con holgura
+    assert [ventana(ajuste, metricas, t, 50) for t in (17.0, 18.0, 19.0)] == [None, None, PERFILES[0]]
+
+
+def test_volver_a_un_perfil_que_fallo_cuesta_el_doble(ajuste, metricas):
+    ventana(ajuste, metricas, 0.0, 24)
+    ventana(ajuste, metricas, 10.0, 10)
+    ventana(ajuste, metricas, 11.0, 10)
+    assert ventana(ajuste, metricas, 12.0, 10) is PERFILES[1]
+    ventana(ajuste, metricas, 13.0, 50)
+    assert [ventana(ajuste, metricas, t, 50) for t in (14.0, 15.0, 16.0)][-1] is PERFILES[0]
+
+    # Falla poco después de subir
+    ventana(ajuste, metricas, 17.0, 10)
+    assert [ventana(ajuste, metricas, t, 10) for t in (18.0, 19.0, 20.0)][-1] is PERFILES[1]
+    ventana(ajuste, metricas, 21.0, 50)
+
+    subidas = [ventana(ajuste, metricas, 22.0 + i, 50) for i in range(6)]
+    assert subidas == [None] * 5 + [PERFILES[0]]
+
+
+def test_aplicar_perfil_en_el_calculo(monkeypatch):
+    monkeypatch.setattr(calc, "DETECTOR_POR_FASE", True)
+    app = calc.CalculadoraApp()
+    preparados = []
+    monkeypatch.setattr(app, "preparar_detector", preparados.append)
+    app.fase_detector = "calculo"
+    app.entrada.resolucion = app.config_fases["calculo"]["resolucion"]
+    seleccion = dict(app.config_fases["seleccion"])
+
+    perfil = PERFILES[1]
+    app.aplicar_perfil(perfil)
+
+    assert app.config_fases["calculo"]["resolucion"] == perfil["resolucion"]
+    assert app.config_fases["seleccion"] == seleccion
+    assert app.entrada.resolucion == perfil["resolucion"]
+    assert app.planificador.cadencia == perfil["cadencia"]
+    assert (app.antialias, app.puntos_manos) == (perfil["antialias"], perfil["puntos"])
+    limite = time.monotonic() + 5
+    while not preparados:
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+    assert preparados == [("calculo",)]
+    assert app.config_fases["calculo"]["max_manos"] == perfil["max_manos"]
+
+
+def test_imagen_del_detector_tras_bajar_de_perfil():
+    frame = benchmark.frame_sintetico(1280, 720, semilla=3)
+    app = calc.CalculadoraApp()
+    app.entrada.reutilizar = True
+    app.fase_detector = "calculo"
+    app.entrada.resolucion = None
+    app.entrada.preparar(benchmark.frame_sintetico(1280, 720))
+
+    app.aplicar_perfil(dict(PERFILES[1], max_manos=app.config_fases["calculo"]["max_manos"]))
+    img_rgb, _ = app.entrada.preparar(frame)
+
+    esperada, _ = calc.EntradaDetector(resolucion=PERFILES[1]["resolucion"]).preparar(frame)
+    imagen = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+    np.testing.assert_array_equal(imagen.numpy_view(), esperada)
@@ -0,0 +1,60 @@
+"""El calentamiento usa el tamaño real del detector y su resultado nunca llega como una detección"""
+
+import cv2
+import pytest
+
+import calculadora_dedos as calc
+
+
+class DetectorFalso:
+    def __init__(self, modo, result_callback=None, num_manos=calc.NUM_MANOS, confianza=calc.CONFIANZA_DETECCION):
+        self.callback = result_callback
+        self.llamadas = []
+
+    def detect_for_video(self, imagen, timestamp_ms):
+        self.llamadas.append((imagen.width, imagen.height, timestamp_ms))
+
+    def detect_async(self, imagen, timestamp_ms):
+        self.llamadas.append((imagen.width, imagen.height, timestamp_ms))
+
+    def close(self):
+        pass
+
+
+class CamaraFalsa:
+    def get(self, propiedad):
+        return {cv2.CAP_PROP_FRAME_WIDTH: 1920, cv2.CAP_PROP_FRAME_HEIGHT: 1080}.get(propiedad, 0)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(calc, "crear_detector", DetectorFalso)
+    monkeypatch.setattr(calc, "abrir_camara", CamaraFalsa)
+    monkeypatch.setattr(calc, "GRABAR_VIDEO", False)
+
+    def crear(modo):
+        app = calc.CalculadoraApp(modo_deteccion=modo)
+        app.config_fases["seleccion"]["resolucion"] = (640, 360)
+        app.config_fases["calculo"]["resolucion"] = None
+        app.iniciar()
+        return app
+    return crear
+
+
+def test_cada_detector_se_calienta_a_su_resolucion(app):
+    app = app("VIDEO")
+    seleccion, calculo = app.detectores["seleccion"], app.detectores["calculo"]
+    assert [llamada[:2] for llamada in seleccion.llamadas] == [(640, 360)]
+    assert [llamada[:2] for llamada in calculo.llamadas] == [(1920, 1080)]
+    # Misma secuencia de timestamps que las detecciones reales
+    assert app.ultimo_timestamp_ms == max(seleccion.llamadas[0][2], calculo.llamadas[0][2])
+
+
+def test_resultado_tardio_del_calentamiento_se_descarta(app):
+    app = app("LIVE_STREAM")
+    detector = app.detectores["seleccion"]
+    timestamp_ms = detector.llamadas[0][2]
+    # En LIVE_STREAM el resultado del calentamiento llega por callback cuando ya ha arrancado
+    detector.callback(None, None, timestamp_ms)
+    assert app.cola_resultados.empty()
+    assert timestamp_ms not in app.timestamps_calentamiento
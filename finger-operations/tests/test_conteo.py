@@ -0,0 +1,28 @@
+"""contar_dedos_lote da exactamente el mismo conteo que contar_dedos mano a mano"""
+
+import numpy as np
+import pytest
+
+import benchmark
+import calculadora_dedos as calc
+
+
+@pytest.mark.parametrize("n", benchmark.NUMEROS_MANOS)
+@pytest.mark.parametrize("ancho, alto", benchmark.RESOLUCIONES)
+def test_lote_igual_que_por_mano(n, ancho, alto):
+    resultado = benchmark.cargar_fixture(n)
+    landmarks = calc.landmarks_a_array(resultado.hand_landmarks)
+    es_derecha = np.array([lado[0].category_name == "Right" for lado in resultado.handedness])
+
+    levantados, totales = calc.contar_dedos_lote(landmarks, es_derecha, ancho, alto)
+
+    esperados = [calc.contar_dedos(mano, lado[0].category_name, ancho, alto)
+                 for mano, lado in zip(resultado.hand_landmarks, resultado.handedness)]
+    assert totales.tolist() == esperados
+    np.testing.assert_array_equal(levantados.sum(axis=1), totales)
+
+
+def test_lote_sin_manos():
+    levantados, totales = calc.contar_dedos_lote(np.zeros((0, 21, 3)), np.zeros(0, dtype=bool), 640, 480)
+    assert levantados.shape == (0, 5)
+    assert totales.shape == (0,)
@@ -0,0 +1,135 @@
+"""El dibujo por lotes pinta lo mismo que cv2.circle uno a uno, y las capas de interfaz en caché lo mismo que el dibujo directo"""
+
+import cv2
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+
+
+def puntos_referencia(img, puntos):
+    """Los puntos de la versión original: dos cv2.circle por landmark"""
+    for i, punto in enumerate(puntos):
+        if i in calc.TIP_IDS:
+            cv2.circle(img, punto, 10, calc.COLORES["error"], -1)
+            cv2.circle(img, punto, 10, (255, 255, 255), 2)
+        else:
+            cv2.circle(img, punto, 6, calc.COLORES["secundario"], -1)
+            cv2.circle(img, punto, 6, (255, 255, 255), 1)
+
+
+def mano_abierta(cx, cy, escala):
+    """Landmarks normalizados (21, 3) de una mano abierta sin puntos que se toquen"""
+    angulos = np.deg2rad([-60, -25, 0, 25, 50])
+    puntos = [(0.0, 0.0)]
+    for angulo in angulos:
+        for paso in range(1, 5):
+            puntos.append((np.sin(angulo) * paso, -np.cos(angulo) * paso))
+    puntos = np.array(puntos) * escala + (cx, cy)
+    return np.hstack([puntos, np.zeros((21, 1))])
+
+
+@pytest.mark.parametrize("ancho, alto", [(640, 480), (1280, 720)])
+def test_puntos_iguales_que_cv2_circle(ancho, alto):
+    manos = [mano_abierta(0.25, 0.75, 0.06), mano_abierta(0.75, 0.7, 0.07)]
+    lotes = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    calc.dibujar_manos(lotes, manos)
+
+    # Mismo esqueleto por lotes y, encima, los puntos como antes
+    referencia = np.zeros_like(lotes)
+    calc.dibujar_manos(referencia, manos, puntos_manos=False)
+    for mano in manos:
+        puntos_referencia(referencia, [tuple(p) for p in (mano[:, :2] * (ancho, alto)).astype(np.int32).tolist()])
+
+    # Solo se comparan los puntos: las esquinas del recuadro quedan a 25 px
+    zona = np.zeros((alto, ancho), dtype=np.uint8)
+    for mano in manos:
+        for punto in (mano[:, :2] * (ancho, alto)).astype(np.int32).tolist():
+            cv2.circle(zona, tuple(punto), 12, 1, -1)
+    distintos = (lotes != referencia).any(axis=2) & (zona > 0)
+    assert not distintos.any()
+
+
+def test_anillo_de_punta_en_cualquier_posicion():
+    # Las cinco puntas en el mismo píxel y las articulaciones fuera de la imagen,
+    # también con la punta cortada por el borde
+    rng = np.random.default_rng(0)
+    for punto in rng.integers(-12, 140, (200, 2)).tolist():
+        landmarks = np.full((1, 21, 3), -1.0)
+        landmarks[0, calc.ES_PUNTA, :2] = np.array(punto) / 128
+        lotes = np.zeros((128, 128, 3), dtype=np.uint8)
+        calc.dibujar_manos(lotes, landmarks)
+
+        referencia = np.zeros_like(lotes)
+        calc.dibujar_manos(referencia, landmarks, puntos_manos=False)
+        cv2.circle(referencia, tuple(punto), 10, calc.COLORES["error"], -1)
+        cv2.circle(referencia, tuple(punto), 10, (255, 255, 255), 2)
+        zona = np.zeros((128, 128), dtype=np.uint8)
+        cv2.circle(zona, tuple(punto), 12, 1, -1)
+        assert not ((lotes != referencia).any(axis=2) & (zona > 0)).any()
+
+
+# Capas estáticas con su función de dibujo directo y argumentos
+CAPAS = {
+    "menu": (calc.dibujar_menu, ()),
+    "aviso": (calc.dibujar_aviso, calc.AVISOS["levanta"]),
+    "confirmacion": (calc.dibujar_confirmacion_fondo, (2,)),
+    "calculo": (calc.dibujar_pantalla_calculo_fondo, (3,)),
+    "zonas": (calc.dibujar_pantalla_zonas_fondo,
+              (1, calc.DistribucionZonas([(0, 0, .5, .5), (.5, 0, 1, .5), (0, .5, .5, 1), (.5, .5, 1, 1)]))),
+}
+
+
+@pytest.fixture
+def capas_vacias(monkeypatch):
+    monkeypatch.setattr(calc, "CACHE_UI", True)
+    monkeypatch.setattr(calc, "capas_ui", {})
+    monkeypatch.setattr(calc, "tamano_capas_ui", None)
+
+
+@pytest.mark.parametrize("ancho, alto", [(640, 480), (641, 481), (1280, 720)])
+@pytest.mark.parametrize("nombre", CAPAS)
+def test_capa_en_cache_igual_que_dibujo_directo(capas_vacias, nombre, ancho, alto):
+    dibujar, args = CAPAS[nombre]
+    fondo = np.random.default_rng(0).integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+    directo = fondo.copy()
+    dibujar(directo, *args)
+
+    # Dos frames: el que crea la capa y uno que la reutiliza
+    for _ in range(2):
+        compuesto = fondo.copy()
+        calc.componer_capa(compuesto, (nombre,), dibujar, *args)
+        diferencia = np.abs(compuesto.astype(np.int16) - directo)
+        # Los paneles semitransparentes redondean en cada mezcla del dibujo directo
+        # y una sola vez en la capa: como mucho unas unidades, y casi nunca más de una
+        assert diferencia.max() <= 3
+        assert (diferencia > 1).mean() < 0.001
+
+    # Fuera de lo que cubre la capa el frame queda intacto
+    _, inversa = calc.pre_renderizar(alto, ancho, lambda lienzo: dibujar(lienzo, *args))
+    libre = (inversa == 255).all(axis=2)
+    assert np.array_equal(compuesto[libre], fondo[libre])
+
+
+@pytest.mark.parametrize("nombre", CAPAS)
+def test_capa_opaca_exacta_sobre_negro_y_blanco(capas_vacias, nombre):
+    # Sobre fondo liso la capa es justo lo que se pre-renderizó
+    dibujar, args = CAPAS[nombre]
+    for valor in (0, 255):
+        directo = np.full((480, 640, 3), valor, dtype=np.uint8)
+        dibujar(directo, *args)
+        compuesto = np.full_like(directo, valor)
+        calc.componer_capa(compuesto, (nombre,), dibujar, *args)
+        assert np.abs(compuesto.astype(np.int16) - directo).max() <= 1
+
+
+def test_cambio_de_resolucion_renueva_las_capas(capas_vacias):
+    dibujar, args = CAPAS["menu"]
+    calc.componer_capa(np.zeros((480, 640, 3), dtype=np.uint8), ("menu",), dibujar, *args)
+    capa = calc.capas_ui[("menu",)]
+    grande = np.zeros((720, 1280, 3), dtype=np.uint8)
+    calc.componer_capa(grande, ("menu",), dibujar, *args)
+    assert calc.capas_ui[("menu",)] is not capa and calc.tamano_capas_ui == (720, 1280)
+    directo = np.zeros_like(grande)
+    dibujar(directo, *args)
+    assert np.abs(grande.astype(np.int16) - directo).max() <= 1
@@ -0,0 +1,93 @@
+"""La imagen que prepara EntradaDetector con buffers reutilizados es la misma que sin reutilizar"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.components.containers import category, landmark
+
+import benchmark
+import calculadora_dedos as calc
+from metricas import ContadorAsignaciones
+
+
+def imagen_detector(img_rgb):
+    """Lo que recibe el detector: mp.Image copia los píxeles sin mirar el paso entre filas"""
+    imagen = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+    # numpy_view apunta a la memoria del mp.Image: copiarla antes de soltarlo
+    return imagen.numpy_view().copy()
+
+
+def test_reducir_tras_un_frame_mayor():
+    grande = benchmark.frame_sintetico(1280, 720, semilla=1)
+    frame = benchmark.frame_sintetico(1280, 720, semilla=2)
+
+    entrada = calc.EntradaDetector(resolucion=None, reutilizar=True)
+    entrada.preparar(grande)
+    # Como al volver a la selección tras R: su detector usa una resolución menor
+    entrada.resolucion = (640, 360)
+    img_rgb, region = entrada.preparar(frame)
+
+    esperada, region_esperada = calc.EntradaDetector(resolucion=(640, 360)).preparar(frame)
+    assert img_rgb.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(imagen_detector(img_rgb), esperada)
+    assert region == region_esperada
+
+
+def test_buffers_no_se_reasignan_al_encoger():
+    entrada = calc.EntradaDetector(resolucion=None, reutilizar=True)
+    entrada.preparar(benchmark.frame_sintetico(1280, 720))
+    buffer = entrada.buffers["rgb"]
+    entrada.preparar(benchmark.frame_sintetico(640, 360))
+    assert entrada.buffers["rgb"] is buffer
+
+
+def test_espejo_de_landmarks_igual_que_voltear_el_frame():
+    captura = benchmark.frame_sintetico(1280, 720, semilla=5)
+    volteada = cv2.flip(captura, 1)
+
+    # El detector sin voltear ve los píxeles en espejo de los del frame volteado
+    img_espejo, region_espejo = calc.EntradaDetector(resolucion=(640, 360)).preparar(captura, espejo=True)
+    img_volteada, region = calc.EntradaDetector(resolucion=(640, 360)).preparar(volteada)
+    np.testing.assert_array_equal(img_espejo, cv2.flip(img_volteada, 1))
+
+    # Y ve cada mano en x -> 1 - x y con el lado contrario
+    resultado = benchmark.cargar_fixture(5)
+    espejado = vision.HandLandmarkerResult(
+        handedness=[[category.Category(index=0, score=lado[0].score,
+                                       category_name="Left" if lado[0].category_name == "Right" else "Right")]
+                    for lado in resultado.handedness],
+        hand_landmarks=[[landmark.NormalizedLandmark(x=1 - lm.x, y=lm.y, z=lm.z) for lm in mano]
+                        for mano in resultado.hand_landmarks],
+        hand_world_landmarks=[],
+    )
+    esperadas = calc.procesar_manos(resultado, volteada, dibujar=False, region=region)
+    manos = calc.procesar_manos(espejado, captura, dibujar=False, region=region_espejo)
+    assert [(m.handedness, m.dedos) for m in manos] == [(m.handedness, m.dedos) for m in esperadas]
+    for mano, esperada in zip(manos, esperadas):
+        np.testing.assert_allclose(mano.landmarks, esperada.landmarks, atol=1e-6)
+        assert abs(mano.centro_x - esperada.centro_x) <= 1 and mano.centro_y == esperada.centro_y
+
+
+def asignado_por_frame(reutilizar, frames=20):
+    """Pico de memoria asignada (tracemalloc) en un frame de voltear y preparar, ya en régimen"""
+    camino = calc.CaminoFrames(reutilizar)
+    entrada = calc.EntradaDetector(resolucion=(640, 360), reutilizar=reutilizar)
+    captura = benchmark.frame_sintetico(1280, 720)
+    contador = ContadorAsignaciones()
+    try:
+        for _ in range(frames):
+            contador.empezar_frame()
+            img = camino.voltear(captura)
+            entrada.preparar(img)
+            contador.terminar_frame()
+    finally:
+        contador.detener()
+    return contador.bytes.valores()[frames // 2:].max()
+
+
+def test_reutilizar_no_asigna_frames():
+    tamano_frame = 1280 * 720 * 3
+    # Sin reutilizar cada frame asigna al menos el frame volteado
+    assert asignado_por_frame(False) >= tamano_frame
+    assert asignado_por_frame(True) < tamano_frame // 100
@@ -0,0 +1,92 @@
+"""Mano de la selección, detector de cada fase y autoajuste solo en el cálculo"""
+
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+from metricas import Metricas
+
+
+def mano(x0, y0, lado, dedos=1):
+    """Mano cuadrada de lado píxeles (en un frame de 1280x720) con esquina en x0, y0"""
+    landmarks = np.zeros((21, 3))
+    landmarks[:, 0] = np.linspace(x0, x0 + lado, 21) / 1280
+    landmarks[:, 1] = np.linspace(y0, y0 + lado, 21) / 720
+    return calc.Mano(dedos=dedos, centro_x=x0 + lado / 2, centro_y=y0 + lado / 2, landmarks=landmarks)
+
+
+@pytest.fixture
+def manos():
+    # Antigua y pequeña, grande en una esquina, mediana en el centro
+    return [mano(100, 100, 50, 1), mano(900, 400, 300, 2), mano(600, 320, 80, 3)]
+
+
+def test_elegir_mano(manos):
+    assert calc.elegir_mano(manos, "antigua", 1280, 720) is manos[0]
+    assert calc.elegir_mano(manos, "grande", 1280, 720) is manos[1]
+    assert calc.elegir_mano(manos, "central", 1280, 720) is manos[2]
+    assert calc.elegir_mano([], "grande", 1280, 720) is None
+    with pytest.raises(ValueError):
+        calc.elegir_mano(manos, "otra", 1280, 720)
+
+
+def test_manos_de_fase(manos, monkeypatch):
+    monkeypatch.setattr(calc, "DETECTOR_POR_FASE", True)
+    app = calc.CalculadoraApp()
+    app.maquina.criterio_seleccion = "grande"
+    assert app.manos_de_fase(manos, 1280, 720) == [manos[1]]
+
+    app.maquina.fase_actual = "calculo"
+    assert app.manos_de_fase(manos, 1280, 720) is manos
+
+    app.maquina.fase_actual = "seleccion"
+    monkeypatch.setattr(calc, "DETECTOR_POR_FASE", False)
+    assert app.manos_de_fase(manos, 1280, 720) is manos
+
+
+def test_r_vuelve_al_detector_de_la_seleccion():
+    app = calc.CalculadoraApp()
+    seleccion, calculo = object(), object()
+    app.detectores = {"seleccion": seleccion, "calculo": calculo}
+    app.config_fases["seleccion"]["resolucion"] = (640, 360)
+    app.config_fases["calculo"]["resolucion"] = None
+    app.usar_detector_fase("seleccion")
+
+    app.maquina.fase_actual = "calculo"
+    app.cambiar_detector()
+    assert (app.detector, app.entrada.resolucion, app.fase_detector) == (calculo, None, "calculo")
+
+    assert app.manejar_tecla(ord("r"))
+    app.cambiar_detector()
+    assert (app.detector, app.entrada.resolucion, app.fase_detector) == (seleccion, (640, 360), "seleccion")
+
+
+def test_autoajuste_no_mide_la_seleccion(monkeypatch):
+    monkeypatch.setattr(calc, "DETECTOR_POR_FASE", True)
+    app = calc.CalculadoraApp()
+    app.autoajuste = calc.AutoAjuste(fps_objetivo=24.0, calibracion=3.0, intervalo=1.0)
+    app.metricas.activa = True
+    app.fase_detector = "seleccion"
+    for _ in range(10):
+        app.metricas.frames.agregar(1 / 60)
+
+    app.ajustar_calidad()
+    assert app.autoajuste.inicio is None
+    assert app.autoajuste.pausa is not None
+
+
+def test_pausa_no_consume_calibracion():
+    ajuste = calc.AutoAjuste(fps_objetivo=24.0, calibracion=3.0, intervalo=1.0)
+    metricas = Metricas(activa=True)
+
+    def ventana(ahora, fps):
+        for _ in range(10):
+            metricas.frames.agregar(1 / fps)
+        return ajuste.evaluar(metricas, ahora)
+
+    ventana(0.0, 10)
+    ajuste.pausar(0.5)
+    # Lo medido durante la pausa (muy rápido, en la selección) no cuenta
+    assert ventana(100.0, 60) is None
+    # La calibración sigue: medio segundo gastado, baja en la primera ventana lenta
+    assert ventana(101.0, 10) is calc.PERFILES_CALIDAD[1]
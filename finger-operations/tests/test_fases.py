@@ -0,0 +1,66 @@
+"""La máquina de fases da el mismo estado para la misma secuencia de eventos"""
+
+import pytest
+
+import calculadora_dedos as calc
+
+ANCHO, ALTO = 1280, 720
+
+
+def mano(x, dedos):
+    return calc.Mano(dedos=dedos, centro_x=x, centro_y=ALTO // 2)
+
+
+def manos_en(maquina, manos, ahora):
+    return maquina.procesar(calc.EventoManos(manos, ahora, ANCHO, ALTO))
+
+
+def test_avisos_en_seleccion():
+    maquina = calc.MaquinaFases()
+    assert manos_en(maquina, [], 0.0)["aviso"] == "muestra"
+    assert manos_en(maquina, [mano(640, 0)], 0.1)["aviso"] == "levanta"
+    assert manos_en(maquina, [mano(640, 5)], 0.2)["aviso"] == "maximo"
+    assert maquina.fase_actual == "seleccion"
+
+
+def test_seleccion_tras_mantener_los_dedos():
+    maquina = calc.MaquinaFases()
+    manos_en(maquina, [mano(640, 2)], 10.0)
+    estado = manos_en(maquina, [mano(640, 2)], 10.0 + calc.TIEMPO_CONFIRMACION / 2)
+    assert estado["progreso"] == pytest.approx(0.5)
+    assert maquina.fase_actual == "seleccion"
+
+    estado = manos_en(maquina, [mano(640, 2)], 10.0 + calc.TIEMPO_CONFIRMACION)
+    assert estado["seleccionada"] == 2
+    assert (maquina.fase_actual, maquina.operacion_seleccionada) == ("calculo", 2)
+
+
+def test_cambiar_de_dedos_reinicia_la_cuenta():
+    maquina = calc.MaquinaFases()
+    manos_en(maquina, [mano(640, 1)], 0.0)
+    manos_en(maquina, [mano(640, 3)], calc.TIEMPO_CONFIRMACION - 0.1)
+    estado = manos_en(maquina, [mano(640, 3)], calc.TIEMPO_CONFIRMACION + 0.1)
+    assert "seleccionada" not in estado
+    assert estado["progreso"] == pytest.approx(0.2 / calc.TIEMPO_CONFIRMACION)
+
+
+def test_calculo_suma_cada_lado_y_r_reinicia():
+    maquina = calc.MaquinaFases()
+    manos_en(maquina, [mano(640, 1)], 0.0)
+    manos_en(maquina, [mano(640, 1)], calc.TIEMPO_CONFIRMACION)
+
+    estado = manos_en(maquina, [mano(200, 3), mano(1000, 2), mano(300, 1)], 5.0)
+    assert (estado["num_izq"], estado["num_der"]) == (4, 2)
+    assert estado["resultado"] == 6
+
+    estado = maquina.procesar(calc.EventoTecla("r", 6.0))
+    assert estado["reiniciada"]
+    assert (maquina.fase_actual, maquina.operacion_seleccionada) == ("seleccion", None)
+
+
+def test_tick_vuelve_a_evaluar_las_ultimas_manos():
+    maquina = calc.MaquinaFases()
+    manos_en(maquina, [mano(640, 4)], 0.0)
+    manos_en(maquina, [mano(640, 4)], 0.5)
+    estado = maquina.procesar(calc.EventoTick(0.5 + calc.TIEMPO_CONFIRMACION))
+    assert estado["seleccionada"] == 4
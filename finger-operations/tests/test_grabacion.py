@@ -0,0 +1,46 @@
+"""Una sesión grabada con GrabadorLandmarks se reproduce con las mismas manos y dedos"""
+
+import numpy as np
+
+import benchmark
+import calculadora_dedos as calc
+import reproducir
+from grabacion import GrabadorLandmarks, cargar_grabacion, iterar_detecciones
+
+ANCHO, ALTO = 1280, 720
+
+
+def manos_fixture(n):
+    region = calc.RegionDeteccion(0, 0, ANCHO, ALTO, ANCHO, ALTO)
+    return calc.procesar_manos(benchmark.cargar_fixture(n), None, dibujar=False, region=region)
+
+
+def test_ida_y_vuelta(tmp_path):
+    ruta = str(tmp_path / "sesion.npy")
+    sesion = [(0, manos_fixture(2)), (33, []), (66, manos_fixture(5))]
+    with GrabadorLandmarks(ruta) as grabador:
+        for timestamp_ms, manos in sesion:
+            grabador.grabar(timestamp_ms, manos, ANCHO, ALTO)
+
+    detecciones = list(iterar_detecciones(cargar_grabacion(ruta)))
+    assert [(frame, ts, len(filas)) for frame, ts, _, _, filas in detecciones] == [(0, 0, 2), (1, 33, 0), (2, 66, 5)]
+    for (_, manos), (_, _, ancho, alto, filas) in zip(sesion, detecciones):
+        assert (ancho, alto) == (ANCHO, ALTO)
+        esperados = np.array([mano.landmarks for mano in manos], dtype=np.float32).reshape(-1, 21, 3)
+        np.testing.assert_array_equal(filas["landmarks"], esperados)
+
+    registros = list(reproducir.reproducir(ruta))
+    assert [r["manos"] for r in registros] == [2, 0, 5]
+    for (_, manos), registro in zip(sesion, registros):
+        assert sorted(registro["dedos"]) == sorted(mano.dedos for mano in manos)
+
+
+def test_grabacion_cortada_se_puede_leer(tmp_path):
+    ruta = str(tmp_path / "cortada.npy")
+    grabador = GrabadorLandmarks(ruta)
+    grabador.grabar(0, manos_fixture(1), ANCHO, ALTO)
+    grabador.fichero.flush()
+
+    # Sin cerrar: la cabecera aún dice 0 filas
+    assert len(cargar_grabacion(ruta)) == 1
+    grabador.cerrar()
@@ -0,0 +1,146 @@
+"""GrabadorVideo: políticas de descarte, contadores y segmentos por duración y tamaño, con un escritor falso"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import grabador_video
+from grabador_video import GrabadorVideo
+
+
+class EscritorFalso:
+    """Sustituto de cv2.VideoWriter: anota el valor de cada frame y hace crecer el fichero como un codec sin compresión"""
+
+    creados = []
+    abre = True
+    # Si se fija, write espera a que se abra: simula un codificador que no da abasto
+    paso = None
+    escribiendo = None
+
+    def __init__(self, ruta, fourcc, fps, tamano):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.frames = []
+        if self.abre:
+            open(ruta, "wb").close()
+        EscritorFalso.creados.append(self)
+
+    def isOpened(self):
+        return self.abre
+
+    def write(self, img):
+        assert (img.shape[1], img.shape[0]) == self.tamano
+        self.frames.append(int(img[0, 0, 0]))
+        if EscritorFalso.escribiendo is not None:
+            EscritorFalso.escribiendo.set()
+            EscritorFalso.paso.wait(5)
+        with open(self.ruta, "ab") as fichero:
+            fichero.write(img.tobytes())
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def escritor(monkeypatch):
+    monkeypatch.setattr(EscritorFalso, "creados", [])
+    monkeypatch.setattr(grabador_video.cv2, "VideoWriter", EscritorFalso)
+    return EscritorFalso
+
+
+def frame(valor, alto=8, ancho=8):
+    return np.full((alto, ancho, 3), valor, dtype=np.uint8)
+
+
+def segmentos(escritor):
+    return [e.frames for e in escritor.creados]
+
+
+@pytest.mark.parametrize("politica, esperados", [("antiguos", [0, 5, 6, 7, 8]), ("nuevos", [0, 1, 2, 3, 4])])
+def test_politicas_de_descarte(tmp_path, escritor, monkeypatch, politica, esperados):
+    monkeypatch.setattr(escritor, "paso", threading.Event())
+    monkeypatch.setattr(escritor, "escribiendo", threading.Event())
+    grabador = GrabadorVideo(str(tmp_path), fps=30, capacidad=4, politica=politica)
+    grabador.empezar()
+    grabador.enviar(frame(0))
+    # El hilo queda atascado escribiendo el frame 0: la cola se llena y los siguientes compiten por sitio
+    assert escritor.escribiendo.wait(5)
+    for valor in range(1, 9):
+        grabador.enviar(frame(valor))
+    assert grabador.profundidad == 4 and grabador.cola_maxima == 4
+    assert grabador.descartados == 4
+    escritor.paso.set()
+    grabador.cerrar()
+
+    assert segmentos(escritor) == [esperados]
+    assert grabador.escritos == 5 and grabador.descartados == 4
+
+
+def test_contadores_sin_descartes(tmp_path, escritor):
+    grabador = GrabadorVideo(str(tmp_path), fps=30, capacidad=64)
+    grabador.empezar()
+    for valor in range(20):
+        grabador.enviar(frame(valor))
+    grabador.cerrar()
+    assert segmentos(escritor) == [list(range(20))]
+    assert grabador.escritos == 20 and grabador.descartados == 0 and grabador.segmentos == 1
+
+
+def test_sin_grabar_no_encola(tmp_path, escritor):
+    grabador = GrabadorVideo(str(tmp_path))
+    grabador.enviar(frame(1))
+    assert grabador.profundidad == 0 and grabador.hilo is None
+
+
+def test_rotacion_por_duracion(tmp_path, escritor):
+    # 1 s a 5 FPS: 5 frames por segmento
+    grabador = GrabadorVideo(str(tmp_path), fps=5, capacidad=64, duracion_segmento=1.0)
+    grabador.empezar()
+    for valor in range(12):
+        grabador.enviar(frame(valor))
+    grabador.cerrar()
+    assert segmentos(escritor) == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [10, 11]]
+    assert grabador.segmentos == 3 and grabador.escritos == 12
+    assert len({e.ruta for e in escritor.creados}) == 3
+
+
+def test_rotacion_por_tamano(tmp_path, escritor):
+    # A 1 FPS el tamaño se consulta en cada frame; caben 3 frames de 8x8 por fichero
+    grabador = GrabadorVideo(str(tmp_path), fps=1, capacidad=64, duracion_segmento=None,
+                             tamano_segmento=3 * frame(0).nbytes)
+    grabador.empezar()
+    for valor in range(7):
+        grabador.enviar(frame(valor))
+    grabador.cerrar()
+    assert segmentos(escritor) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_rotacion_por_resolucion_y_por_sesion(tmp_path, escritor):
+    grabador = GrabadorVideo(str(tmp_path), fps=30, capacidad=64)
+    grabador.empezar()
+    grabador.enviar(frame(0))
+    grabador.enviar(frame(1, alto=4))
+    grabador.parar()
+    grabador.empezar()
+    grabador.enviar(frame(2, alto=4))
+    grabador.cerrar()
+    assert segmentos(escritor) == [[0], [1], [2]]
+    assert [e.tamano for e in escritor.creados] == [(8, 8), (8, 4), (8, 4)]
+
+
+def test_fichero_que_no_se_abre(tmp_path, escritor, monkeypatch):
+    monkeypatch.setattr(escritor, "abre", False)
+    grabador = GrabadorVideo(str(tmp_path), fps=30, capacidad=64)
+    grabador.empezar()
+    for valor in range(3):
+        grabador.enviar(frame(valor))
+    grabador.cerrar()
+    # El primer frame se descarta al fallar la apertura; el resto, o no entra o también se descarta
+    assert grabador.escritos == 0 and grabador.descartados >= 1
+    assert grabador.error and not grabador.grabando and grabador.segmentos == 0
+
+
+def test_politica_desconocida():
+    with pytest.raises(ValueError):
+        GrabadorVideo(politica="todos")
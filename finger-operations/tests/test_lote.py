@@ -0,0 +1,57 @@
+"""calculadora_lote recorre una carpeta de imágenes con la máquina de fases y sin app en vivo"""
+
+import cv2
+import numpy as np
+
+import benchmark
+import calculadora_dedos as calc
+import calculadora_lote as lote
+
+
+class DetectorFalso:
+    def __init__(self, resultado):
+        self.resultado = resultado
+        self.timestamps = []
+        self.imagenes = []
+
+    def detect_for_video(self, imagen, timestamp_ms):
+        self.timestamps.append(timestamp_ms)
+        self.imagenes.append(imagen.numpy_view().copy())
+        return self.resultado
+
+    def close(self):
+        pass
+
+
+def test_un_registro_por_imagen(tmp_path, monkeypatch):
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.zeros((360, 640, 3), dtype=np.uint8))
+    detector = DetectorFalso(benchmark.cargar_fixture(2))
+    monkeypatch.setattr(calc, "crear_detector", lambda modo: detector)
+    monkeypatch.setattr(calc, "CalculadoraApp", None)
+
+    registros = list(lote.procesar_fuente(str(tmp_path), fps_imagenes=10))
+
+    assert [r["frame"] for r in registros] == [0, 1, 2]
+    assert detector.timestamps == [0, 100, 200]
+    for registro in registros:
+        assert registro["manos"] == 2
+        assert registro["fase"] == "seleccion"
+        assert len(registro["dedos"]) == len(registro["dedos_votados"]) == 2
+        assert registro["imagen"].endswith(".png")
+
+
+def test_imagenes_de_distinto_tamano(tmp_path, monkeypatch):
+    imagenes = [benchmark.frame_sintetico(1280, 720, semilla=1), benchmark.frame_sintetico(640, 480, semilla=2),
+                benchmark.frame_sintetico(960, 540, semilla=3)]
+    for i, img in enumerate(imagenes):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), img)
+    detector = DetectorFalso(benchmark.cargar_fixture(1))
+    monkeypatch.setattr(calc, "crear_detector", lambda modo: detector)
+
+    list(lote.procesar_fuente(str(tmp_path), espejo=False))
+
+    # Cada imagen llega entera al detector aunque los buffers se crearan para una mayor
+    assert len(detector.imagenes) == len(imagenes)
+    for vista, img in zip(detector.imagenes, imagenes):
+        np.testing.assert_array_equal(vista, cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
@@ -0,0 +1,168 @@
+"""HistogramaAnillo da los percentiles de sus últimas muestras y Metricas exporta en formato Prometheus y CSV"""
+
+import csv
+import os
+import re
+
+import numpy as np
+import pytest
+
+from metricas import ContadorAsignaciones, HistogramaAnillo, Metricas
+
+# Línea de muestra del formato de texto de Prometheus: nombre{etiquetas} valor
+MUESTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? (\S+)$')
+
+
+def leer_prometheus(ruta):
+    """{(nombre, etiquetas): valor}; comprueba que cada métrica declara HELP y TYPE antes de sus muestras"""
+    declaradas = {}
+    muestras = {}
+    with open(ruta, encoding="utf-8") as f:
+        texto = f.read()
+    assert texto.endswith("\n")
+    for linea in texto.splitlines():
+        if linea.startswith("# "):
+            partes = linea.split(" ", 3)
+            assert partes[1] in ("HELP", "TYPE") and len(partes) == 4
+            declaradas.setdefault(partes[2], set()).add(partes[1])
+            if partes[1] == "TYPE":
+                assert partes[3] in ("gauge", "counter", "summary")
+            continue
+        coincidencia = MUESTRA.match(linea)
+        assert coincidencia, linea
+        nombre = re.sub(r"_(sum|count)$", "", coincidencia.group(1))
+        assert declaradas.get(nombre) == {"HELP", "TYPE"}, linea
+        muestras[(coincidencia.group(1), coincidencia.group(2) or "")] = float(coincidencia.group(4))
+    return muestras
+
+
+@pytest.mark.parametrize("n", [1, 7, 100, 101, 350])
+def test_percentiles_de_las_ultimas_muestras(n):
+    valores = np.random.default_rng(n).exponential(0.01, n)
+    histograma = HistogramaAnillo(100)
+    for valor in valores:
+        histograma.agregar(valor)
+    # Tras dar la vuelta al anillo solo cuentan las últimas 100
+    ultimas = valores[-100:]
+    assert histograma.percentiles() == pytest.approx(np.percentile(ultimas, (50, 95, 99)).tolist())
+    assert histograma.percentiles((0, 100)) == pytest.approx([ultimas.min(), ultimas.max()])
+    assert sorted(histograma.valores()) == pytest.approx(sorted(ultimas))
+    # Total y suma sí acumulan toda la sesión
+    assert histograma.total == n and histograma.suma == pytest.approx(valores.sum())
+    assert histograma.ultimo() == valores[-1]
+
+
+def test_histograma_vacio():
+    histograma = HistogramaAnillo(8)
+    assert histograma.percentiles() == [0.0, 0.0, 0.0]
+    assert histograma.ultimo() == 0.0 and len(histograma.recientes(4)) == 0
+
+
+def test_recientes_en_orden_tras_dar_la_vuelta():
+    histograma = HistogramaAnillo(4)
+    for valor in range(1, 7):
+        histograma.agregar(valor)
+    assert histograma.recientes(3).tolist() == [4, 5, 6]
+    assert histograma.recientes(10).tolist() == [3, 4, 5, 6]
+
+
+def metricas_de_prueba():
+    metricas = Metricas(activa=True, capacidad=64)
+    for i in range(1, 101):
+        metricas.registrar("deteccion", i / 1000)
+        metricas.registrar("dibujo", 0.002)
+    for intervalo in (0.03, 0.04, 0.03):
+        metricas.frames.agregar(intervalo)
+    metricas.registrar_indicador("video_descartados_total", "Frames descartados", lambda: 7, tipo="counter")
+    metricas.registrar_indicador("video_cola", "Frames pendientes", lambda: 3)
+    return metricas
+
+
+def test_exportar_prometheus(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+    metricas = metricas_de_prueba()
+    metricas.exportar(ruta)
+    muestras = leer_prometheus(ruta)
+
+    p50, p95, p99 = np.percentile(np.arange(37, 101) / 1000, (50, 95, 99))
+    for q, esperado in (("0.5", p50), ("0.95", p95), ("0.99", p99)):
+        clave = ("calculadora_etapa_segundos", f'{{etapa="deteccion",quantile="{q}"}}')
+        assert muestras[clave] == pytest.approx(esperado, abs=1e-6)
+    assert muestras[("calculadora_etapa_segundos_count", '{etapa="deteccion"}')] == 100
+    assert muestras[("calculadora_etapa_segundos_sum", '{etapa="deteccion"}')] == pytest.approx(5.05)
+    assert muestras[("calculadora_etapa_segundos_count", '{etapa="dibujo"}')] == 100
+    assert muestras[("calculadora_fps", "")] == pytest.approx(3 / 0.1, abs=0.01)
+    assert muestras[("calculadora_video_descartados_total", "")] == 7
+    assert muestras[("calculadora_video_cola", "")] == 3
+    assert os.listdir(tmp_path) == ["metricas.prom"]
+
+
+def test_exportar_prometheus_con_asignaciones(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+    metricas = metricas_de_prueba()
+    metricas.asignaciones = ContadorAsignaciones(8)
+    metricas.asignaciones.detener()
+    for valor in (100, 200, 300):
+        metricas.asignaciones.bytes.agregar(valor)
+    metricas.exportar(ruta)
+    muestras = leer_prometheus(ruta)
+    assert muestras[("calculadora_asignacion_frame_bytes", '{quantile="0.5"}')] == 200
+    assert muestras[("calculadora_asignacion_frame_bytes_sum", "")] == 600
+    assert muestras[("calculadora_asignacion_frame_bytes_count", "")] == 3
+
+
+def test_exportar_prometheus_atomico(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "metricas.prom")
+    metricas = metricas_de_prueba()
+    metricas.exportar(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        anterior = f.read()
+
+    # Si la exportación falla antes de sustituir el fichero, el scraper sigue leyendo el anterior entero
+    metricas.registrar("deteccion", 1.0)
+
+    def fallar(origen, destino):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(os, "replace", fallar)
+    with pytest.raises(OSError):
+        metricas.exportar(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        assert f.read() == anterior
+
+    monkeypatch.undo()
+    metricas.exportar(ruta)
+    assert leer_prometheus(ruta)[("calculadora_etapa_segundos_count", '{etapa="deteccion"}')] == 101
+    assert sorted(os.listdir(tmp_path)) == ["metricas.prom"]
+
+
+def test_exportar_csv_anade_filas(tmp_path):
+    ruta = str(tmp_path / "metricas.csv")
+    metricas = metricas_de_prueba()
+    metricas.exportar(ruta)
+    metricas.registrar("deteccion", 0.5)
+    metricas.exportar(ruta)
+
+    with open(ruta, encoding="utf-8", newline="") as f:
+        filas = list(csv.DictReader(f))
+    assert list(filas[0]) == ["timestamp", "etapa", "muestras", "p50_ms", "p95_ms", "p99_ms"]
+    # Cabecera una sola vez y una fila por etapa más la del intervalo entre frames en cada exportación
+    assert [fila["etapa"] for fila in filas] == ["deteccion", "dibujo", "frame"] * 2
+    deteccion = filas[0]
+    assert int(deteccion["muestras"]) == 100
+    esperados = np.percentile(np.arange(37, 101), (50, 95, 99))
+    assert [float(deteccion[c]) for c in ("p50_ms", "p95_ms", "p99_ms")] == pytest.approx(esperados, abs=1e-3)
+    assert int(filas[3]["muestras"]) == 101
+    assert float(filas[2]["p50_ms"]) == pytest.approx(30.0)
+
+
+def test_exportar_solo_cuando_toca(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+    metricas = metricas_de_prueba()
+    metricas.ruta_exportacion = ruta
+    metricas.intervalo_exportacion = 10.0
+    metricas.exportar_si_toca()
+    assert not os.path.exists(ruta)
+    metricas.ultima_exportacion -= 10.0
+    metricas.exportar_si_toca()
+    assert os.path.exists(ruta)
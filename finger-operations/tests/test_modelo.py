@@ -0,0 +1,82 @@
+"""Verificación del modelo: solo se acepta el hash fijado y nunca queda una descarga a medias"""
+
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+import modelo
+
+
+@pytest.fixture(autouse=True)
+def sin_verificados():
+    modelo._verificados.clear()
+    modelo._buffers.clear()
+
+
+def crear_task(ruta, contenido=b"modelo"):
+    memoria = io.BytesIO()
+    with zipfile.ZipFile(memoria, "w") as paquete:
+        paquete.writestr("hand_detector.tflite", contenido)
+    with open(ruta, "wb") as f:
+        f.write(memoria.getvalue())
+    return hashlib.sha256(memoria.getvalue()).hexdigest()
+
+
+def test_descarga_con_el_hash_publicado(tmp_path):
+    origen = tmp_path / "origen.task"
+    digest = crear_task(origen)
+    destino = tmp_path / "cache" / modelo.NOMBRE_MODELO
+    modelo.descargar_modelo(str(destino), origen.as_uri(), digest)
+    assert destino.read_bytes() == origen.read_bytes()
+
+
+def test_descarga_con_otro_hash_se_rechaza(tmp_path):
+    origen = tmp_path / "origen.task"
+    crear_task(origen)
+    directorio = tmp_path / "cache"
+    with pytest.raises(modelo.ModeloInvalido):
+        modelo.descargar_modelo(str(directorio / modelo.NOMBRE_MODELO), origen.as_uri(), "0" * 64)
+    # Ni el modelo ni el temporal quedan en la caché
+    assert os.listdir(directorio) == []
+
+
+@pytest.mark.skipif("CALCULADORA_MODELO_SHA256" in os.environ, reason="hash sustituido por el entorno")
+def test_hash_publicado_fijado_por_defecto():
+    assert modelo.MODEL_SHA256 == "fbc2a30080c3c557093b5ddfc334698132eb341044ccee322ccf8bcf3607cde1"
+    # Sin más configuración la descarga usa ese hash: no se rechaza por falta de uno
+    assert modelo.descargar_modelo.__defaults__[-1] == modelo.MODEL_SHA256
+    assert modelo.obtener_modelo.__defaults__[3] == modelo.MODEL_SHA256
+
+
+def test_sin_hash_fijado_no_se_descarga(tmp_path):
+    origen = tmp_path / "origen.task"
+    crear_task(origen)
+    with pytest.raises(modelo.ModeloInvalido):
+        modelo.descargar_modelo(str(tmp_path / modelo.NOMBRE_MODELO), origen.as_uri(), None)
+    assert not (tmp_path / modelo.NOMBRE_MODELO).exists()
+
+
+def test_cache_con_otro_hash_se_descarga_de_nuevo(tmp_path):
+    origen = tmp_path / "origen.task"
+    digest = crear_task(origen)
+    crear_task(tmp_path / modelo.NOMBRE_MODELO, b"otro modelo")
+    ruta = modelo.obtener_modelo(None, str(tmp_path), origen.as_uri(), digest)
+    assert modelo.sha256_fichero(ruta) == digest
+
+
+def test_modelo_truncado(tmp_path):
+    ruta = tmp_path / modelo.NOMBRE_MODELO
+    crear_task(ruta)
+    ruta.write_bytes(ruta.read_bytes()[:-10])
+    with pytest.raises(modelo.ModeloInvalido):
+        modelo.verificar_modelo(str(ruta), None)
+
+
+def test_buffer_compartido_en_el_proceso(tmp_path):
+    ruta = tmp_path / modelo.NOMBRE_MODELO
+    crear_task(ruta)
+    assert modelo.cargar_buffer_modelo(str(ruta)) is modelo.cargar_buffer_modelo(str(ruta))
+    assert modelo.cargar_buffer_modelo(str(ruta)) == ruta.read_bytes()
@@ -0,0 +1,70 @@
+"""Anillo de frames en memoria compartida y reparto de los detectores entre cámaras"""
+
+import numpy as np
+import pytest
+
+import multicamara
+
+
+@pytest.fixture
+def anillo():
+    anillo = multicamara.AnilloFrames(None, 4, 6, slots=3, crear=True)
+    yield anillo
+    anillo.cerrar(borrar=True)
+
+
+def frame(valor):
+    return np.full((4, 6, 3), valor, dtype=np.uint8)
+
+
+def test_leer_el_frame_escrito(anillo):
+    anillo.escribir(1, 1000, frame(7))
+    img, timestamp_ms = anillo.leer(1)
+    assert anillo.ultima_secuencia() == 1
+    assert timestamp_ms == 1000
+    assert np.array_equal(img, frame(7))
+
+
+def test_frame_sobrescrito_se_descarta(anillo):
+    for secuencia in range(1, 5):
+        anillo.escribir(secuencia, secuencia * 10, frame(secuencia))
+    # Con 3 slots, la secuencia 4 ocupa el slot de la 1
+    assert anillo.leer(1) is None
+    img, timestamp_ms = anillo.leer(4)
+    assert timestamp_ms == 40 and img[0, 0, 0] == 4
+
+
+def test_slot_a_medio_escribir_se_descarta(anillo):
+    anillo.escribir(2, 20, frame(2))
+    # El escritor marca el slot con -1 mientras copia los píxeles
+    anillo.cabecera[1 + 2 % anillo.slots] = -1
+    assert anillo.leer(2) is None
+
+
+def test_frame_que_cambia_durante_la_copia_se_descarta(anillo, monkeypatch):
+    anillo.escribir(1, 10, frame(1))
+    copiar = np.copyto
+
+    def copiar_y_sobrescribir(destino, origen):
+        # El escritor da la vuelta al anillo mientras el lector copia
+        monkeypatch.setattr(multicamara.np, "copyto", copiar)
+        copiar(destino, origen)
+        anillo.escribir(4, 40, frame(4))
+
+    monkeypatch.setattr(multicamara.np, "copyto", copiar_y_sobrescribir)
+    assert anillo.leer(1) is None
+
+
+def test_lector_de_otro_proceso_ve_el_mismo_anillo(anillo):
+    lector = multicamara.AnilloFrames(anillo.nombre, 4, 6, slots=3)
+    try:
+        anillo.escribir(3, 30, frame(9))
+        assert lector.ultima_secuencia() == 3
+        assert lector.leer(3)[0][0, 0, 0] == 9
+    finally:
+        lector.cerrar()
+
+
+@pytest.mark.parametrize("trabajadores, camaras, esperado", [(4, 1, 4), (4, 3, 2), (1, 3, 1), (6, 2, 3)])
+def test_en_vuelo_por_defecto(trabajadores, camaras, esperado):
+    assert multicamara.en_vuelo_por_defecto(trabajadores, camaras) == esperado
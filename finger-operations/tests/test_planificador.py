@@ -0,0 +1,95 @@
+"""PlanificadorDeteccion: cuándo se salta el detector y cómo se extrapolan las manos"""
+
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+
+ANCHO, ALTO = 640, 360
+
+
+def mano(x, y, lado="Right", dedos=2, id=None):
+    """Mano sintética: los 21 landmarks alrededor de la muñeca en (x, y) normalizados"""
+    landmarks = np.zeros((21, 3))
+    landmarks[:, 0] = x + np.linspace(0, 0.05, 21)
+    landmarks[:, 1] = y - np.linspace(0, 0.1, 21)
+    return calc.Mano(lado, dedos, int(landmarks[9, 0] * ANCHO), int(landmarks[9, 1] * ALTO), 0.9, landmarks, id)
+
+
+def frame(valor):
+    return np.full((ALTO, ANCHO, 3), valor, dtype=np.uint8)
+
+
+def test_cadencia_detecta_uno_de_cada_n():
+    planificador = calc.PlanificadorDeteccion(activo=False)
+    planificador.cadencia = 3
+    assert [planificador.debe_detectar(None) for _ in range(7)] == [False, False, True, False, False, True, False]
+    assert planificador.total_saltados == 5
+    assert planificador.extrapola
+
+
+def test_escena_quieta_salta_hasta_max_saltados():
+    planificador = calc.PlanificadorDeteccion(activo=True, umbral=3.0, max_saltados=2)
+    quieto = frame(100)
+    assert [planificador.debe_detectar(quieto) for _ in range(7)] == [True, False, False, True, False, False, True]
+
+
+def test_movimiento_detecta_enseguida():
+    planificador = calc.PlanificadorDeteccion(activo=True, umbral=3.0, max_saltados=10)
+    assert planificador.debe_detectar(frame(100))
+    # Por debajo del umbral sigue saltando; por encima detecta y la referencia pasa a ser ese frame
+    assert not planificador.debe_detectar(frame(102))
+    assert planificador.debe_detectar(frame(110))
+    assert not planificador.debe_detectar(frame(111))
+    assert planificador.saltados == 1
+
+
+def test_sin_adaptativa_ni_cadencia_detecta_siempre_y_no_guarda():
+    planificador = calc.PlanificadorDeteccion(activo=False)
+    assert all(planificador.debe_detectar(frame(i)) for i in range(0, 250, 50))
+    planificador.registrar([mano(0.5, 0.5)], 0.0)
+    assert planificador.estimar(0.1, ANCHO, ALTO) == []
+
+
+def test_estimar_con_una_sola_deteccion_repite_las_manos():
+    planificador = calc.PlanificadorDeteccion(activo=True)
+    manos = [mano(0.5, 0.5)]
+    planificador.registrar(manos, 0.0)
+    assert planificador.estimar(0.1, ANCHO, ALTO) is manos
+
+
+def test_estimar_extrapola_a_velocidad_constante():
+    planificador = calc.PlanificadorDeteccion(activo=True, horizonte=0.2)
+    planificador.registrar([mano(0.40, 0.5, id=7, dedos=3)], 0.0)
+    ultima = mano(0.42, 0.5, id=7, dedos=3)
+    planificador.registrar([ultima], 0.1)
+
+    (estimada,) = planificador.estimar(0.15, ANCHO, ALTO)
+    np.testing.assert_allclose(estimada.landmarks[:, 0], ultima.landmarks[:, 0] + 0.01)
+    np.testing.assert_allclose(estimada.landmarks[:, 1], ultima.landmarks[:, 1])
+    assert (estimada.id, estimada.dedos, estimada.handedness) == (7, 3, "Right")
+    assert estimada.centro_x == int(estimada.landmarks[9, 0] * ANCHO)
+
+    # Nunca más allá del horizonte
+    (lejana,) = planificador.estimar(5.0, ANCHO, ALTO)
+    np.testing.assert_allclose(lejana.landmarks[:, 0], ultima.landmarks[:, 0] + 0.04)
+
+
+@pytest.mark.parametrize("previa", [mano(0.40, 0.5, lado="Left"), mano(0.10, 0.9)])
+def test_mano_sin_pareja_no_se_mueve(previa):
+    # Otro lado o demasiado lejos: no es la misma mano
+    planificador = calc.PlanificadorDeteccion(activo=True)
+    planificador.registrar([previa], 0.0)
+    ultima = mano(0.42, 0.5)
+    planificador.registrar([ultima], 0.1)
+    (estimada,) = planificador.estimar(0.15, ANCHO, ALTO)
+    np.testing.assert_allclose(estimada.landmarks, ultima.landmarks)
+
+
+def test_cada_mano_sigue_a_su_pareja():
+    planificador = calc.PlanificadorDeteccion(activo=True)
+    planificador.registrar([mano(0.70, 0.5, "Left"), mano(0.20, 0.5, "Right")], 0.0)
+    planificador.registrar([mano(0.22, 0.5, "Right"), mano(0.69, 0.5, "Left")], 0.1)
+    derecha, izquierda = planificador.estimar(0.2, ANCHO, ALTO)
+    assert derecha.landmarks[0, 0] == pytest.approx(0.24)
+    assert izquierda.landmarks[0, 0] == pytest.approx(0.68)
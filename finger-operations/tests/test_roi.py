@@ -0,0 +1,78 @@
+"""Recortes del modo ROI: la imagen que ve el detector y la vuelta a coordenadas del frame"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+import pytest
+
+import benchmark
+import calculadora_dedos as calc
+
+ANCHO, ALTO = 1280, 720
+
+
+def landmarks_en(x0, y0, x1, y1, semilla=0):
+    """Landmarks normalizados al frame completo dentro de la caja en píxeles"""
+    rng = np.random.default_rng(semilla)
+    puntos = rng.uniform((x0, y0, -0.1), (x1, y1, 0.1), (1, 21, 3))
+    return puntos / (ANCHO, ALTO, 1)
+
+
+def al_recorte(landmarks, region):
+    """Lo que devolvería el detector: landmarks normalizados al recorte del frame que vio"""
+    recorte = landmarks.copy()
+    if region.espejo:
+        recorte[:, :, 0] = 1 - recorte[:, :, 0]
+    recorte[:, :, 0] = (recorte[:, :, 0] * region.ancho_frame - region.x) / region.ancho
+    recorte[:, :, 1] = (recorte[:, :, 1] * region.alto_frame - region.y) / region.alto
+    recorte[:, :, 2] /= region.ancho / region.ancho_frame
+    return recorte
+
+
+@pytest.mark.parametrize("espejo", [False, True])
+def test_reubicar_ida_y_vuelta(espejo):
+    landmarks = landmarks_en(300, 200, 500, 450)
+    region = calc.RegionDeteccion(250, 150, 400, 360, ANCHO, ALTO, espejo)
+    np.testing.assert_allclose(calc.reubicar_landmarks(al_recorte(landmarks, region), region), landmarks)
+
+
+def test_region_completa_sin_espejo_no_cambia_nada():
+    landmarks = landmarks_en(0, 0, ANCHO, ALTO)
+    region = calc.RegionDeteccion(0, 0, ANCHO, ALTO, ANCHO, ALTO)
+    np.testing.assert_allclose(calc.reubicar_landmarks(landmarks, region), landmarks)
+
+
+@pytest.mark.parametrize("espejo", [False, True])
+def test_recorte_de_las_manos(espejo):
+    frame = benchmark.frame_sintetico(ANCHO, ALTO, semilla=4)
+    # Las manos están en coordenadas de pantalla, volteadas si hay espejo
+    landmarks = landmarks_en(700, 300, 900, 500)
+    entrada = calc.EntradaDetector(resolucion=None, roi=True, margen=0.1, refresco=2, reutilizar=True)
+
+    # Primero el frame completo: los buffers crecen a 1280x720
+    _, region = entrada.preparar(frame, espejo=espejo)
+    assert (region.x, region.y, region.ancho, region.alto) == (0, 0, ANCHO, ALTO)
+    entrada.actualizar([calc.Mano(landmarks=landmarks[0])], ANCHO, ALTO)
+
+    img_rgb, region = entrada.preparar(frame, espejo=espejo)
+    assert region.ancho < ANCHO and region.alto < ALTO
+    esperada = cv2.cvtColor(frame[region.y:region.y + region.alto, region.x:region.x + region.ancho],
+                            cv2.COLOR_BGR2RGB)
+    imagen = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+    np.testing.assert_array_equal(imagen.numpy_view(), esperada)
+
+    # Las manos caen dentro del recorte y vuelven a sus coordenadas de pantalla
+    recorte = al_recorte(landmarks, region)
+    assert recorte[:, :, :2].min() >= 0 and recorte[:, :, :2].max() <= 1
+    np.testing.assert_allclose(calc.reubicar_landmarks(recorte, region), landmarks)
+
+    # Tras `refresco` recortes vuelve al frame completo para buscar manos nuevas
+    entrada.preparar(frame, espejo=espejo)
+    _, region = entrada.preparar(frame, espejo=espejo)
+    assert (region.ancho, region.alto) == (ANCHO, ALTO)
+
+
+def test_manos_fuera_del_frame_vuelven_al_frame_completo():
+    entrada = calc.EntradaDetector(resolucion=None, roi=True)
+    entrada.actualizar([calc.Mano(landmarks=landmarks_en(-300, -300, -100, -100)[0])], ANCHO, ALTO)
+    assert entrada.caja is None
@@ -0,0 +1,45 @@
+"""SeguidorManos mantiene los IDs entre frames y vota el conteo de dedos"""
+
+import calculadora_dedos as calc
+
+
+def mano(x, dedos):
+    return calc.Mano(dedos=dedos, centro_x=x, centro_y=240)
+
+
+def test_ids_estables_aunque_cambie_el_orden():
+    seguidor = calc.SeguidorManos(activo=True, votos=3)
+    primeras = seguidor.actualizar([mano(100, 1), mano(500, 2)], 640)
+    ids = {m.centro_x: m.id for m in primeras}
+
+    segundas = seguidor.actualizar([mano(505, 2), mano(104, 1)], 640)
+    assert {m.centro_x: m.id for m in segundas} == {104: ids[100], 505: ids[500]}
+    assert [m.id for m in segundas] == sorted(m.id for m in segundas)
+
+
+def test_un_frame_mal_contado_no_cambia_el_voto():
+    seguidor = calc.SeguidorManos(activo=True, votos=5)
+    for _ in range(4):
+        seguidor.actualizar([mano(300, 3)], 640)
+
+    (ruidosa,) = seguidor.actualizar([mano(302, 5)], 640)
+    assert ruidosa.dedos == 3
+    assert ruidosa.dedos_frame == 5
+
+
+def test_en_empate_gana_el_conteo_actual():
+    seguidor = calc.SeguidorManos(activo=True, votos=2)
+    seguidor.actualizar([mano(300, 2)], 640)
+
+    (actual,) = seguidor.actualizar([mano(300, 4)], 640)
+    assert actual.dedos == 4
+
+
+def test_mano_perdida_se_olvida():
+    seguidor = calc.SeguidorManos(activo=True, votos=3, frames_perdida=1)
+    (primera,) = seguidor.actualizar([mano(300, 1)], 640)
+    seguidor.actualizar([], 640)
+    seguidor.actualizar([], 640)
+
+    (nueva,) = seguidor.actualizar([mano(300, 1)], 640)
+    assert nueva.id != primera.id
@@ -0,0 +1,54 @@
+"""La vista previa no guarda JPEG sin clientes y solo resume las manos si se consulta el estado"""
+
+import json
+import time
+import urllib.request
+
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+from servidor_vista import ServidorVista
+
+
+@pytest.fixture
+def vista():
+    servidor = ServidorVista(puerto=0)
+    servidor.iniciar()
+    yield servidor
+    servidor.cerrar()
+
+
+def esperar(condicion, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_sin_clientes_se_descarta_el_ultimo_jpeg(vista):
+    img = np.zeros((48, 64, 3), dtype=np.uint8)
+    respuesta = urllib.request.urlopen(vista.url + "stream.mjpg", timeout=5)
+    esperar(lambda: vista.clientes == 1)
+
+    vista.publicar(img)
+    assert respuesta.readline() == b"--frame\r\n"
+    assert vista.jpeg is not None
+
+    respuesta.close()
+    # El servidor nota la desconexión al escribir el siguiente frame
+    esperar(lambda: vista.publicar(img) or vista.clientes == 0)
+    assert vista.jpeg is None
+
+
+def test_resumen_de_manos_solo_si_se_consulta_el_estado(vista):
+    img = np.zeros((48, 64, 3), dtype=np.uint8)
+    manos = [calc.Mano("Left", 3, id=0)]
+
+    vista.publicar(img, {"fase": "seleccion"}, manos)
+    assert "manos" not in vista.estado
+
+    urllib.request.urlopen(vista.url + "estado.json", timeout=5).read()
+    vista.publicar(img, {"fase": "seleccion"}, manos)
+    estado = json.loads(urllib.request.urlopen(vista.url + "estado.json", timeout=5).read())
+    assert estado["manos"] == [{"id": 0, "lado": "Left", "dedos": 3}]
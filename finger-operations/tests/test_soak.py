@@ -0,0 +1,30 @@
+"""Versión corta de soak.py: con el tiempo acelerado la memoria se mantiene plana"""
+
+import soak
+import calculadora_dedos as calc
+
+TOLERANCIA = 256 * 1024
+
+
+def medir(horas, fps=30):
+    frames = int(horas * 3600 * fps)
+    valores, _, _, _ = soak.medir_memoria(frames, fps, muestras=6, informar=lambda texto: None)
+    assert len(valores) >= 4
+    return soak.crecimiento_memoria(valores)
+
+
+def test_memoria_plana():
+    # 3 minutos de sesión: más de diez vueltas al guion de manos
+    assert medir(0.05) < TOLERANCIA
+
+
+def test_detecta_una_fuga(monkeypatch):
+    fuga = []
+    procesar_manos = calc.procesar_manos
+
+    def procesar_con_fuga(*args, **kwargs):
+        fuga.append(bytearray(1024))
+        return procesar_manos(*args, **kwargs)
+
+    monkeypatch.setattr(calc, "procesar_manos", procesar_con_fuga)
+    assert medir(0.02) > TOLERANCIA
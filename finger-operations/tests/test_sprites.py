@@ -0,0 +1,71 @@
+"""Los sprites y la barra de progreso en caché dibujan lo mismo que el dibujo directo"""
+
+import cv2
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+
+
+def barra_referencia(img, x, y, ancho, alto, progreso_ancho, color_fondo, color_barra):
+    """La barra original: una llamada a cv2.line por columna de avance"""
+    cv2.rectangle(img, (x, y), (x + ancho, y + alto), color_fondo, -1)
+    cv2.rectangle(img, (x, y), (x + ancho, y + alto), (100, 100, 100), 2)
+    for i in range(progreso_ancho):
+        ratio = i / ancho
+        color = tuple(int(c * (1 - ratio * 0.3)) for c in color_barra)
+        cv2.line(img, (x + i, y), (x + i, y + alto), color, 1)
+    cv2.rectangle(img, (x, y), (x + progreso_ancho, y + alto), (255, 255, 255), 1)
+
+
+@pytest.fixture(autouse=True)
+def caches_vacias(monkeypatch):
+    monkeypatch.setattr(calc, "CACHE_UI", True)
+    for cache in (calc.sprites, calc.barras, calc.porcentajes):
+        cache.clear()
+
+
+def fondo():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (120, 320, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("progreso", [0.0, 0.004, 0.37, 0.5, 0.999, 1.0])
+def test_barra_igual_que_la_original(progreso):
+    esperado, directo, cache = fondo(), fondo(), fondo()
+    barra_referencia(esperado, 30, 40, 250, 18, int(250 * progreso), (60, 60, 60), calc.COLORES["exito"])
+    calc.dibujar_barra_progreso(directo, 30, 40, 250, 18, progreso, (60, 60, 60), calc.COLORES["exito"])
+    calc.pegar_barra_progreso(cache, 30, 40, 250, 18, progreso, (60, 60, 60), calc.COLORES["exito"])
+    assert np.array_equal(directo, esperado)
+    assert np.array_equal(cache, esperado)
+
+
+def test_barra_recortada_en_el_borde():
+    esperado, cache = fondo(), fondo()
+    barra_referencia(esperado, 200, 110, 250, 18, 180, (60, 60, 60), (0, 200, 100))
+    calc.pegar_barra_progreso(cache, 200, 110, 250, 18, 0.72, (60, 60, 60), (0, 200, 100))
+    assert np.array_equal(cache, esperado)
+
+
+def test_confirmacion_no_llena_la_cache_compartida():
+    img = np.zeros((720, 1280, 3), dtype=np.uint8)
+    calc.pegar_circulo_numero(img, 100, 100, 7, (255, 0, 0))
+    # Dos pulsaciones completas de 2 s a 30 FPS
+    for _ in range(2):
+        for frame in range(61):
+            calc.dibujar_confirmacion(img, 1, frame / 60)
+    assert len(calc.barras) == 1
+    assert len(calc.porcentajes) <= calc.MAX_PORCENTAJES
+    assert list(calc.sprites) == [("circulo", 7, (255, 0, 0), 60)]
+
+
+def test_texto_en_cache_igual_que_el_directo():
+    # Sobre negro la mezcla premultiplicada reproduce exactamente el antialias
+    directo = np.zeros((120, 320, 3), dtype=np.uint8)
+    calc.dibujar_texto_con_sombra(directo, "12 + 7 = 19", (20, 60), 1, (0, 255, 255), 2)
+    # La primera vez se crea el sprite, la segunda sale de la caché
+    for _ in range(2):
+        cache = np.zeros_like(directo)
+        calc.pegar_texto(cache, "12 + 7 = 19", (20, 60), 1, (0, 255, 255), 2)
+        assert np.array_equal(cache, directo)
+    assert len(calc.sprites) == 1
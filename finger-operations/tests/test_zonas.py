@@ -0,0 +1,83 @@
+"""DistribucionZonas: el modo clásico reparte como clasificar_manos_por_posicion y las zonas propias por su forma"""
+
+import numpy as np
+import pytest
+
+import calculadora_dedos as calc
+
+
+def manos_al_azar(ancho, alto, n, semilla):
+    rng = np.random.default_rng(semilla)
+    # Incluye centros fuera del frame (manos cortadas por el borde)
+    xs = rng.integers(-200, ancho + 200, n)
+    ys = rng.integers(-100, alto + 100, n)
+    dedos = rng.integers(0, 6, n)
+    return [calc.Mano(dedos=int(d), centro_x=int(x), centro_y=int(y)) for x, y, d in zip(xs, ys, dedos)]
+
+
+@pytest.mark.parametrize("ancho, alto", [(640, 480), (641, 481), (1279, 719), (3, 2)])
+def test_clasica_igual_que_por_posicion(ancho, alto):
+    distribucion = calc.DistribucionZonas(None, "operandos")
+    assert distribucion.clasica and distribucion.num_operandos == 2
+    for semilla in range(20):
+        manos = manos_al_azar(ancho, alto, 6, semilla)
+        sumas = distribucion.sumar(manos, ancho, alto).tolist()
+        assert tuple(sumas) == calc.clasificar_manos_por_posicion(manos, ancho)
+
+
+@pytest.mark.parametrize("ancho", [640, 641])
+def test_clasica_en_la_linea_del_medio(ancho):
+    distribucion = calc.DistribucionZonas(None, "operandos")
+    medio = ancho // 2
+    manos = [calc.Mano(dedos=1, centro_x=medio - 1, centro_y=10), calc.Mano(dedos=2, centro_x=medio, centro_y=10)]
+    assert distribucion.sumar(manos, ancho, 480).tolist() == [1, 2]
+    assert calc.clasificar_manos_por_posicion(manos, ancho) == (1, 2)
+
+
+def test_sin_manos():
+    distribucion = calc.DistribucionZonas([(0, 0, 1, 1)] * 3, "operandos")
+    assert distribucion.sumar([], 640, 480).tolist() == [0, 0, 0]
+
+
+def test_cuatro_cuadrantes_y_operaciones_encadenadas():
+    distribucion = calc.DistribucionZonas([(0, 0, .5, .5), (.5, 0, 1, .5), (0, .5, .5, 1), (.5, .5, 1, 1)])
+    assert not distribucion.clasica
+    manos = [calc.Mano(dedos=3, centro_x=100, centro_y=100), calc.Mano(dedos=1, centro_x=500, centro_y=100),
+             calc.Mano(dedos=2, centro_x=100, centro_y=400), calc.Mano(dedos=4, centro_x=500, centro_y=400),
+             calc.Mano(dedos=1, centro_x=120, centro_y=90)]
+    sumas = distribucion.sumar(manos, 640, 480)
+    assert sumas.tolist() == [4, 1, 2, 4]
+    assert distribucion.calcular(sumas, 1) == [11]
+    assert distribucion.calcular(sumas, 2) == [-3]
+
+
+def test_poligono_y_fuera_de_las_zonas():
+    # Triángulo en la mitad izquierda; el resto del frame no es de nadie
+    distribucion = calc.DistribucionZonas([[(0, 0), (.5, 0), (0, 1)]])
+    manos = [calc.Mano(dedos=2, centro_x=20, centro_y=20), calc.Mano(dedos=5, centro_x=300, centro_y=400)]
+    assert distribucion.asignar([(20, 20), (300, 400)], 640, 480).tolist() == [0, -1]
+    assert distribucion.sumar(manos, 640, 480).tolist() == [2]
+
+
+def test_en_los_solapes_gana_la_primera_zona():
+    distribucion = calc.DistribucionZonas([(0, 0, .6, 1), (.4, 0, 1, 1)])
+    assert distribucion.asignar([(320, 240), (100, 240), (600, 240)], 640, 480).tolist() == [0, 0, 1]
+
+
+def test_calculadoras_una_por_zona():
+    distribucion = calc.DistribucionZonas([(0, 0, .5, 1), (.5, 0, 1, 1)], "calculadoras")
+    assert distribucion.num_operandos == 4
+    manos = [calc.Mano(dedos=3, centro_x=50, centro_y=200), calc.Mano(dedos=2, centro_x=250, centro_y=200),
+             calc.Mano(dedos=4, centro_x=350, centro_y=200), calc.Mano(dedos=1, centro_x=600, centro_y=200)]
+    sumas = distribucion.sumar(manos, 640, 480)
+    assert sumas.tolist() == [3, 2, 4, 1]
+    assert distribucion.calcular(sumas, 3) == [6, 4]
+    cajas = distribucion.geometria(640, 480)["cajas"]
+    assert cajas[:2] == [(0, 0, 160, 480), (160, 0, 320, 480)]
+
+
+def test_geometria_en_cache_por_resolucion():
+    distribucion = calc.DistribucionZonas()
+    geometria = distribucion.geometria(640, 480)
+    assert distribucion.geometria(640, 480) is geometria
+    assert distribucion.geometria(1280, 720)["etiquetas"].shape == (720, 1280)